@@ -9,6 +9,8 @@
 # Objkt.com currently does not recognize artifactUri strings longer than 254 characters
 # Any token exceeding this limitation needs to contact Objkt.com directly and request the limitation be removed for their collection
 
+import json
+
 import smartpy as sp
 
 # Define the type for balance_of arguments
@@ -23,40 +25,134 @@ t_balance_of_args = sp.TRecord(
     ),
 ).layout(("requests", "callback"))
 
+# Define the type for operator keys, used by update_operators and the is_operator view
+t_operator_args = sp.TRecord(
+    owner=sp.TAddress, operator=sp.TAddress, token_id=sp.TNat
+).layout(("owner", ("operator", "token_id")))
+
+# Define the type for collection wide operator keys and their updates, the owner of an update is always the sender
+t_operator_for_all_key = sp.TRecord(owner=sp.TAddress, operator=sp.TAddress).layout(("owner", "operator"))
+t_operator_for_all_args = sp.TList(
+    sp.TVariant(add_operator_for_all=sp.TAddress, remove_operator_for_all=sp.TAddress)
+)
+
+# Define the type for mint_batch and begin_artifact arguments
+# Each item carries its own recipient and metadata
+t_mint_args = sp.TRecord(
+    to_=sp.TAddress, metadata=sp.TMap(sp.TString, sp.TBytes)
+).layout(("to_", "metadata"))
+t_mint_batch_args = sp.TList(t_mint_args)
+
+# Define the type for append_artifact_chunk arguments
+t_artifact_chunk_args = sp.TRecord(
+    token_id=sp.TNat, offset=sp.TNat, chunk=sp.TBytes
+).layout(("token_id", ("offset", "chunk")))
+
+# Define the types for composed artworks, each part is a shared fragment id or inline bytes of the token
+t_part = sp.TVariant(fragment=sp.TNat, inline=sp.TBytes)
+t_mint_composed_args = sp.TRecord(
+    to_=sp.TAddress, parts=sp.TList(t_part), metadata=sp.TMap(sp.TString, sp.TBytes)
+).layout(("to_", ("parts", "metadata")))
+# Define the type for mint_with_artifact arguments, artifact is the sha256 of a stored artifact
+t_mint_with_artifact_args = sp.TRecord(
+    to_=sp.TAddress, artifact=sp.TBytes, metadata=sp.TMap(sp.TString, sp.TBytes)
+).layout(("to_", ("artifact", "metadata")))
+t_fragment_chunk_args = sp.TRecord(fragment_id=sp.TNat, chunk=sp.TBytes).layout(("fragment_id", "chunk"))
+
 # Define contract metadata
-# Format the "content" key's value as a JSON string
+# The fields below are stored as the JSON string of the "content" key
 # Ensure to include the minimum keys but additional keys can be added without detriment
 # name, description, interfaces, symbol, creators, type, imageUri
 # imageUri is limited to 254 characters to display on Objkt.com unless limitation is lifted by the marketplace
+#
+# The contract also passes these fields with its compiled off-chain views to init_metadata
+# and the compiler writes that JSON next to the contract as metadata.metadata_base.json
+# Marketplaces and indexers only call token_metadata and the artifact views when they are listed there,
+# composed, stored artifact tokens have no "artifactUri" in the token_metadata big_map
+# Upload the compiled JSON (for example to IPFS) and set the "" key below to its URI before originating,
+# the "content" JSON stored on-chain has no views
+contract_metadata_fields = {
+    "name": "Project Name",
+    "description": "Project Description",
+    "interfaces": ["TZIP-012", "TZIP-016"],
+    "authors": ["Author Name"],
+    "authoraddress": ["Valid tz... address"],
+    "symbol": "SYMBOL",
+    "creators": ["Valid tz... address"],
+    "type": "art",
+    "imageUri": "URI string",
+}
 contract_metadata = sp.big_map(
     {
         "": sp.utils.bytes_of_string('tezos-storage:content'),
-        "content": sp.utils.bytes_of_string(
-            '{"name": "Project Name","description": "Project Description","interfaces": ["TZIP-012", "TZIP-016"],"authors": ["Author Name"],"authoraddress": ["Valid tz... address"],"symbol": "SYMBOL","creators": ["Valid tz... address"],"type":"art","imageUri":"URI string"}'
-        )
+        "content": sp.utils.bytes_of_string(json.dumps(contract_metadata_fields))
     }
 )
 
+# Define the type for paged view arguments
+t_page_args = sp.TRecord(offset=sp.TNat, limit=sp.TNat).layout(("offset", "limit"))
+t_artifact_slice_args = sp.TRecord(token_id=sp.TNat, offset=sp.TNat, length=sp.TNat).layout(
+    ("token_id", ("offset", "length"))
+)
+t_metadata_key_args = sp.TRecord(token_id=sp.TNat, key=sp.TString).layout(("token_id", "key"))
+
+# Address list stored in big_maps so only the entries an entrypoint touches are loaded
+# positions gives O(1) membership checks, items keeps the addresses in a dense range for paged views
+def make_address_list():
+    return sp.record(
+        items=sp.big_map(tkey=sp.TNat, tvalue=sp.TAddress),
+        positions=sp.big_map(tkey=sp.TAddress, tvalue=sp.TNat),
+        size=sp.nat(0),
+    )
+
+# Views added with owner_index=True
+# Token ids held by an owner in pages, pass the owner, the offset of the first id and the maximum number of ids to return
+def tokens_of_owner(contract, params):
+    sp.set_type(params, sp.TRecord(owner=sp.TAddress, offset=sp.TNat, limit=sp.TNat).layout(("owner", ("offset", "limit"))))
+    page = sp.local("page", sp.list(t=sp.TNat))
+    owned = contract.data.owner_tokens
+    end = sp.compute(sp.min(owned.sizes.get(params.owner, default_value=0), params.offset + params.limit))
+    with sp.for_("position", sp.range(params.offset, end)) as position:
+        page.value.push(owned.items[sp.pair(params.owner, position)])
+    sp.result(page.value.rev())
+
+def count_tokens_of_owner(contract, owner):
+    sp.set_type(owner, sp.TAddress)
+    sp.result(contract.data.owner_tokens.sizes.get(owner, default_value=0))
+
 # Use this value to ensure compilers set the proper administrator address control
 ADMIN_ADDRESS = sp.address("tz1ADDRESS")
 
+# Limits for a single mint_batch call
+# The count keeps one batch well under the per-operation gas limit
+# The bytes are the batch as the node serializes it: each item costs its recipient address and pair/map framing
+# (MINT_ITEM_OVERHEAD) and each metadata entry its Elt/string/bytes framing (METADATA_ENTRY_OVERHEAD) on top of the
+# key and value bytes, so a batch that passes the check also leaves room for the operation envelope (about 200 bytes)
+# under the 32768 byte operation size limit and keeps its paid storage under the 60000 byte per-operation storage limit
+MAX_MINT_BATCH_SIZE = 100
+MAX_MINT_BATCH_BYTES = 32000
+MINT_ITEM_OVERHEAD = 34
+METADATA_ENTRY_OVERHEAD = 12
+
 # Definition for NFTs with both Ledger and FA2 compliance
 class Fa2NftMint(sp.Contract):
-    def __init__(self, metadata_base,ADMIN_ADDRESS):
-        self.init_metadata("metadata_base", metadata_base)
+    # owner_index=True keeps an owner -> token ids index up to date in mint, transfer and burn and adds the tokens_of_owner views
+    # Each transfer then writes up to five extra big_map entries, a new owner pays about 300 bytes of extra storage
+    def __init__(self, metadata_base,ADMIN_ADDRESS, owner_index=False):
+        self.owner_index = owner_index
         
-        self.init(
+        storage = dict(
             ledger=sp.big_map(tkey=sp.TNat, tvalue=sp.TAddress),
             admin=ADMIN_ADDRESS,
             next_token_id=sp.nat(0),
-            operators=sp.big_map(
-                tkey=sp.TRecord(
-                    owner=sp.TAddress,
-                    operator=sp.TAddress,
-                    token_id=sp.TNat,
-                ).layout(("owner", ("operator", "token_id"))),
-                tvalue=sp.TUnit,
-            ),
+            # Number of live (owned, not burned) tokens and the positions of their ids for the all_tokens view
+            # Only positions that differ from the token id are stored, see place_token
+            all_tokens=sp.nat(0),
+            token_slots=sp.big_map(tkey=sp.TNat, tvalue=sp.TNat),
+            token_positions=sp.big_map(tkey=sp.TNat, tvalue=sp.TNat),
+            operators=sp.big_map(tkey=t_operator_args, tvalue=sp.TUnit),
+            # Operators allowed to transfer every token of an owner, one entry per (owner, operator)
+            all_operators=sp.big_map(tkey=t_operator_for_all_key, tvalue=sp.TUnit),
             metadata=metadata_base,
             token_metadata=sp.big_map(
                 tkey=sp.TNat,
@@ -65,47 +161,189 @@ class Fa2NftMint(sp.Contract):
                     token_info=sp.TMap(sp.TString, sp.TBytes),
                 ),
             ),
+            # Collection metadata template, keys shared by every token are stored once here instead of in each token_info
+            metadata_template=sp.big_map(tkey=sp.TUnit, tvalue=sp.TMap(sp.TString, sp.TBytes)),
+            # Shared artwork fragments, fragments used by a token and the parts of composed artworks
+            fragments=sp.big_map(tkey=sp.TNat, tvalue=sp.TBytes),
+            next_fragment_id=sp.nat(0),
+            sealed_fragments=sp.big_map(tkey=sp.TNat, tvalue=sp.TUnit),
+            token_parts=sp.big_map(tkey=sp.TNat, tvalue=sp.TList(t_part)),
+            # Content addressed artifacts, sha256 of the bytes -> bytes, and the artifact hash of each token minted with one
+            artifacts=sp.big_map(tkey=sp.TBytes, tvalue=sp.TBytes),
+            token_artifacts=sp.big_map(tkey=sp.TNat, tvalue=sp.TBytes),
             # New storage for the CHILD control
             # This currently a custom addition and not part of Tezos Standard, but does not break contracts
             # Can be removed if desired but must also remove the associated entrypoints, offchain views, and test scenario
-            children = sp.set(t=sp.TAddress),
-            parents = sp.set(t=sp.TAddress)
+            children = make_address_list(),
+            parents = make_address_list(),
+            # Recipient of each token whose artifact is still being uploaded in chunks
+            artifact_uploads=sp.big_map(tkey=sp.TNat, tvalue=sp.TAddress)
         )
+        if self.owner_index:
+            # items: (owner, position) -> token id, positions: token id -> position in its owner's list, sizes: owner -> number of tokens
+            storage["owner_tokens"] = sp.record(
+                items=sp.big_map(tkey=sp.TPair(sp.TAddress, sp.TNat), tvalue=sp.TNat),
+                positions=sp.big_map(tkey=sp.TNat, tvalue=sp.TNat),
+                sizes=sp.big_map(tkey=sp.TAddress, tvalue=sp.TNat),
+            )
+            self.tokens_of_owner = sp.offchain_view(pure=True)(tokens_of_owner)
+            self.count_tokens_of_owner = sp.offchain_view(pure=True)(count_tokens_of_owner)
+        self.init(**storage)
+        self.init_metadata("metadata_base", self.collection_metadata())
+
+    # Off-chain views listed in the compiled contract metadata, the owner index views only exist with owner_index=True
+    def offchain_view_names(self):
+        names = [
+            "get_administrator", "all_tokens", "count_tokens", "token_metadata", "artifact_size", "artifact_slice",
+            "token_metadata_key", "token_artifact", "has_artifact", "get_children", "get_parents",
+        ]
+        if self.owner_index:
+            names += ["tokens_of_owner", "count_tokens_of_owner"]
+        return names
+
+    def collection_metadata(self):
+        return dict(contract_metadata_fields, views=[getattr(self, name) for name in self.offchain_view_names()])
 
     def only_owner(self, token_id):
         sp.verify(sp.sender == self.data.ledger[token_id], "You are not the Owner of this Token")
+
+    def mint_token(self, to_, metadata):
+        token_id = sp.compute(self.data.next_token_id)
+        self.data.token_metadata[token_id] = sp.record(
+            token_id=token_id, token_info=metadata
+        )
+        self.data.ledger[token_id] = to_
+        self.add_owned_token(to_, token_id)
+        self.add_live_token(token_id)
+        self.data.next_token_id += 1
+
+    # Keep the optional owner index in step with the ledger, no code is generated without owner_index
+    def add_owned_token(self, owner, token_id):
+        if self.owner_index:
+            owned = self.data.owner_tokens
+            size = sp.compute(owned.sizes.get(owner, default_value=0))
+            owned.items[sp.pair(owner, size)] = token_id
+            owned.positions[token_id] = size
+            owned.sizes[owner] = size + 1
+
+    # Removing a token moves the owner's last token into its position
+    def remove_owned_token(self, owner, token_id):
+        if self.owner_index:
+            owned = self.data.owner_tokens
+            position = sp.compute(owned.positions[token_id])
+            last = sp.compute(sp.as_nat(owned.sizes[owner] - 1))
+            with sp.if_(position != last):
+                moved = sp.compute(owned.items[sp.pair(owner, last)])
+                owned.items[sp.pair(owner, position)] = moved
+                owned.positions[moved] = position
+            del owned.items[sp.pair(owner, last)]
+            del owned.positions[token_id]
+            with sp.if_(last == 0):
+                del owned.sizes[owner]
+            with sp.else_():
+                owned.sizes[owner] = last
+
+    # Live token ids are kept in a dense range of positions so the all_tokens view never scans burned ids
+    # A token sits at the position equal to its id until a burn moves the last live token into the freed position
+    def token_slot(self, position):
+        return self.data.token_slots.get(position, default_value=position)
+
+    def place_token(self, position, token_id):
+        with sp.if_(position == token_id):
+            del self.data.token_slots[position]
+            del self.data.token_positions[token_id]
+        with sp.else_():
+            self.data.token_slots[position] = token_id
+            self.data.token_positions[token_id] = position
+
+    def add_live_token(self, token_id):
+        self.place_token(self.data.all_tokens, token_id)
+        self.data.all_tokens += 1
+
+    def remove_live_token(self, token_id):
+        position = sp.compute(self.data.token_positions.get(token_id, default_value=token_id))
+        last = sp.compute(sp.as_nat(self.data.all_tokens - 1))
+        with sp.if_(position != last):
+            self.place_token(position, sp.compute(self.token_slot(last)))
+        del self.data.token_slots[last]
+        del self.data.token_positions[token_id]
+        self.data.all_tokens = last
  
 
+    def add_address(self, addresses, address):
+        with sp.if_(~addresses.positions.contains(address)):
+            addresses.items[addresses.size] = address
+            addresses.positions[address] = addresses.size
+            addresses.size += 1
+
+    # Removing an address moves the last address into its position so the range stays dense
+    def remove_address(self, addresses, address):
+        with sp.if_(addresses.positions.contains(address)):
+            position = sp.compute(addresses.positions[address])
+            last = sp.compute(sp.as_nat(addresses.size - 1))
+            with sp.if_(position != last):
+                moved = sp.compute(addresses.items[last])
+                addresses.items[position] = moved
+                addresses.positions[moved] = position
+            del addresses.items[last]
+            del addresses.positions[address]
+            addresses.size = last
+
+    def address_page(self, addresses, params):
+        sp.set_type(params, t_page_args)
+        page = sp.local("page", sp.list(t=sp.TAddress))
+        end = sp.compute(sp.min(addresses.size, params.offset + params.limit))
+        with sp.for_("position", sp.range(params.offset, end)) as position:
+            page.value.push(addresses.items[position])
+        return page.value.rev()
+
+    # Sets the keys shared by every token, for example "creators", "rights", "formats", "decimals", "symbol" and "attributes"
+    # Tokens are then minted with only the keys that differ, the token_metadata view merges the two
+    # An empty map removes the template
+    @sp.entrypoint
+    def set_metadata_template(self, template):
+        sp.set_type(template, sp.TMap(sp.TString, sp.TBytes))
+        sp.verify(sp.sender == self.data.admin, "Only the contract owner can set the metadata template")
+        with sp.if_(sp.len(template) == 0):
+            del self.data.metadata_template[sp.unit]
+        with sp.else_():
+            self.data.metadata_template[sp.unit] = template
+
     # NEW ENTRYPOINTS FOR PARENT / CHILD FUNCTIONS
     # Remove these if not using #
     @sp.entrypoint
     def add_child(self, address):
         sp.set_type(address, sp.TAddress)
         sp.verify(sp.sender == self.data.admin, "Only the contract owner can add children")
-        self.data.children.add(address)
+        self.add_address(self.data.children, address)
     
     @sp.entrypoint
     def remove_child(self, address):
         sp.set_type(address, sp.TAddress)
         sp.verify(sp.sender == self.data.admin, "Only the contract owner can remove children")
-        self.data.children.remove(address)
+        self.remove_address(self.data.children, address)
     
     @sp.entrypoint
     def add_parent(self, address):
         sp.set_type(address, sp.TAddress)
         sp.verify(sp.sender == self.data.admin, "Only the contract owner can add parents")
-        self.data.parents.add(address)
+        self.add_address(self.data.parents, address)
     
     @sp.entrypoint
     def remove_parent(self, address):
         sp.set_type(address, sp.TAddress)
         sp.verify(sp.sender == self.data.admin, "Only the contract owner can remove parents")
-        self.data.parents.remove(address)
+        self.remove_address(self.data.parents, address)
     # END OF NEW ENTRYPOINTS
     
     @sp.entrypoint
     def transfer(self, batch):
         with sp.for_("transfer", batch) as transfer:
+            # Owners and operators for all tokens of from_ need no per token lookup
+            may_transfer_all = sp.compute(
+                (transfer.from_ == sp.sender)
+                | self.data.all_operators.contains(sp.record(owner=transfer.from_, operator=sp.sender))
+            )
             with sp.for_("tx", transfer.txs) as tx:
                 sp.set_type(
                     tx,
@@ -115,7 +353,7 @@ class Fa2NftMint(sp.Contract):
                 )
                 sp.verify(tx.token_id < self.data.next_token_id, "This Token is Undefined for Transfer")
                 sp.verify(
-                    (transfer.from_ == sp.sender)
+                    may_transfer_all
                     | self.data.operators.contains(
                         sp.record(
                             owner=transfer.from_,
@@ -131,6 +369,8 @@ class Fa2NftMint(sp.Contract):
                         & (self.data.ledger[tx.token_id] == transfer.from_),
                         "You cannot Transfer more Tokens than you Own",
                     )
+                    self.remove_owned_token(transfer.from_, tx.token_id)
+                    self.add_owned_token(tx.to_, tx.token_id)
                     self.data.ledger[tx.token_id] = tx.to_
 
     # This allows marketplaces to sell or transfer the token
@@ -145,6 +385,17 @@ class Fa2NftMint(sp.Contract):
                     self.only_owner(operator.token_id)
                     del self.data.operators[operator]
 
+    # Lets an operator transfer every token of the sender, current and future, with one storage entry
+    @sp.entrypoint
+    def update_operators_for_all(self, actions):
+        sp.set_type(actions, t_operator_for_all_args)
+        with sp.for_("update", actions) as action:
+            with action.match_cases() as arg:
+                with arg.match("add_operator_for_all") as operator:
+                    self.data.all_operators[sp.record(owner=sp.sender, operator=operator)] = sp.unit
+                with arg.match("remove_operator_for_all") as operator:
+                    del self.data.all_operators[sp.record(owner=sp.sender, operator=operator)]
+
     @sp.entrypoint
     def balance_of(self, args):
         def f_process_request(req):
@@ -168,14 +419,129 @@ class Fa2NftMint(sp.Contract):
     # A longer list of attributes is highly recommended tailored to each collection's needs
     @sp.entrypoint
     def mint(self, params):
+        sp.set_type(params, t_mint_args)
+        sp.verify(sp.sender == ADMIN_ADDRESS, "Only the Collector Owner can Mint Tokens")
+        self.mint_token(params.to_, params.metadata)
+
+    # Shared Fragments
+    # Byte blocks shared by many artworks (fonts, <defs>, filters, palettes) are stored once by the admin
+    # add_fragment stores a new fragment under the next fragment id, append_fragment extends it while no token uses it
+    # mint_composed mints a token whose "artifactUri" is the concatenation of its parts, rendered by the token_metadata view
+    @sp.entrypoint
+    def add_fragment(self, fragment):
+        sp.set_type(fragment, sp.TBytes)
+        sp.verify(sp.sender == self.data.admin, "Only the contract owner can add fragments")
+        self.data.fragments[self.data.next_fragment_id] = fragment
+        self.data.next_fragment_id += 1
+
+    @sp.entrypoint
+    def append_fragment(self, params):
+        sp.set_type(params, t_fragment_chunk_args)
+        sp.verify(sp.sender == self.data.admin, "Only the contract owner can add fragments")
+        sp.verify(~self.data.sealed_fragments.contains(params.fragment_id), "This Fragment is used by a Token")
+        self.data.fragments[params.fragment_id] = self.data.fragments.get_opt(params.fragment_id).open_some("This Fragment is Undefined") + params.chunk
+
+    @sp.entrypoint
+    def mint_composed(self, params):
+        sp.set_type(params, t_mint_composed_args)
+        sp.verify(sp.sender == ADMIN_ADDRESS, "Only the Collector Owner can Mint Tokens")
+        with sp.for_("part", params.parts) as part:
+            with sp.if_(part.is_variant("fragment")):
+                fragment_id = sp.compute(part.open_variant("fragment"))
+                sp.verify(self.data.fragments.contains(fragment_id), "This Fragment is Undefined")
+                self.data.sealed_fragments[fragment_id] = sp.unit
+        self.data.token_parts[self.data.next_token_id] = params.parts
+        self.mint_token(params.to_, params.metadata)
+
+    # Content Addressed Artifacts
+    # store_artifact keeps a full artifact under the sha256 of its bytes, identical bytes are only stored once
+    # mint_with_artifact mints a token that references a stored artifact by its hash instead of sending the bytes again
+    # Check has_artifact before uploading, a duplicate upload is rejected
+    @sp.entrypoint
+    def store_artifact(self, artifact):
+        sp.set_type(artifact, sp.TBytes)
+        sp.verify(sp.sender == ADMIN_ADDRESS, "Only the Collector Owner can Mint Tokens")
+        artifact_hash = sp.compute(sp.sha256(artifact))
+        sp.verify(~self.data.artifacts.contains(artifact_hash), "This Artifact is already Stored")
+        self.data.artifacts[artifact_hash] = artifact
+
+    @sp.entrypoint
+    def mint_with_artifact(self, params):
+        sp.set_type(params, t_mint_with_artifact_args)
+        sp.verify(sp.sender == ADMIN_ADDRESS, "Only the Collector Owner can Mint Tokens")
+        sp.verify(self.data.artifacts.contains(params.artifact), "This Artifact is not Stored")
+        self.data.token_artifacts[self.data.next_token_id] = params.artifact
+        self.mint_token(params.to_, params.metadata)
+
+    # Bytes of every part in order, joined they are the artwork of a composed token
+    def part_pieces(self, parts):
+        pieces = sp.local("pieces", sp.list(t=sp.TBytes))
+        with sp.for_("part", parts) as part:
+            with part.match_cases() as arg:
+                with arg.match("fragment") as fragment_id:
+                    pieces.value.push(self.data.fragments[fragment_id])
+                with arg.match("inline") as inline:
+                    pieces.value.push(inline)
+        return pieces.value.rev()
+
+    def render_parts(self, parts):
+        return sp.concat(self.part_pieces(parts))
+
+    # Batch Mint Interaction
+    # Mints one token per item, each with its own recipient, using consecutive token ids
+    # Use this to publish a whole series in a single operation
+    # The batch is rejected before any limit is reached if it holds more than MAX_MINT_BATCH_SIZE tokens
+    # or serializes to more than MAX_MINT_BATCH_BYTES, split larger series over several calls
+    @sp.entrypoint
+    def mint_batch(self, params):
+        sp.set_type(params, t_mint_batch_args)
+        sp.verify(sp.sender == ADMIN_ADDRESS, "Only the Collector Owner can Mint Tokens")
+        sp.verify(sp.len(params) <= MAX_MINT_BATCH_SIZE, "Mint Batch has too many Tokens")
+        batch_bytes = sp.local("batch_bytes", sp.nat(0))
+        with sp.for_("item", params) as item:
+            batch_bytes.value += MINT_ITEM_OVERHEAD
+            with sp.for_("field", item.metadata.items()) as field:
+                batch_bytes.value += METADATA_ENTRY_OVERHEAD + sp.len(field.key) + sp.len(field.value)
+            sp.verify(batch_bytes.value <= MAX_MINT_BATCH_BYTES, "Mint Batch Metadata is too large")
+            self.mint_token(item.to_, item.metadata)
+
+    # Chunked Artifact Upload
+    # Use these entrypoints when the artifact does not fit in a single mint operation
+    # begin_artifact reserves the next token id and stores its metadata, the "artifactUri" value can hold the first bytes
+    # append_artifact_chunk adds the next bytes to "artifactUri", offset must equal the number of bytes already uploaded
+    # finalize_artifact seals the artifact and sends the token to the recipient
+    # Until it is finalized the token has no owner, after it is finalized it cannot be changed
+    @sp.entrypoint
+    def begin_artifact(self, params):
+        sp.set_type(params, t_mint_args)
         sp.verify(sp.sender == ADMIN_ADDRESS, "Only the Collector Owner can Mint Tokens")
         token_id = sp.compute(self.data.next_token_id)
         self.data.token_metadata[token_id] = sp.record(
             token_id=token_id, token_info=params.metadata
         )
-        self.data.ledger[token_id] = params.to_
+        self.data.artifact_uploads[token_id] = params.to_
         self.data.next_token_id += 1
 
+    @sp.entrypoint
+    def append_artifact_chunk(self, params):
+        sp.set_type(params, t_artifact_chunk_args)
+        sp.verify(sp.sender == ADMIN_ADDRESS, "Only the Collector Owner can Mint Tokens")
+        sp.verify(self.data.artifact_uploads.contains(params.token_id), "This Token Artifact is Sealed")
+        token_info = self.data.token_metadata[params.token_id].token_info
+        artifact = sp.compute(token_info.get("artifactUri", default_value=sp.bytes("0x")))
+        sp.verify(sp.len(artifact) == params.offset, "This Artifact Chunk is Out of Order")
+        token_info["artifactUri"] = artifact + params.chunk
+
+    @sp.entrypoint
+    def finalize_artifact(self, token_id):
+        sp.set_type(token_id, sp.TNat)
+        sp.verify(sp.sender == ADMIN_ADDRESS, "Only the Collector Owner can Mint Tokens")
+        sp.verify(self.data.artifact_uploads.contains(token_id), "This Token Artifact is Sealed")
+        self.data.ledger[token_id] = self.data.artifact_uploads[token_id]
+        self.add_owned_token(self.data.artifact_uploads[token_id], token_id)
+        self.add_live_token(token_id)
+        del self.data.artifact_uploads[token_id]
+
     # The burn token interaction can only be executed by the token owner
     # Objkt.com has a built-in burn mechanisam that can be used as well
     # This is provided for an alternative means or for tokens no present on the Objkt marketplace
@@ -184,18 +550,131 @@ class Fa2NftMint(sp.Contract):
         sp.set_type(params, sp.TRecord(token_id = sp.TNat))
         sp.verify(params.token_id < self.data.next_token_id, "Non-existand Token cannot be Burnt")
         sp.verify(self.data.ledger[params.token_id] == sp.sender, "You are not the Owner and cannot Burn this Token")
+        self.remove_owned_token(sp.sender, params.token_id)
         del self.data.ledger[params.token_id]
         del self.data.token_metadata[params.token_id]
+        del self.data.token_parts[params.token_id]
+        del self.data.token_artifacts[params.token_id]
+        self.remove_live_token(params.token_id)
 
     @sp.offchain_view(pure=True)
     def get_administrator(self):
         sp.result(ADMIN_ADDRESS)
     
+    # Live token ids in pages, pass the offset of the first id and the maximum number of ids to return
+    # Burned tokens are left out, use count_tokens for the number of live tokens
+    @sp.offchain_view(pure=True)
+    def all_tokens(self, params):
+        sp.set_type(params, t_page_args)
+        page = sp.local("page", sp.list(t=sp.TNat))
+        end = sp.compute(sp.min(self.data.all_tokens, params.offset + params.limit))
+        with sp.for_("position", sp.range(params.offset, end)) as position:
+            page.value.push(self.token_slot(position))
+        sp.result(page.value.rev())
+
+    # Metadata of a token as marketplaces see it, the template with the keys of the token's own token_info on top
+    # Composed tokens get their "artifactUri" from their parts, tokens minted with a stored artifact from the artifact store
+    def merged_token_info(self, token_id):
+        sp.set_type(token_id, sp.TNat)
+        sp.verify(self.data.token_metadata.contains(token_id), "This Token is Undefined")
+        token_info = sp.local("token_info", self.data.metadata_template.get(sp.unit, default_value=sp.map(tkey=sp.TString, tvalue=sp.TBytes)))
+        with sp.for_("item", self.data.token_metadata[token_id].token_info.items()) as item:
+            token_info.value[item.key] = item.value
+        with sp.if_(self.data.token_parts.contains(token_id)):
+            token_info.value["artifactUri"] = self.render_parts(self.data.token_parts[token_id])
+        with sp.if_(self.data.token_artifacts.contains(token_id)):
+            token_info.value["artifactUri"] = self.data.artifacts[self.data.token_artifacts[token_id]]
+        return token_info.value
+
+    # TZIP-12 token metadata view
+    # Listed in the "views" of the compiled contract metadata so marketplaces read the merged metadata
+    @sp.offchain_view(pure=True)
+    def token_metadata(self, token_id):
+        sp.result(sp.record(token_id=token_id, token_info=self.merged_token_info(token_id)))
+
+    # Whether the "artifactUri" of a token is built from its parts or the artifact store instead of its token_info
+    def has_rendered_artifact(self, token_id):
+        return self.data.token_parts.contains(token_id) | self.data.token_artifacts.contains(token_id)
+
+    # "artifactUri" of a token as the pieces it is joined from, the rest of the merged metadata is not built
+    # Empty when neither the token nor the template has one
+    def artifact_pieces(self, token_id):
+        sp.set_type(token_id, sp.TNat)
+        sp.verify(self.data.token_metadata.contains(token_id), "This Token is Undefined")
+        pieces = sp.local("artifact_pieces", sp.list(t=sp.TBytes))
+        with sp.if_(self.data.token_artifacts.contains(token_id)):
+            pieces.value = [self.data.artifacts[self.data.token_artifacts[token_id]]]
+        with sp.else_():
+            with sp.if_(self.data.token_parts.contains(token_id)):
+                pieces.value = self.part_pieces(self.data.token_parts[token_id])
+            with sp.else_():
+                artifact = sp.local("artifact", self.data.token_metadata[token_id].token_info.get_opt("artifactUri"))
+                with sp.if_(artifact.value.is_none()):
+                    artifact.value = self.data.metadata_template.get(
+                        sp.unit, default_value=sp.map(tkey=sp.TString, tvalue=sp.TBytes)).get_opt("artifactUri")
+                with sp.if_(artifact.value.is_some()):
+                    pieces.value = [artifact.value.open_some()]
+        return pieces.value
+
+    # Partial reads so viewers and indexers do not download every artwork in full
+    # artifact_slice returns up to length bytes from offset and stops at the end of the artifact
+    # Both work on the pieces of the artwork, a slice only copies the pieces it overlaps
+    @sp.offchain_view(pure=True)
+    def artifact_size(self, token_id):
+        size = sp.local("size", sp.nat(0))
+        with sp.for_("piece", self.artifact_pieces(token_id)) as piece:
+            size.value += sp.len(piece)
+        sp.result(size.value)
+
+    @sp.offchain_view(pure=True)
+    def artifact_slice(self, params):
+        sp.set_type(params, t_artifact_slice_args)
+        end = sp.compute(params.offset + params.length)
+        position = sp.local("position", sp.nat(0))
+        pieces = sp.local("slice_pieces", sp.list(t=sp.TBytes))
+        with sp.for_("piece", self.artifact_pieces(params.token_id)) as piece:
+            piece_end = sp.compute(position.value + sp.len(piece))
+            with sp.if_((piece_end > params.offset) & (position.value < end)):
+                start = sp.compute(sp.as_nat(sp.max(params.offset, position.value) - position.value))
+                stop = sp.compute(sp.as_nat(sp.min(end, piece_end) - position.value))
+                pieces.value.push(sp.slice(piece, start, sp.as_nat(stop - start)).open_some())
+            position.value = piece_end
+        sp.result(sp.concat(pieces.value.rev()))
+
+    # One key of the merged metadata, none if the token does not have it
+    # Only reads the token_info and the template, the artwork is only joined when "artifactUri" is asked for
+    @sp.offchain_view(pure=True)
+    def token_metadata_key(self, params):
+        sp.set_type(params, t_metadata_key_args)
+        sp.verify(self.data.token_metadata.contains(params.token_id), "This Token is Undefined")
+        value = sp.local("value", self.data.token_metadata[params.token_id].token_info.get_opt(params.key))
+        with sp.if_(value.value.is_none()):
+            value.value = self.data.metadata_template.get(
+                sp.unit, default_value=sp.map(tkey=sp.TString, tvalue=sp.TBytes)).get_opt(params.key)
+        with sp.if_((params.key == "artifactUri") & self.has_rendered_artifact(params.token_id)):
+            value.value = sp.some(sp.concat(self.artifact_pieces(params.token_id)))
+        sp.result(value.value)
+
+    # Artifact of a token minted with mint_with_artifact
+    @sp.offchain_view(pure=True)
+    def token_artifact(self, token_id):
+        sp.set_type(token_id, sp.TNat)
+        artifact_hash = self.data.token_artifacts.get_opt(token_id).open_some("This Token has no Stored Artifact")
+        sp.result(self.data.artifacts[artifact_hash])
+
     @sp.offchain_view(pure=True)
-    def all_tokens(self):
-        sp.result(sp.range(0, self.data.next_token_id))
+    def has_artifact(self, artifact_hash):
+        sp.set_type(artifact_hash, sp.TBytes)
+        sp.result(self.data.artifacts.contains(artifact_hash))
 
     @sp.offchain_view(pure=True)
+    def count_tokens(self):
+        sp.result(self.data.all_tokens)
+
+    # get_balance, does_token_exist, total_supply and is_operator are on-chain views
+    # Other contracts read them synchronously with sp.view instead of calling balance_of with a callback
+    # Burned tokens have a balance and supply of 0
+    @sp.onchain_view(pure=True)
     def get_balance(self, params):
         sp.set_type(
             params,
@@ -204,28 +683,60 @@ class Fa2NftMint(sp.Contract):
             ),
         )
         sp.verify(params.token_id < self.data.next_token_id, "This Token has Undefined Offchain Balance")
-        sp.result(sp.eif(self.data.ledger[params.token_id] == params.owner, 1, 0))
+        sp.result(sp.eif(self.data.ledger.get_opt(params.token_id) == sp.some(params.owner), sp.nat(1), 0))
 
-    @sp.offchain_view(pure=True)
+    @sp.onchain_view(pure=True)
+    def does_token_exist(self, token_id):
+        sp.set_type(token_id, sp.TNat)
+        sp.result(self.data.ledger.contains(token_id))
+
+    @sp.onchain_view(pure=True)
     def total_supply(self, params):
+        sp.set_type(params, sp.TRecord(token_id=sp.TNat))
         sp.verify(params.token_id < self.data.next_token_id, "This Collection has Undefined Balance")
-        sp.result(1)
+        sp.result(sp.eif(self.data.ledger.contains(params.token_id), sp.nat(1), 0))
 
-    @sp.offchain_view(pure=True)
+    @sp.onchain_view(pure=True)
     def is_operator(self, params):
+        sp.set_type(params, t_operator_args)
         sp.result(self.data.operators.contains(params))
 
+    # True when operator can transfer every token of owner, is_operator only reports per token operators
+    @sp.onchain_view(pure=True)
+    def is_operator_for_all(self, params):
+        sp.set_type(params, t_operator_for_all_key)
+        sp.result(self.data.all_operators.contains(params))
+
     # ADDITIOANL VIEWS FOR PARENT/CHILD
     # Remove these if not using #
+    # Pass the offset of the first address and the maximum number of addresses to return
+    # Keep increasing offset by limit until a page has fewer than limit addresses
     @sp.offchain_view(pure=True)
-    def get_children(self):
-        sp.result(self.data.children)
+    def get_children(self, params):
+        sp.result(self.address_page(self.data.children, params))
     
     @sp.offchain_view(pure=True)
-    def get_parents(self):
-        sp.result(self.data.parents)
+    def get_parents(self, params):
+        sp.result(self.address_page(self.data.parents, params))
     # END OF ADDITIONAL VIEWS
     
+# Helper contract reading the on-chain views in the test scenarios
+class View_reader(sp.Contract):
+    def __init__(self, contract):
+        self.contract = contract
+        self.init(last_balance=sp.nat(0), last_exists=False, last_is_operator=False)
+
+    @sp.entrypoint
+    def read_balance(self, params):
+        sp.set_type(params, sp.TRecord(owner=sp.TAddress, token_id=sp.TNat).layout(("owner", "token_id")))
+        self.data.last_balance = sp.view("get_balance", self.contract.address, params, t=sp.TNat).open_some("Invalid view")
+        self.data.last_exists = sp.view("does_token_exist", self.contract.address, params.token_id, t=sp.TBool).open_some("Invalid view")
+
+    @sp.entrypoint
+    def read_operator(self, params):
+        sp.set_type(params, t_operator_args)
+        self.data.last_is_operator = sp.view("is_operator", self.contract.address, params, t=sp.TBool).open_some("Invalid view")
+
 # Function to create metadata for test scenario
 def make_metadata(token_data):
     core_metadata = {
@@ -285,6 +796,39 @@ if "templates" not in __name__:
         scenario.verify(c1.get_balance(sp.record(owner=ADMIN_ADDRESS, token_id=0)) == 0)
         scenario.verify(c1.get_balance(sp.record(owner=alice.address, token_id=0)) == 1)
 
+        # Other contracts read the same values through the on-chain views
+        reader = View_reader(c1)
+        scenario += reader
+        scenario += reader.read_balance(sp.record(owner=alice.address, token_id=0)).run(sender=alice.address)
+        scenario.verify(reader.data.last_balance == 1)
+        scenario.verify(reader.data.last_exists)
+        scenario += reader.read_operator(sp.record(owner=alice.address, operator=bob.address, token_id=0)).run(sender=alice.address)
+        scenario.verify(~reader.data.last_is_operator)
+        scenario += reader.read_balance(sp.record(owner=alice.address, token_id=1)).run(sender=alice.address, valid=False)
+
+        # An operator for all of Alice's tokens needs no per token entry
+        scenario += c1.mint(sp.record(to_=alice.address, metadata=tok0_md)).run(sender=ADMIN_ADDRESS)
+        scenario += c1.update_operators_for_all([sp.variant("add_operator_for_all", bob.address)]).run(sender=alice.address)
+        scenario.verify(c1.is_operator_for_all(sp.record(owner=alice.address, operator=bob.address)))
+        scenario += c1.transfer([
+            sp.record(from_=alice.address, txs=[
+                sp.record(to_=bob.address, token_id=sp.nat(0), amount=sp.nat(1)),
+                sp.record(to_=bob.address, token_id=sp.nat(1), amount=sp.nat(1))
+            ])
+        ]).run(sender=bob.address)
+        scenario.verify(c1.data.ledger[1] == bob.address)
+        scenario += c1.update_operators_for_all([sp.variant("remove_operator_for_all", bob.address)]).run(sender=alice.address)
+        scenario.verify(~c1.is_operator_for_all(sp.record(owner=alice.address, operator=bob.address)))
+        # Once Alice holds a token again Bob can no longer move it
+        scenario += c1.transfer([
+            sp.record(from_=bob.address, txs=[sp.record(to_=alice.address, token_id=sp.nat(0), amount=sp.nat(1))])
+        ]).run(sender=bob.address)
+        scenario.verify(c1.data.ledger[0] == alice.address)
+        scenario += c1.transfer([
+            sp.record(from_=alice.address, txs=[sp.record(to_=bob.address, token_id=sp.nat(0), amount=sp.nat(1))])
+        ]).run(sender=bob.address, valid=False, exception="You are not the Owner or Operator of this Token")
+        scenario.verify(c1.data.ledger[0] == alice.address)
+
     @sp.add_test(name="Test Burn")
     def test_burn():
         scenario = sp.test_scenario()
@@ -312,6 +856,306 @@ if "templates" not in __name__:
         scenario += c1.mint(sp.record(to_=ADMIN_ADDRESS, metadata=tok0_md)).run(sender=ADMIN_ADDRESS)
         scenario += c1.burn(sp.record(token_id=sp.nat(1))).run(sender=alice.address, valid=False, exception="You are not the Owner and cannot Burn this Token")
 
+    @sp.add_test(name="Test Batch Mint")
+    def test_batch_mint():
+        scenario = sp.test_scenario()
+        c1 = Fa2NftMint(metadata_base=contract_metadata, ADMIN_ADDRESS=ADMIN_ADDRESS)
+        scenario += c1
+
+        # Mint a series with a different recipient for each token
+        scenario += c1.mint_batch([
+            sp.record(to_=ADMIN_ADDRESS, metadata=tok0_md),
+            sp.record(to_=alice.address, metadata=tok0_md),
+            sp.record(to_=bob.address, metadata=tok0_md),
+        ]).run(sender=ADMIN_ADDRESS)
+        scenario.verify(c1.data.next_token_id == 3)
+        scenario.verify(c1.data.ledger[0] == ADMIN_ADDRESS)
+        scenario.verify(c1.data.ledger[1] == alice.address)
+        scenario.verify(c1.data.ledger[2] == bob.address)
+        scenario.verify(c1.data.token_metadata[2].token_info["name"] == tok0_md["name"])
+
+        # The single token mint still works and continues the id sequence
+        scenario += c1.mint(sp.record(to_=alice.address, metadata=tok0_md)).run(sender=ADMIN_ADDRESS)
+        scenario.verify(c1.data.ledger[3] == alice.address)
+
+        # Only the admin can mint a batch
+        scenario += c1.mint_batch([sp.record(to_=alice.address, metadata=tok0_md)]).run(
+            sender=alice.address, valid=False, exception="Only the Collector Owner can Mint Tokens")
+
+        # Too many tokens in one batch (should fail)
+        scenario += c1.mint_batch(
+            [sp.record(to_=alice.address, metadata=tok0_md) for _ in range(MAX_MINT_BATCH_SIZE + 1)]
+        ).run(sender=ADMIN_ADDRESS, valid=False, exception="Mint Batch has too many Tokens")
+
+        # Too much metadata in one batch (should fail)
+        large_md = make_metadata({
+            "name": "Large Token",
+            "description": "Token Description",
+            "artifactUri": "data:image/svg+xml;utf8," + "a" * (MAX_MINT_BATCH_BYTES // 2),
+        })
+        scenario += c1.mint_batch([
+            sp.record(to_=alice.address, metadata=large_md),
+            sp.record(to_=alice.address, metadata=large_md),
+        ]).run(sender=ADMIN_ADDRESS, valid=False, exception="Mint Batch Metadata is too large")
+        # Many small entries are counted with their framing, these hold under 10 KB of keys but serialize to about 48 KB
+        small_md = sp.map(l={"k%02d" % i: sp.bytes("0x") for i in range(30)})
+        scenario += c1.mint_batch(
+            [sp.record(to_=alice.address, metadata=small_md) for _ in range(MAX_MINT_BATCH_SIZE)]
+        ).run(sender=ADMIN_ADDRESS, valid=False, exception="Mint Batch Metadata is too large")
+        scenario.verify(c1.data.next_token_id == 4)
+
+    @sp.add_test(name="Test Chunked Artifact Upload")
+    def test_artifact_upload():
+        scenario = sp.test_scenario()
+        c1 = Fa2NftMint(metadata_base=contract_metadata, ADMIN_ADDRESS=ADMIN_ADDRESS)
+        scenario += c1
+
+        # Simulated 200 KB artwork uploaded in chunks that each fit in one operation
+        # Each append_artifact_chunk call shows the gas and storage cost of one chunk
+        prefix = "data:image/svg+xml;utf8,"
+        body = "<svg xmlns='http://www.w3.org/2000/svg'>" + "<rect width='1' height='1'/>" * 7300 + "</svg>"
+        chunk_size = 24000
+        chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        upload_md = make_metadata({
+            "name": "Large Token",
+            "description": "Token Description",
+            "artifactUri": prefix,
+        })
+
+        scenario.h2("Begin artifact")
+        scenario += c1.begin_artifact(sp.record(to_=alice.address, metadata=upload_md)).run(sender=ADMIN_ADDRESS)
+        scenario.verify(c1.data.next_token_id == 1)
+        scenario.verify(~c1.data.ledger.contains(0))
+
+        # Only the admin can upload
+        scenario += c1.append_artifact_chunk(
+            sp.record(token_id=0, offset=len(prefix), chunk=sp.utils.bytes_of_string(chunks[0]))
+        ).run(sender=alice.address, valid=False, exception="Only the Collector Owner can Mint Tokens")
+
+        uploaded = len(prefix)
+        for i, chunk in enumerate(chunks):
+            scenario.h3("Chunk %d of %d" % (i + 1, len(chunks)))
+            scenario += c1.append_artifact_chunk(
+                sp.record(token_id=0, offset=uploaded, chunk=sp.utils.bytes_of_string(chunk))
+            ).run(sender=ADMIN_ADDRESS)
+            uploaded += len(chunk)
+        scenario.verify(c1.data.token_metadata[0].token_info["artifactUri"] == sp.utils.bytes_of_string(prefix + body))
+
+        # A replayed or skipped chunk is rejected
+        scenario += c1.append_artifact_chunk(
+            sp.record(token_id=0, offset=0, chunk=sp.utils.bytes_of_string(chunks[0]))
+        ).run(sender=ADMIN_ADDRESS, valid=False, exception="This Artifact Chunk is Out of Order")
+
+        scenario.h2("Finalize artifact")
+        scenario += c1.finalize_artifact(0).run(sender=ADMIN_ADDRESS)
+        scenario.verify(c1.data.ledger[0] == alice.address)
+
+        # The artifact is sealed and cannot be changed or finalized twice
+        scenario += c1.append_artifact_chunk(
+            sp.record(token_id=0, offset=uploaded, chunk=sp.utils.bytes_of_string("<!-- -->"))
+        ).run(sender=ADMIN_ADDRESS, valid=False, exception="This Token Artifact is Sealed")
+        scenario += c1.finalize_artifact(0).run(sender=ADMIN_ADDRESS, valid=False, exception="This Token Artifact is Sealed")
+
+        # Tokens minted in one operation cannot be reopened for upload
+        scenario += c1.mint(sp.record(to_=alice.address, metadata=tok0_md)).run(sender=ADMIN_ADDRESS)
+        scenario += c1.append_artifact_chunk(
+            sp.record(token_id=1, offset=0, chunk=sp.utils.bytes_of_string("<svg/>"))
+        ).run(sender=ADMIN_ADDRESS, valid=False, exception="This Token Artifact is Sealed")
+
+    @sp.add_test(name="Test Token Enumeration")
+    def test_token_enumeration():
+        scenario = sp.test_scenario()
+        c1 = Fa2NftMint(metadata_base=contract_metadata, ADMIN_ADDRESS=ADMIN_ADDRESS)
+        scenario += c1
+
+        scenario += c1.mint_batch(
+            [sp.record(to_=alice.address, metadata=tok0_md) for _ in range(5)]
+        ).run(sender=ADMIN_ADDRESS)
+        scenario.verify(c1.count_tokens() == 5)
+        scenario.verify_equal(c1.all_tokens(sp.record(offset=0, limit=3)), [0, 1, 2])
+        scenario.verify_equal(c1.all_tokens(sp.record(offset=3, limit=3)), [3, 4])
+
+        # Burned tokens are left out and the last live token takes their place
+        scenario += c1.burn(sp.record(token_id=1)).run(sender=alice.address)
+        scenario.verify(c1.count_tokens() == 4)
+        scenario.verify_equal(c1.all_tokens(sp.record(offset=0, limit=10)), [0, 4, 2, 3])
+
+        # New tokens are appended after the live ones
+        scenario += c1.mint(sp.record(to_=alice.address, metadata=tok0_md)).run(sender=ADMIN_ADDRESS)
+        scenario += c1.burn(sp.record(token_id=4)).run(sender=alice.address)
+        scenario += c1.burn(sp.record(token_id=0)).run(sender=alice.address)
+        scenario.verify_equal(c1.all_tokens(sp.record(offset=0, limit=10)), [3, 5, 2])
+        scenario.verify(c1.count_tokens() == 3)
+
+    @sp.add_test(name="Test Owner Index")
+    def test_owner_index():
+        scenario = sp.test_scenario()
+        c1 = Fa2NftMint(metadata_base=contract_metadata, ADMIN_ADDRESS=ADMIN_ADDRESS, owner_index=True)
+        scenario += c1
+
+        scenario += c1.mint_batch(
+            [sp.record(to_=alice.address, metadata=tok0_md) for _ in range(3)]
+            + [sp.record(to_=bob.address, metadata=tok0_md)]
+        ).run(sender=ADMIN_ADDRESS)
+        scenario.verify(c1.count_tokens_of_owner(alice.address) == 3)
+        scenario.verify_equal(c1.tokens_of_owner(sp.record(owner=alice.address, offset=0, limit=2)), [0, 1])
+        scenario.verify_equal(c1.tokens_of_owner(sp.record(owner=alice.address, offset=2, limit=2)), [2])
+        scenario.verify_equal(c1.tokens_of_owner(sp.record(owner=bob.address, offset=0, limit=10)), [3])
+
+        # Transfers move the token between the owners' lists
+        scenario += c1.transfer([
+            sp.record(from_=alice.address, txs=[sp.record(to_=bob.address, token_id=sp.nat(0), amount=sp.nat(1))])
+        ]).run(sender=alice.address)
+        scenario.verify_equal(c1.tokens_of_owner(sp.record(owner=alice.address, offset=0, limit=10)), [2, 1])
+        scenario.verify_equal(c1.tokens_of_owner(sp.record(owner=bob.address, offset=0, limit=10)), [3, 0])
+
+        # Burning removes the token
+        scenario += c1.burn(sp.record(token_id=3)).run(sender=bob.address)
+        scenario.verify_equal(c1.tokens_of_owner(sp.record(owner=bob.address, offset=0, limit=10)), [0])
+        scenario += c1.burn(sp.record(token_id=0)).run(sender=bob.address)
+        scenario.verify(c1.count_tokens_of_owner(bob.address) == 0)
+
+    @sp.add_test(name="Test Metadata Template")
+    def test_metadata_template():
+        scenario = sp.test_scenario()
+        c1 = Fa2NftMint(metadata_base=contract_metadata, ADMIN_ADDRESS=ADMIN_ADDRESS)
+        scenario += c1
+
+        template = {
+            "symbol": sp.utils.bytes_of_string("ZERO"),
+            "creators": sp.utils.bytes_of_string('["tz1..."]'),
+            "description": sp.utils.bytes_of_string("Series Description"),
+        }
+        scenario += c1.set_metadata_template(template).run(sender=alice.address, valid=False)
+        scenario += c1.set_metadata_template(template).run(sender=ADMIN_ADDRESS)
+
+        # Only the keys that differ are stored with the token, its own keys win over the template
+        scenario += c1.mint(sp.record(to_=alice.address, metadata=tok0_md)).run(sender=ADMIN_ADDRESS)
+        scenario.verify(~c1.data.token_metadata[0].token_info.contains("symbol"))
+        scenario.verify(c1.token_metadata(0).token_info["symbol"] == template["symbol"])
+        scenario.verify(c1.token_metadata(0).token_info["description"] == tok0_md["description"])
+        scenario.verify(c1.token_metadata(0).token_info["name"] == tok0_md["name"])
+
+        # Without a template the view returns the token_info as stored
+        scenario += c1.set_metadata_template({}).run(sender=ADMIN_ADDRESS)
+        scenario.verify(~c1.token_metadata(0).token_info.contains("symbol"))
+
+    @sp.add_test(name="Test Shared Fragments")
+    def test_fragments():
+        scenario = sp.test_scenario()
+        c1 = Fa2NftMint(metadata_base=contract_metadata, ADMIN_ADDRESS=ADMIN_ADDRESS)
+        scenario += c1
+
+        scenario += c1.add_fragment(sp.utils.bytes_of_string("<defs>")).run(sender=alice.address, valid=False)
+        scenario += c1.add_fragment(sp.utils.bytes_of_string("<defs>")).run(sender=ADMIN_ADDRESS)
+        scenario += c1.append_fragment(sp.record(fragment_id=0, chunk=sp.utils.bytes_of_string("</defs>"))).run(sender=ADMIN_ADDRESS)
+
+        md = {"name": sp.utils.bytes_of_string("Composed")}
+        scenario += c1.mint_composed(sp.record(to_=alice.address, parts=[sp.variant("fragment", 3)], metadata=md)).run(
+            sender=ADMIN_ADDRESS, valid=False, exception="This Fragment is Undefined")
+        scenario += c1.mint_composed(sp.record(to_=alice.address, parts=[
+            sp.variant("inline", sp.utils.bytes_of_string("data:image/svg+xml;utf8,<svg>")),
+            sp.variant("fragment", 0),
+            sp.variant("inline", sp.utils.bytes_of_string("</svg>"))
+        ], metadata=md)).run(sender=ADMIN_ADDRESS)
+        scenario.verify(c1.token_metadata(0).token_info["artifactUri"] == sp.utils.bytes_of_string(
+            "data:image/svg+xml;utf8,<svg><defs></defs></svg>"))
+
+        # Once a token uses a fragment it can no longer change
+        scenario += c1.append_fragment(sp.record(fragment_id=0, chunk=sp.utils.bytes_of_string("<g/>"))).run(
+            sender=ADMIN_ADDRESS, valid=False, exception="This Fragment is used by a Token")
+
+    @sp.add_test(name="Test Artifact Store")
+    def test_artifact_store():
+        scenario = sp.test_scenario()
+        c1 = Fa2NftMint(metadata_base=contract_metadata, ADMIN_ADDRESS=ADMIN_ADDRESS)
+        scenario += c1
+
+        artifact = sp.utils.bytes_of_string("data:image/svg+xml;utf8,<svg><rect/></svg>")
+        artifact_hash = sp.sha256(artifact)
+        md = {"name": sp.utils.bytes_of_string("Stored")}
+
+        scenario += c1.mint_with_artifact(sp.record(to_=alice.address, artifact=artifact_hash, metadata=md)).run(
+            sender=ADMIN_ADDRESS, valid=False, exception="This Artifact is not Stored")
+        scenario += c1.store_artifact(artifact).run(sender=ADMIN_ADDRESS)
+        scenario += c1.store_artifact(artifact).run(sender=ADMIN_ADDRESS, valid=False, exception="This Artifact is already Stored")
+        scenario.verify(c1.has_artifact(artifact_hash))
+
+        # Two tokens share the same stored bytes
+        scenario += c1.mint_with_artifact(sp.record(to_=alice.address, artifact=artifact_hash, metadata=md)).run(sender=ADMIN_ADDRESS)
+        scenario += c1.mint_with_artifact(sp.record(to_=bob.address, artifact=artifact_hash, metadata=md)).run(sender=ADMIN_ADDRESS)
+        scenario.verify(c1.token_artifact(1) == artifact)
+        scenario.verify(c1.token_metadata(0).token_info["artifactUri"] == artifact)
+
+    @sp.add_test(name="Test Artifact Slices")
+    def test_artifact_slices():
+        scenario = sp.test_scenario()
+        c1 = Fa2NftMint(metadata_base=contract_metadata, ADMIN_ADDRESS=ADMIN_ADDRESS)
+        scenario += c1
+
+        scenario += c1.set_metadata_template({"symbol": sp.utils.bytes_of_string("ZERO")}).run(sender=ADMIN_ADDRESS)
+        md = {
+            "name": sp.utils.bytes_of_string("Slices"),
+            "artifactUri": sp.utils.bytes_of_string("data:text/plain,0123456789"),
+        }
+        scenario += c1.mint(sp.record(to_=alice.address, metadata=md)).run(sender=ADMIN_ADDRESS)
+
+        scenario.verify(c1.artifact_size(0) == 26)
+        scenario.verify(c1.artifact_slice(sp.record(token_id=0, offset=16, length=4)) == sp.utils.bytes_of_string("0123"))
+        # Slices stop at the end of the artifact
+        scenario.verify(c1.artifact_slice(sp.record(token_id=0, offset=24, length=10)) == sp.utils.bytes_of_string("89"))
+        scenario.verify(c1.artifact_slice(sp.record(token_id=0, offset=30, length=10)) == sp.bytes("0x"))
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=0, key="symbol")) == sp.some(sp.utils.bytes_of_string("ZERO")))
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=0, key="rights")) == sp.none)
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=0, key="artifactUri")) == sp.some(md["artifactUri"]))
+
+        # A composed token is sliced across its parts without joining them
+        scenario += c1.add_fragment(sp.utils.bytes_of_string("4567")).run(sender=ADMIN_ADDRESS)
+        scenario += c1.mint_composed(sp.record(to_=alice.address, parts=[
+            sp.variant("inline", sp.utils.bytes_of_string("data:text/plain,0123")),
+            sp.variant("fragment", 0),
+            sp.variant("inline", sp.utils.bytes_of_string("89"))
+        ], metadata={"name": sp.utils.bytes_of_string("Composed")})).run(sender=ADMIN_ADDRESS)
+        scenario.verify(c1.artifact_size(1) == 26)
+        scenario.verify(c1.artifact_slice(sp.record(token_id=1, offset=18, length=7)) == sp.utils.bytes_of_string("2345678"))
+        scenario.verify(c1.artifact_slice(sp.record(token_id=1, offset=20, length=4)) == sp.utils.bytes_of_string("4567"))
+        scenario.verify(c1.artifact_slice(sp.record(token_id=1, offset=25, length=5)) == sp.utils.bytes_of_string("9"))
+        scenario.verify(c1.artifact_slice(sp.record(token_id=1, offset=16, length=0)) == sp.bytes("0x"))
+        scenario.verify(c1.artifact_slice(sp.record(token_id=1, offset=26, length=1)) == sp.bytes("0x"))
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=1, key="artifactUri")) == sp.some(md["artifactUri"]))
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=1, key="name")) == sp.some(sp.utils.bytes_of_string("Composed")))
+
+        # A stored artifact is sliced like an artifact of the token_info
+        scenario += c1.store_artifact(md["artifactUri"]).run(sender=ADMIN_ADDRESS)
+        scenario += c1.mint_with_artifact(sp.record(
+            to_=alice.address, artifact=sp.sha256(md["artifactUri"]), metadata={"name": sp.utils.bytes_of_string("Stored")}
+        )).run(sender=ADMIN_ADDRESS)
+        scenario.verify(c1.artifact_size(2) == 26)
+        scenario.verify(c1.artifact_slice(sp.record(token_id=2, offset=16, length=4)) == sp.utils.bytes_of_string("0123"))
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=2, key="artifactUri")) == sp.some(md["artifactUri"]))
+
+        # A token without an artwork has an empty one
+        scenario += c1.mint(sp.record(to_=alice.address, metadata={"name": sp.utils.bytes_of_string("Empty")})).run(sender=ADMIN_ADDRESS)
+        scenario.verify(c1.artifact_size(3) == 0)
+        scenario.verify(c1.artifact_slice(sp.record(token_id=3, offset=0, length=10)) == sp.bytes("0x"))
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=3, key="artifactUri")) == sp.none)
+
+    @sp.add_test(name="Test Metadata Views")
+    def test_metadata_views():
+        scenario = sp.test_scenario()
+        for owner_index in [False, True]:
+            c1 = Fa2NftMint(metadata_base=contract_metadata, ADMIN_ADDRESS=ADMIN_ADDRESS, owner_index=owner_index)
+            scenario += c1
+
+            # The compiled metadata lists the views that render composed and stored artworks
+            metadata = c1.collection_metadata()
+            names = c1.offchain_view_names()
+            for name in ["token_metadata", "artifact_size", "artifact_slice", "token_metadata_key", "token_artifact"]:
+                assert name in names, name
+            assert ("tokens_of_owner" in names) == owner_index
+            assert metadata["views"] == [getattr(c1, name) for name in names]
+            assert all(metadata[key] == value for key, value in contract_metadata_fields.items())
+
     # ADDED TEST SCENARIO FOR PARENT/CHILD #
     # Remove this if not using #
     @sp.add_test(name="Test Address Lists")
@@ -323,9 +1167,31 @@ if "templates" not in __name__:
         # Test adding addresses
         test_address = sp.address("tz1...")
         scenario += c1.add_child(test_address).run(sender=ADMIN_ADDRESS)
-        scenario.verify(c1.data.children.contains(test_address))
+        scenario.verify(c1.data.children.positions.contains(test_address))
+        scenario.verify_equal(c1.get_children(sp.record(offset=0, limit=10)), [test_address])
         
         # Test removing addresses
         scenario += c1.remove_child(test_address).run(sender=ADMIN_ADDRESS)
-        scenario.verify(~c1.data.children.contains(test_address))
+        scenario.verify(~c1.data.children.positions.contains(test_address))
+
+        # Test paging through several addresses
+        scenario += c1.add_parent(alice.address).run(sender=ADMIN_ADDRESS)
+        scenario += c1.add_parent(bob.address).run(sender=ADMIN_ADDRESS)
+        scenario += c1.add_parent(test_address).run(sender=ADMIN_ADDRESS)
+        scenario.verify_equal(c1.get_parents(sp.record(offset=0, limit=2)), [alice.address, bob.address])
+        scenario.verify_equal(c1.get_parents(sp.record(offset=2, limit=2)), [test_address])
+
+        # Removing an address moves the last address into its place
+        scenario += c1.remove_parent(alice.address).run(sender=ADMIN_ADDRESS)
+        scenario.verify_equal(c1.get_parents(sp.record(offset=0, limit=10)), [test_address, bob.address])
     # END OF ADDED TEST SCENARIO
+
+    sp.add_compilation_target(
+        "nft_artwork",
+        Fa2NftMint(metadata_base=contract_metadata, ADMIN_ADDRESS=ADMIN_ADDRESS)
+    )
+    # Same contract with the owner index, used to measure its write cost with tools/bench.py
+    sp.add_compilation_target(
+        "nft_artwork_indexed",
+        Fa2NftMint(metadata_base=contract_metadata, ADMIN_ADDRESS=ADMIN_ADDRESS, owner_index=True)
+    )
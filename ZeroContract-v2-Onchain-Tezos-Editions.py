@@ -10,25 +10,72 @@
 # Objkt.com currently does not recognize artifactUri strings longer than 254 characters
 # Any token exceeding this limitation needs to contact Objkt.com directly and request the limitation be removed for their collection
 
+import json
+
 import smartpy as sp
 
 # Define contract metadata
-# Format the "content" key's value as a JSON string
+# The fields below are stored as the JSON string of the "content" key
 # Ensure to include the minimum keys but additional keys can be added without detriment
 # name, description, interfaces, symbol, creators, type, imageUri
 # imageUri is limited to 254 characters to display on Objkt.com unless limitation is lifted by the marketplace
+#
+# The contract also passes these fields with its compiled off-chain views to init_metadata
+# and the compiler writes that JSON next to the contract as metadata.contract_metadata.json
+# Marketplaces and indexers only call token_metadata and the artifact views when they are listed there,
+# composed, stored artifact and generative tokens have no "artifactUri" in the token_metadata big_map
+# Upload the compiled JSON (for example to IPFS) and set the "" key below to its URI before originating,
+# the "content" JSON stored on-chain has no views
+contract_metadata_fields = {
+    "name": "Project Name",
+    "description": "Project Description",
+    "interfaces": ["TZIP-012", "TZIP-016"],
+    "authors": ["Author Name"],
+    "authoraddress": ["Valid tz... address"],
+    "symbol": "SYMBOL",
+    "creators": ["Valid tz... address"],
+    "type": "art",
+    "imageUri": "URI string",
+}
 contract_metadata = sp.big_map(
     {
         "": sp.utils.bytes_of_string('tezos-storage:content'),
-        "content": sp.utils.bytes_of_string(
-            '{"name": "Project Name","description": "Project Description","interfaces": ["TZIP-012", "TZIP-016"],"authors": ["Author Name"],"authoraddress": ["Valid tz... address"],"symbol": "SYMBOL","creators": ["Valid tz... address"],"type":"art","imageUri":"URI string"}'
-        )
+        "content": sp.utils.bytes_of_string(json.dumps(contract_metadata_fields))
     }
 )
 
 # Use this value to ensure compilers set the proper administrator address control
 ADMIN_ADDRESS = sp.address("tz1ADDRESS")
 
+# Compile time options of FA2_core
+# Each option changes the generated Michelson, the defaults are the recommended deployment
+class FA2_config:
+    def __init__(self, reentrancy_lock = False, owner_index = False, holder_index = False, net_transfers = False,
+                 provenance_burn = True, generative = False):
+        # Stores a lock flag that is set and cleared around mint, transfer and burn
+        # Tezos only runs the operations a contract emits after that contract has finished and its storage is saved,
+        # so an entrypoint can never be re-entered while it runs and the lock never blocks anything
+        # Kept so the cost of the two extra storage writes per call can be compared
+        self.reentrancy_lock = reentrancy_lock
+        # Keeps an owner -> token_ids index up to date in mint, transfer and burn and adds the tokens_of_owner views
+        # A call that gives an address its first unit of a token or takes its last unit writes up to three extra
+        # big_map entries, about 100 bytes of paid storage each when they are new
+        self.owner_index = owner_index
+        # Keeps a token_id -> holders index the same way and adds the holders views, used for airdrops and snapshots
+        self.holder_index = holder_index
+        # transfer keeps the balances a batch touches in a local map and writes each ledger entry once at the end,
+        # each tx is still checked against the balance left by the txs before it so results and failures are the same
+        # Saves gas when a batch repeats (owner, token_id) pairs, for example many txs of one edition to one collector,
+        # and adds a little overhead per entry when every tx touches different entries
+        self.net_transfers = net_transfers
+        # burn moves the burned units to the burn address so the ledger keeps a record of them,
+        # with provenance_burn = False they are destroyed and only total_supply records the burn, no ledger entry is created
+        self.provenance_burn = provenance_burn
+        # Adds set_renderer and mint_generative, a generative token stores a seed and a few parameter bytes instead of its artwork
+        # and the token_metadata view renders its "artifactUri" and "displayUri" from the collection renderer when read
+        # The renderer is sealed by the first generative mint so the artwork of tokens already minted can never change
+        self.generative = generative
+
 class Error_message:
     def token_undefined(self):       return "FA2_TOKEN_UNDEFINED"
     def insufficient_balance(self):  return "FA2_INSUFFICIENT_BALANCE"
@@ -77,6 +124,154 @@ class Operator_param:
         )
         return sp.set_type_expr(r, self.get_type())
 
+class Mint_param:
+    def get_type(self):
+        return sp.TRecord(
+            to_ = sp.TAddress,
+            amount = sp.TNat,
+            metadata = sp.TMap(sp.TString, sp.TBytes)
+        ).layout(("to_", ("amount", "metadata")))
+
+    def get_batch_type(self):
+        return sp.TList(self.get_type())
+
+    def item(self, to_, amount, metadata):
+        v = sp.record(to_ = to_, amount = amount, metadata = metadata)
+        return sp.set_type_expr(v, self.get_type())
+
+class Artifact_chunk:
+    def get_type(self):
+        return sp.TRecord(
+            token_id = sp.TNat,
+            offset = sp.TNat,
+            chunk = sp.TBytes
+        ).layout(("token_id", ("offset", "chunk")))
+
+    def make(self, token_id, offset, chunk):
+        v = sp.record(token_id = token_id, offset = offset, chunk = chunk)
+        return sp.set_type_expr(v, self.get_type())
+
+class Artifact_upload:
+    def get_type(self):
+        return sp.TRecord(
+            minter = sp.TAddress,
+            to_ = sp.TAddress,
+            amount = sp.TNat
+        ).layout(("minter", ("to_", "amount")))
+
+class Generative_param:
+    def get_type(self):
+        return sp.TRecord(
+            to_ = sp.TAddress,
+            amount = sp.TNat,
+            seed = sp.TNat,
+            params = sp.TBytes,
+            metadata = sp.TMap(sp.TString, sp.TBytes)
+        ).layout(("to_", ("amount", ("seed", ("params", "metadata")))))
+
+    def make(self, to_, amount, seed, params, metadata):
+        v = sp.record(to_ = to_, amount = amount, seed = seed, params = params, metadata = metadata)
+        return sp.set_type_expr(v, self.get_type())
+
+class Fragment_library:
+    # Byte blocks shared by many artworks (fonts, <defs>, filters, palettes) stored once by the admin
+    # A composed artwork is a list of parts, each one a fragment id or inline bytes of the token
+    # A fragment can be extended with append_fragment until the first token using it is minted
+    def part_type(self):
+        return sp.TVariant(
+            fragment = sp.TNat,
+            inline = sp.TBytes
+        )
+
+    def mint_type(self):
+        return sp.TRecord(
+            to_ = sp.TAddress,
+            amount = sp.TNat,
+            parts = sp.TList(self.part_type()),
+            metadata = sp.TMap(sp.TString, sp.TBytes)
+        ).layout(("to_", ("amount", ("parts", "metadata"))))
+
+    def chunk_type(self):
+        return sp.TRecord(
+            fragment_id = sp.TNat,
+            chunk = sp.TBytes
+        ).layout(("fragment_id", "chunk"))
+
+    # Checks that every referenced fragment exists and seals it
+    def use(self, data, parts):
+        sp.for part in parts:
+            sp.if part.is_variant("fragment"):
+                fragment_id = sp.compute(part.open_variant("fragment"))
+                sp.verify(data.fragments.contains(fragment_id), message = "Fragment is undefined")
+                data.sealed_fragments[fragment_id] = sp.unit
+
+    # Bytes of every part in order, joined they are the artwork
+    def pieces(self, data, parts):
+        pieces = sp.local("pieces", sp.list(t = sp.TBytes))
+        sp.for part in parts:
+            with part.match_cases() as arg:
+                with arg.match("fragment") as fragment_id:
+                    pieces.value.push(data.fragments[fragment_id])
+                with arg.match("inline") as inline:
+                    pieces.value.push(inline)
+        return pieces.value.rev()
+
+    def render(self, data, parts):
+        return sp.concat(self.pieces(data, parts))
+
+class Artifact_ref_param:
+    def get_type(self):
+        return sp.TRecord(
+            to_ = sp.TAddress,
+            amount = sp.TNat,
+            artifact = sp.TBytes,
+            metadata = sp.TMap(sp.TString, sp.TBytes)
+        ).layout(("to_", ("amount", ("artifact", "metadata"))))
+
+    def make(self, to_, amount, artifact, metadata):
+        v = sp.record(to_ = to_, amount = amount, artifact = artifact, metadata = metadata)
+        return sp.set_type_expr(v, self.get_type())
+
+class Renderer:
+    # A data URI is rendered as head + seed in decimal + middle + params + tail
+    # For example head "data:image/svg+xml;utf8,<svg ...><script>const seed=", middle ";const params='" and tail "';...</script></svg>"
+    def template_type(self):
+        return sp.TRecord(
+            head = sp.TBytes,
+            middle = sp.TBytes,
+            tail = sp.TBytes
+        ).layout(("head", ("middle", "tail")))
+
+    def get_type(self):
+        return sp.TRecord(
+            artifact = self.template_type(),
+            display = self.template_type()
+        ).layout(("artifact", "display"))
+
+    def token_type(self):
+        return sp.TRecord(
+            seed = sp.TNat,
+            params = sp.TBytes
+        ).layout(("seed", "params"))
+
+    # Decimal digits of a nat as bytes
+    def decimal(self, value):
+        digits = sp.local("digits", sp.bytes("0x"))
+        rest = sp.local("rest", value)
+        sp.if rest.value == 0:
+            digits.value = sp.bytes("0x30")
+        sp.while rest.value > 0:
+            division = sp.compute(sp.ediv(rest.value, 10).open_some())
+            digits.value = sp.slice(sp.bytes("0x30313233343536373839"), sp.snd(division), 1).open_some() + digits.value
+            rest.value = sp.fst(division)
+        return digits.value
+
+    def pieces(self, template, token):
+        return [template.head, self.decimal(token.seed), template.middle, token.params, template.tail]
+
+    def render(self, template, token):
+        return sp.concat(self.pieces(template, token))
+
 class Ledger_key:
     def make(self, user, token):
         user = sp.set_type_expr(user, sp.TAddress)
@@ -84,13 +279,6 @@ class Ledger_key:
         result = sp.pair(user, token)
         return result
 
-class Ledger_value:
-    def get_type():
-        return sp.TRecord(balance = sp.TNat)
-        
-    def make(balance):
-        return sp.record(balance = balance)
-
 class Operator_set:
     def inner_type(self):
         return sp.TRecord(
@@ -122,6 +310,186 @@ class Operator_set:
     def is_member(self, set, owner, operator, token_id):
         return set.contains(self.make_key(owner, operator, token_id))
 
+class Operator_for_all_set:
+    # Operators allowed to transfer every token of an owner, one entry per (owner, operator)
+    def key_type(self):
+        return sp.TRecord(
+            owner = sp.TAddress,
+            operator = sp.TAddress
+        ).layout(("owner", "operator"))
+
+    def update_type(self):
+        return sp.TList(
+            sp.TVariant(
+                add_operator_for_all = sp.TAddress,
+                remove_operator_for_all = sp.TAddress
+            )
+        )
+
+    def make(self):
+        return sp.big_map(tkey = self.key_type(), tvalue = sp.TUnit)
+
+    def make_key(self, owner, operator):
+        return sp.set_type_expr(sp.record(owner = owner, operator = operator), self.key_type())
+
+    def add(self, set, owner, operator):
+        set[self.make_key(owner, operator)] = sp.unit
+
+    def remove(self, set, owner, operator):
+        del set[self.make_key(owner, operator)]
+
+    def is_member(self, set, owner, operator):
+        return set.contains(self.make_key(owner, operator))
+
+class Paged_set:
+    # Set of values stored in big_maps so only the entries an entrypoint touches are loaded
+    # positions gives O(1) membership checks, items keeps the values in a dense range for paged views
+    # Removing a value moves the last value into its position so the range stays dense
+    def __init__(self, t_value):
+        self.t_value = t_value
+
+    def make(self):
+        return sp.record(
+            items = sp.big_map(tkey = sp.TNat, tvalue = self.t_value),
+            positions = sp.big_map(tkey = self.t_value, tvalue = sp.TNat),
+            size = sp.nat(0)
+        )
+
+    def page_type():
+        return sp.TRecord(
+            offset = sp.TNat,
+            limit = sp.TNat
+        ).layout(("offset", "limit"))
+
+    def add(self, set, value):
+        sp.if ~set.positions.contains(value):
+            set.items[set.size] = value
+            set.positions[value] = set.size
+            set.size += 1
+
+    def remove(self, set, value):
+        sp.if set.positions.contains(value):
+            position = sp.compute(set.positions[value])
+            last = sp.compute(sp.as_nat(set.size - 1))
+            sp.if position != last:
+                moved = sp.compute(set.items[last])
+                set.items[position] = moved
+                set.positions[moved] = position
+            del set.items[last]
+            del set.positions[value]
+            set.size = last
+
+    def contains(self, set, value):
+        return set.positions.contains(value)
+
+    # Values at positions offset to offset + limit - 1
+    def page(self, set, params):
+        sp.set_type(params, Paged_set.page_type())
+        page = sp.local("page", sp.list(t = self.t_value))
+        end = sp.compute(sp.min(set.size, params.offset + params.limit))
+        sp.for position in sp.range(params.offset, end):
+            page.value.push(set.items[position])
+        return page.value.rev()
+
+class Token_index:
+    # Live token ids (supply above zero) kept in a dense range of positions so pages of them can be read
+    # without scanning burned ids, the number of live tokens is the all_tokens counter
+    # A token sits at the position equal to its id until a burn moves the last live token into the freed position,
+    # only positions that differ from the token id are stored so a collection without burns stores nothing extra
+    def slot(self, data, position):
+        return data.token_slots.get(position, default_value = position)
+
+    def position(self, data, token_id):
+        return data.token_positions.get(token_id, default_value = token_id)
+
+    def place(self, data, position, token_id):
+        sp.if position == token_id:
+            del data.token_slots[position]
+            del data.token_positions[token_id]
+        sp.else:
+            data.token_slots[position] = token_id
+            data.token_positions[token_id] = position
+
+    def add(self, data, token_id):
+        self.place(data, data.all_tokens, token_id)
+        data.all_tokens += 1
+
+    def remove(self, data, token_id):
+        position = sp.compute(self.position(data, token_id))
+        last = sp.compute(sp.as_nat(data.all_tokens - 1))
+        sp.if position != last:
+            self.place(data, position, sp.compute(self.slot(data, last)))
+        del data.token_slots[last]
+        del data.token_positions[token_id]
+        data.all_tokens = last
+
+    # Live token ids at positions offset to offset + limit - 1
+    def page(self, data, params):
+        sp.set_type(params, Paged_set.page_type())
+        page = sp.local("page", sp.list(t = sp.TNat))
+        end = sp.compute(sp.min(data.all_tokens, params.offset + params.limit))
+        sp.for position in sp.range(params.offset, end):
+            page.value.push(self.slot(data, position))
+        return page.value.rev()
+
+class Paged_index:
+    # One Paged_set per group (for example per owner) stored in shared big_maps
+    # items holds (group, position) -> value, positions holds (group, value) -> position and sizes the size of each group
+    # group_name is the name of the group field in the paged view arguments
+    def __init__(self, t_group, t_value, group_name):
+        self.t_group = t_group
+        self.t_value = t_value
+        self.group_name = group_name
+
+    def make(self):
+        return sp.record(
+            items = sp.big_map(tkey = sp.TPair(self.t_group, sp.TNat), tvalue = self.t_value),
+            positions = sp.big_map(tkey = sp.TPair(self.t_group, self.t_value), tvalue = sp.TNat),
+            sizes = sp.big_map(tkey = self.t_group, tvalue = sp.TNat)
+        )
+
+    def page_type(self):
+        fields = {self.group_name: self.t_group, "offset": sp.TNat, "limit": sp.TNat}
+        return sp.TRecord(**fields).layout((self.group_name, ("offset", "limit")))
+
+    def size(self, index, group):
+        return index.sizes.get(group, default_value = 0)
+
+    def contains(self, index, group, value):
+        return index.positions.contains(sp.pair(group, value))
+
+    def add(self, index, group, value):
+        sp.if ~index.positions.contains(sp.pair(group, value)):
+            size = sp.compute(self.size(index, group))
+            index.items[sp.pair(group, size)] = value
+            index.positions[sp.pair(group, value)] = size
+            index.sizes[group] = size + 1
+
+    def remove(self, index, group, value):
+        sp.if index.positions.contains(sp.pair(group, value)):
+            position = sp.compute(index.positions[sp.pair(group, value)])
+            last = sp.compute(sp.as_nat(index.sizes[group] - 1))
+            sp.if position != last:
+                moved = sp.compute(index.items[sp.pair(group, last)])
+                index.items[sp.pair(group, position)] = moved
+                index.positions[sp.pair(group, moved)] = position
+            del index.items[sp.pair(group, last)]
+            del index.positions[sp.pair(group, value)]
+            sp.if last == 0:
+                del index.sizes[group]
+            sp.else:
+                index.sizes[group] = last
+
+    # Values of one group at positions offset to offset + limit - 1
+    def page(self, index, params):
+        sp.set_type(params, self.page_type())
+        group = getattr(params, self.group_name)
+        page = sp.local("page", sp.list(t = self.t_value))
+        end = sp.compute(sp.min(self.size(index, group), params.offset + params.limit))
+        sp.for position in sp.range(params.offset, end):
+            page.value.push(index.items[sp.pair(group, position)])
+        return page.value.rev()
+
 class Balance_of:
     def request_type():
         return sp.TRecord(
@@ -171,36 +539,225 @@ def mutez_transfer(contract, params):
     sp.set_type(params.destination, sp.TAddress)
     sp.set_type(params.amount, sp.TMutez)
     sp.send(params.destination, params.amount)
+
+# Views added by FA2_config(owner_index = True)
+# Token ids held by an owner in pages, pass the owner, the offset of the first id and the maximum number of ids to return
+def tokens_of_owner(contract, params):
+    sp.result(contract.owner_tokens_index.page(contract.data.owner_tokens, params))
+
+def count_tokens_of_owner(contract, owner):
+    sp.set_type(owner, sp.TAddress)
+    sp.result(contract.owner_tokens_index.size(contract.data.owner_tokens, owner))
+
+# Views added by FA2_config(holder_index = True)
+# Addresses holding a token in pages, pass the token_id, the offset of the first holder and the maximum number of holders to return
+def holders(contract, params):
+    sp.result(contract.token_holders_index.page(contract.data.token_holders, params))
+
+def holder_count(contract, token_id):
+    sp.set_type(token_id, sp.TNat)
+    sp.result(contract.token_holders_index.size(contract.data.token_holders, token_id))
+
+# Entrypoints added by FA2_config(generative = True)
+# Sets the renderer of the collection, it can be replaced until the first generative token is minted with it
+# Every generative token renders with the collection renderer, so once one exists the renderer is sealed like an artifact
+def set_renderer(contract, renderer):
+    sp.set_type(renderer, Renderer().get_type())
+    sp.verify(sp.sender == contract.data.admin, message = contract.error_message.not_admin())
+    sp.verify(~contract.data.renderer_sealed, message = "Renderer is used by a token")
+    contract.data.renderer[sp.unit] = renderer
+
+# Mints an edition that stores only its seed and params, metadata holds the keys that are not rendered, for example "name"
+def mint_generative(contract, params):
+    sp.set_type(params, Generative_param().get_type())
+    def action():
+        contract.verify_minter()
+        sp.verify(contract.data.renderer.contains(sp.unit), message = "Renderer is not set")
+        contract.data.generative_tokens[contract.data.next_token_id] = sp.record(seed = params.seed, params = params.params)
+        contract.data.renderer_sealed = True
+        contract.mint_token(params.to_, params.amount, params.metadata)
+    contract.with_lock(action)
     
 class FA2_core(sp.Contract):
-    def __init__(self, metadata):
+    def __init__(self, metadata, config = FA2_config()):
+        self.config = config
         self.error_message = Error_message()
         self.operator_set = Operator_set()
-        self.init(
-            lock = sp.bool(False),
-            ledger = sp.big_map(tvalue = Ledger_value.get_type()),
+        self.operator_for_all_set = Operator_for_all_set()
+        self.address_set = Paged_set(sp.TAddress)
+        self.token_index = Token_index()
+        self.owner_tokens_index = Paged_index(sp.TAddress, sp.TNat, "owner")
+        self.token_holders_index = Paged_index(sp.TNat, sp.TAddress, "token_id")
+        self.renderer = Renderer()
+        self.fragment_library = Fragment_library()
+        storage = dict(
+            # (owner, token_id) -> balance, entries with a zero balance are deleted
+            ledger = sp.big_map(tkey = sp.TPair(sp.TAddress, sp.TNat), tvalue = sp.TNat),
             contract_id = sp.bytes("0x5a65726f436f6e7472616374"),
             admin = ADMIN_ADDRESS,
             token_metadata = sp.big_map(tkey = sp.TNat, tvalue = Token_meta_data().get_type()),
+            # Collection metadata template, keys shared by every token are stored once here instead of in each token_info
+            metadata_template = sp.big_map(tkey = sp.TUnit, tvalue = sp.TMap(sp.TString, sp.TBytes)),
             operators = self.operator_set.make(),
+            all_operators = self.operator_for_all_set.make(),
             all_tokens = sp.nat(0),
+            token_slots = sp.big_map(tkey = sp.TNat, tvalue = sp.TNat),
+            token_positions = sp.big_map(tkey = sp.TNat, tvalue = sp.TNat),
             next_token_id=sp.nat(0),
             metadata = metadata,
             total_supply = sp.big_map(tkey = sp.TNat, tvalue = sp.TNat),
-            children = sp.set(t=sp.TAddress),
-            parents = sp.set(t=sp.TAddress),
-            collaborators = sp.set(t=sp.TAddress),
+            children = self.address_set.make(),
+            parents = self.address_set.make(),
+            collaborators = self.address_set.make(),
+            artifact_uploads = sp.big_map(tkey = sp.TNat, tvalue = Artifact_upload().get_type()),
+            # Shared artwork fragments, fragments used by a token and the parts of composed artworks
+            fragments = sp.big_map(tkey = sp.TNat, tvalue = sp.TBytes),
+            next_fragment_id = sp.nat(0),
+            sealed_fragments = sp.big_map(tkey = sp.TNat, tvalue = sp.TUnit),
+            token_parts = sp.big_map(tkey = sp.TNat, tvalue = sp.TList(self.fragment_library.part_type())),
+            # Content addressed artifacts, sha256 of the bytes -> bytes, and the artifact hash of each token minted with one
+            artifacts = sp.big_map(tkey = sp.TBytes, tvalue = sp.TBytes),
+            token_artifacts = sp.big_map(tkey = sp.TNat, tvalue = sp.TBytes),
         )
+        if self.config.reentrancy_lock:
+            storage["lock"] = sp.bool(False)
+        if self.config.owner_index:
+            storage["owner_tokens"] = self.owner_tokens_index.make()
+            self.tokens_of_owner = sp.offchain_view(pure = True)(tokens_of_owner)
+            self.count_tokens_of_owner = sp.offchain_view(pure = True)(count_tokens_of_owner)
+        if self.config.holder_index:
+            storage["token_holders"] = self.token_holders_index.make()
+            self.holders = sp.offchain_view(pure = True)(holders)
+            self.holder_count = sp.offchain_view(pure = True)(holder_count)
+        if self.config.generative:
+            storage["renderer"] = sp.big_map(tkey = sp.TUnit, tvalue = self.renderer.get_type())
+            storage["generative_tokens"] = sp.big_map(tkey = sp.TNat, tvalue = self.renderer.token_type())
+            storage["renderer_sealed"] = sp.bool(False)
+            self.set_renderer = sp.entry_point(set_renderer)
+            self.mint_generative = sp.entry_point(mint_generative)
+        self.init(**storage)
+        self.init_metadata("contract_metadata", self.collection_metadata())
+
+    # Off-chain views listed in the compiled contract metadata, the index views only exist with their FA2_config option
+    def offchain_view_names(self):
+        names = [
+            "token_metadata", "artifact_size", "artifact_slice", "token_metadata_key", "token_artifact", "has_artifact",
+            "count_tokens", "all_tokens", "get_children", "get_parents", "get_collaborators",
+        ]
+        if self.config.owner_index:
+            names += ["tokens_of_owner", "count_tokens_of_owner"]
+        if self.config.holder_index:
+            names += ["holders", "holder_count"]
+        return names
+
+    def collection_metadata(self):
+        return dict(contract_metadata_fields, views = [getattr(self, name) for name in self.offchain_view_names()])
     
     # Reentrancy Guard used in the mint, transfer, and burn entrypoints
+    # Without config.reentrancy_lock the action runs without any lock writes,
+    # internal operations only run after the calling entrypoint has completed so there is nothing to re-enter
     def with_lock(self, action):
+        if not self.config.reentrancy_lock:
+            action()
+            return
         sp.verify(~self.data.lock, message="Reentrancy detected")
         self.data.lock = True
-        try:
-            action()
-        finally:
-            self.data.lock = False
+        action()
+        self.data.lock = False
         
+    # Optional indexes follow the ledger whenever an address starts or stops holding a token
+    # A credit starts a holding when the balance before it was zero, a debit ends one when the balance after it is zero
+    # With every index disabled no code is generated
+    def track_credit(self, owner, token_id, old_balance, amount):
+        if self.config.owner_index or self.config.holder_index:
+            sp.if (old_balance == 0) & (amount > 0):
+                if self.config.owner_index:
+                    self.owner_tokens_index.add(self.data.owner_tokens, owner, token_id)
+                if self.config.holder_index:
+                    self.token_holders_index.add(self.data.token_holders, token_id, owner)
+
+    def track_debit(self, owner, token_id, new_balance, amount):
+        if self.config.owner_index or self.config.holder_index:
+            sp.if (new_balance == 0) & (amount > 0):
+                if self.config.owner_index:
+                    self.owner_tokens_index.remove(self.data.owner_tokens, owner, token_id)
+                if self.config.holder_index:
+                    self.token_holders_index.remove(self.data.token_holders, token_id, owner)
+
+    # Balances of a netted transfer batch, (owner, token_id) -> (balance before the batch, current balance)
+    # An entry is loaded from the ledger the first time the batch touches it
+    def batch_balance(self, balances, user):
+        sp.if ~balances.contains(user):
+            balance = sp.compute(self.data.ledger.get(user, default_value = 0))
+            balances[user] = sp.pair(balance, balance)
+        return sp.snd(balances[user])
+
+    def net_transfer(self, balances, from_user, to_user, amount):
+        from_balance = sp.compute(self.batch_balance(balances, from_user))
+        sp.verify(from_balance >= amount, message=self.error_message.insufficient_balance())
+        balances[from_user] = sp.pair(sp.fst(balances[from_user]), sp.as_nat(from_balance - amount))
+        to_balance = sp.compute(self.batch_balance(balances, to_user))
+        balances[to_user] = sp.pair(sp.fst(balances[to_user]), to_balance + amount)
+
+    # Writes every changed balance of the batch once, the indexes only see the net change of each entry
+    def flush_balances(self, balances):
+        sp.for entry in balances.items():
+            before = sp.compute(sp.fst(entry.value))
+            after = sp.compute(sp.snd(entry.value))
+            sp.if before != after:
+                self.set_balance(entry.key, after)
+                self.track_credit(sp.fst(entry.key), sp.snd(entry.key), before, after)
+                self.track_debit(sp.fst(entry.key), sp.snd(entry.key), after, before)
+
+    # Ledger entries that reach a zero balance are deleted, a missing entry reads as a balance of zero
+    # so holders that sold or burned everything stop paying for their entry
+    def set_balance(self, user, balance):
+        sp.if balance == 0:
+            del self.data.ledger[user]
+        sp.else:
+            self.data.ledger[user] = balance
+
+    # Only the admin or a collaborator can create new tokens
+    def verify_minter(self):
+        sp.verify(
+            (sp.sender == self.data.admin) | (self.address_set.contains(self.data.collaborators, sp.sender)), 
+            message="Not authorized to mint"
+        )
+
+    # Creates the next token_id and credits the full edition to the recipient
+    # Shared by mint and mint_batch so both entrypoints write the same storage
+    def mint_token(self, to_, amount, metadata):
+        # Automatically compute the next token_id
+        token_id = sp.compute(self.data.next_token_id)
+
+        # Store token metadata
+        self.data.token_metadata[token_id] = sp.record(
+            token_id = token_id,
+            token_info = metadata
+        )
+
+        self.credit_edition(to_, token_id, amount)
+    
+        # Increment the next_token_id counter for future mints
+        self.data.next_token_id += 1
+
+    # Credits the edition of a newly created token_id to its recipient
+    # An empty edition would stay in the live token index with no supply that could ever be burnt, so it is rejected
+    def credit_edition(self, to_, token_id, amount):
+        sp.verify(amount > 0, message = "Edition amount must be above zero")
+        # Update the ledger: (address, token_id) -> balance
+        # Nat additions cannot overflow in Michelson so each entry is read and written once
+        user = sp.compute(sp.pair(to_, token_id))
+        balance = sp.compute(self.data.ledger.get(user, default_value = 0))
+        self.track_credit(to_, token_id, balance, amount)
+        self.set_balance(user, balance + amount)
+
+        # Update total supply for this token_id
+        self.data.total_supply[token_id] = self.data.total_supply.get(token_id, default_value = 0) + amount
+
+        # Increment token count when a new token is minted
+        self.token_index.add(self.data, token_id)
+
     # Mint Interaction
     # The entrypoint does nothing more than send the mint action to the address provided
     # All metadata attributes are input into the contract interaction (for example on the Better Call Dev interface)
@@ -208,61 +765,94 @@ class FA2_core(sp.Contract):
     # A longer list of attributes is highly recommended tailored to each collection's needs
     @sp.entrypoint
     def mint(self, params):
+        sp.set_type(params, Mint_param().get_type())
         def action():
             # Check if the sender is authorized
-            sp.verify(
-                (sp.sender == self.data.admin) | (self.data.collaborators.contains(sp.sender)), 
-                message="Not authorized to mint"
-            )
+            self.verify_minter()
+            self.mint_token(params.to_, params.amount, params.metadata)
+        self.with_lock(action)
 
-            # Automatically compute the next token_id
-            token_id = self.data.next_token_id
+    # Batch Mint Interaction
+    # Creates one new token_id per item, using consecutive ids starting at next_token_id
+    # The authorization and reentrancy checks run once for the whole batch instead of once per token
+    # Use this to drop a whole series in a single operation
+    @sp.entrypoint
+    def mint_batch(self, params):
+        sp.set_type(params, Mint_param().get_batch_type())
+        def action():
+            # Check if the sender is authorized
+            self.verify_minter()
+            sp.for item in params:
+                self.mint_token(item.to_, item.amount, item.metadata)
+        self.with_lock(action)
 
-            # Store token metadata
+    # Chunked Artifact Upload
+    # Use these entrypoints when the artifact does not fit in a single mint operation
+    # begin_artifact reserves the next token_id and stores its metadata, the "artifactUri" value can hold the first bytes
+    # append_artifact_chunk adds the next bytes to "artifactUri", offset must equal the number of bytes already uploaded
+    # finalize_artifact seals the artifact and credits the edition to the recipient
+    # Until it is finalized the token has no supply and cannot be transferred, after it is finalized it cannot be changed
+    @sp.entrypoint
+    def begin_artifact(self, params):
+        sp.set_type(params, Mint_param().get_type())
+        def action():
+            self.verify_minter()
+            # Checked here as well so an upload of an empty edition fails before any chunk is sent
+            sp.verify(params.amount > 0, message = "Edition amount must be above zero")
+            token_id = sp.compute(self.data.next_token_id)
             self.data.token_metadata[token_id] = sp.record(
                 token_id = token_id,
                 token_info = params.metadata
             )
-
-            # Update the ledger: (address, token_id) -> balance
-            # Check for balance overflow before assigning
-            sp.if self.data.ledger.contains((params.to_, token_id)):
-                sp.verify(
-                    self.data.ledger[(params.to_, token_id)].balance + params.amount >= self.data.ledger[(params.to_, token_id)].balance,
-                    message=self.error_message.balance_overflow()
-                )
-                self.data.ledger[(params.to_, token_id)].balance += params.amount
-            sp.else:
-                self.data.ledger[(params.to_, token_id)] = Ledger_value.make(params.amount)
-
-            # Update total supply for this token_id
-            sp.if self.data.total_supply.contains(token_id):
-                sp.verify(
-                    self.data.total_supply[token_id] + params.amount >= self.data.total_supply[token_id],
-                    message=self.error_message.balance_overflow()
-                )
-                self.data.total_supply[token_id] += params.amount
-            sp.else:
-                self.data.total_supply[token_id] = params.amount
-
-            # Increment token count when a new token is minted
-            self.data.all_tokens += 1
-        
-            # Increment the next_token_id counter for future mints
+            self.data.artifact_uploads[token_id] = sp.record(
+                minter = sp.sender,
+                to_ = params.to_,
+                amount = params.amount
+            )
             self.data.next_token_id += 1
         self.with_lock(action)
 
+    @sp.entrypoint
+    def append_artifact_chunk(self, params):
+        sp.set_type(params, Artifact_chunk().get_type())
+        sp.verify(self.data.artifact_uploads.contains(params.token_id), message="Artifact is sealed or was never started")
+        sp.verify(self.data.artifact_uploads[params.token_id].minter == sp.sender, message="Only the minter can upload this artifact")
+        token_info = self.data.token_metadata[params.token_id].token_info
+        artifact = sp.compute(token_info.get("artifactUri", default_value = sp.bytes("0x")))
+        sp.verify(sp.len(artifact) == params.offset, message="Artifact chunk is out of order")
+        token_info["artifactUri"] = artifact + params.chunk
+
+    @sp.entrypoint
+    def finalize_artifact(self, token_id):
+        sp.set_type(token_id, sp.TNat)
+        def action():
+            sp.verify(self.data.artifact_uploads.contains(token_id), message="Artifact is sealed or was never started")
+            upload = sp.compute(self.data.artifact_uploads[token_id])
+            sp.verify(upload.minter == sp.sender, message="Only the minter can upload this artifact")
+            self.credit_edition(upload.to_, token_id, upload.amount)
+            del self.data.artifact_uploads[token_id]
+        self.with_lock(action)
         
+    # Hot paths, each ledger entry is read once and written once per tx, or once per batch with config.net_transfers
+    # A token exists when its id is below next_token_id, token_metadata is written for every id below it
     @sp.entrypoint
     def transfer(self, params):
         def action():
             sp.set_type(params, Batch_transfer().get_type())
+            if self.config.net_transfers:
+                balances = sp.local("balances", sp.map(tkey = sp.TPair(sp.TAddress, sp.TNat), tvalue = sp.TPair(sp.TNat, sp.TNat)))
             
             sp.for transfer in params:
+                # Owners and operators for all tokens of from_ need no per token lookup,
+                # so this is decided once for all txs of the same from_
+                may_transfer_all = sp.compute(
+                    (transfer.from_ == sp.sender) |
+                    self.operator_for_all_set.is_member(self.data.all_operators, transfer.from_, sp.sender)
+                )
                 sp.for tx in transfer.txs:
                     # Validate the transfer
                     sp.verify(
-                        (transfer.from_ == sp.sender) | 
+                        may_transfer_all | 
                         (self.operator_set.is_member(
                             self.data.operators, 
                             transfer.from_,
@@ -272,38 +862,33 @@ class FA2_core(sp.Contract):
                     )
                     
                     sp.verify(
-                        self.data.token_metadata.contains(tx.token_id),
+                        tx.token_id < self.data.next_token_id,
                         message=self.error_message.token_undefined()
                     )
                     
                     # Skip zero amount transfers
                     sp.if tx.amount > 0:
-                        from_user = sp.pair(transfer.from_, tx.token_id)
-                        to_user = sp.pair(tx.to_, tx.token_id)
-                        
-                        # Check if sender has enough balance
-                        sp.verify(
-                            self.data.ledger.contains(from_user) & 
-                            (self.data.ledger[from_user].balance >= tx.amount),
-                            message=self.error_message.insufficient_balance()
-                        )
-                        
-                        # Update sender balance
-                        self.data.ledger[from_user].balance = sp.as_nat(
-                            self.data.ledger[from_user].balance - tx.amount
-                        )
-                        
-                        # Update recipient balance
-                        sp.if self.data.ledger.contains(to_user):
-                            # Verify no overflow
-                            sp.verify(
-                                self.data.ledger[to_user].balance + tx.amount >= 
-                                self.data.ledger[to_user].balance,
-                                message=self.error_message.balance_overflow()
-                            )
-                            self.data.ledger[to_user].balance += tx.amount
-                        sp.else:
-                            self.data.ledger[to_user] = Ledger_value.make(tx.amount)
+                        from_user = sp.compute(sp.pair(transfer.from_, tx.token_id))
+                        to_user = sp.compute(sp.pair(tx.to_, tx.token_id))
+                        if self.config.net_transfers:
+                            self.net_transfer(balances.value, from_user, to_user, tx.amount)
+                        else:
+                            # Check if sender has enough balance
+                            from_balance = sp.compute(self.data.ledger.get(from_user, default_value = 0))
+                            sp.verify(from_balance >= tx.amount, message=self.error_message.insufficient_balance())
+
+                            # Update sender balance
+                            new_from_balance = sp.compute(sp.as_nat(from_balance - tx.amount))
+                            self.set_balance(from_user, new_from_balance)
+                            self.track_debit(transfer.from_, tx.token_id, new_from_balance, tx.amount)
+
+                            # Update recipient balance, read after the debit so a transfer to oneself nets out
+                            # Nat additions cannot overflow in Michelson so no overflow check is needed
+                            to_balance = sp.compute(self.data.ledger.get(to_user, default_value = 0))
+                            self.track_credit(tx.to_, tx.token_id, to_balance, tx.amount)
+                            self.set_balance(to_user, to_balance + tx.amount)
+            if self.config.net_transfers:
+                self.flush_balances(balances.value)
         self.with_lock(action)
 
         
@@ -313,19 +898,15 @@ class FA2_core(sp.Contract):
         
         def process_request(req):
             user = sp.pair(req.owner, req.token_id)
-            sp.verify(self.data.token_metadata.contains(req.token_id), 
+            sp.verify(req.token_id < self.data.next_token_id, 
                      message = self.error_message.token_undefined())
             
-            balance = sp.local("balance", sp.nat(0))
-            sp.if self.data.ledger.contains(user):
-                balance.value = self.data.ledger[user].balance
-                
             sp.result(
                 sp.record(
                     request = sp.record(
                         owner = sp.set_type_expr(req.owner, sp.TAddress),
                         token_id = sp.set_type_expr(req.token_id, sp.TNat)),
-                    balance = balance.value))
+                    balance = self.data.ledger.get(user, default_value = 0)))
                     
         res = sp.local("responses", params.requests.map(process_request))
         destination = sp.set_type_expr(params.callback, 
@@ -334,6 +915,12 @@ class FA2_core(sp.Contract):
 
     @sp.entrypoint
     def update_operators(self, params):
+        sp.set_type(params, sp.TList(
+            sp.TVariant(
+                add_operator = Operator_param().get_type(),
+                remove_operator = Operator_param().get_type()
+            )
+        ))
         sp.for update in params:
             with update.match_cases() as arg:
                 with arg.match("add_operator") as upd:
@@ -353,10 +940,23 @@ class FA2_core(sp.Contract):
                                            upd.operator,
                                            upd.token_id)
 
+    # Lets an operator transfer every token of the sender, current and future, with one storage entry
+    # Listing a whole collection on a marketplace then takes one operation instead of one update per token
+    @sp.entrypoint
+    def update_operators_for_all(self, params):
+        sp.set_type(params, self.operator_for_all_set.update_type())
+        sp.for update in params:
+            with update.match_cases() as arg:
+                with arg.match("add_operator_for_all") as operator:
+                    self.operator_for_all_set.add(self.data.all_operators, sp.sender, operator)
+                with arg.match("remove_operator_for_all") as operator:
+                    self.operator_for_all_set.remove(self.data.all_operators, sp.sender, operator)
+
     # The burn token interaction can only be executed by the token owner
     # Objkt.com has a built-in burn mechanisam that can be used as well
     # This is provided for an alternative means or for tokens no present on the Objkt marketplace
-    # The burn does not delete any inforamtion (or actually burn the token) but sends to the burn address for full provinence
+    # By default the burn does not delete any inforamtion (or actually burn the token) but sends to the burn address for full provinence
+    # With FA2_config(provenance_burn = False) the units are destroyed and only total_supply goes down
     @sp.entrypoint
     def burn(self, params):
         def action():
@@ -366,70 +966,139 @@ class FA2_core(sp.Contract):
             sp.verify(params.token_id < self.data.next_token_id, self.error_message.token_undefined())
             
             # Check if sender owns tokens and has sufficient balance
-            user = sp.pair(sp.sender, params.token_id)
-            sp.verify(self.data.ledger.contains(user), self.error_message.not_owner())
-            sp.verify(self.data.ledger[user].balance >= params.amount, self.error_message.insufficient_balance())
-            
-            # Create a burn address if it doesn't already exist
-            burn_address = sp.address("tz1burnburnburnburnburnburnburjAYjjX")
-            burn_user = sp.pair(burn_address, params.token_id)
+            user = sp.compute(sp.pair(sp.sender, params.token_id))
+            balance = sp.compute(self.data.ledger.get_opt(user).open_some(self.error_message.not_owner()))
+            sp.verify(balance >= params.amount, self.error_message.insufficient_balance())
             
             # Decrease sender's balance
-            sp.verify(self.data.ledger[user].balance >= params.amount, self.error_message.insufficient_balance())
-            self.data.ledger[user].balance = sp.as_nat(self.data.ledger[user].balance - params.amount)  # Ensure non-negative result
-
-            # Increase burn address balance
-            sp.if self.data.ledger.contains(burn_user):
-                self.data.ledger[burn_user].balance += params.amount
-            sp.else:
-                self.data.ledger[burn_user] = Ledger_value.make(params.amount)
+            new_balance = sp.compute(sp.as_nat(balance - params.amount))
+            self.set_balance(user, new_balance)
+            self.track_debit(sp.sender, params.token_id, new_balance, params.amount)
+
+            if self.config.provenance_burn:
+                # Create a burn address if it doesn't already exist
+                burn_address = sp.address("tz1burnburnburnburnburnburnburjAYjjX")
+                burn_user = sp.compute(sp.pair(burn_address, params.token_id))
+
+                # Increase burn address balance
+                burn_balance = sp.compute(self.data.ledger.get(burn_user, default_value = 0))
+                self.track_credit(burn_address, params.token_id, burn_balance, params.amount)
+                self.set_balance(burn_user, burn_balance + params.amount)
             
             # Decrease total supply
-            sp.verify(self.data.total_supply[params.token_id] >= params.amount, self.error_message.insufficient_balance())
-            self.data.total_supply[params.token_id] = sp.as_nat(self.data.total_supply[params.token_id] - params.amount)  # Ensure non-negative result
-
-            # Decrement active token count if supply reaches zero
-            sp.if self.data.total_supply[params.token_id] == 0:
-                self.data.all_tokens = sp.as_nat(self.data.all_tokens - 1)
+            supply = sp.compute(self.data.total_supply[params.token_id])
+            sp.verify(supply >= params.amount, self.error_message.insufficient_balance())
+            new_supply = sp.compute(sp.as_nat(supply - params.amount))
+            self.data.total_supply[params.token_id] = new_supply
+
+            # Decrement active token count when this burn takes the supply to zero
+            sp.if (params.amount > 0) & (new_supply == 0):
+                self.token_index.remove(self.data, params.token_id)
         self.with_lock(action)
                 
+    # Shared Fragments
+    # add_fragment stores a new fragment under the next fragment id, append_fragment extends it while no token uses it
+    # mint_composed mints an edition whose "artifactUri" is the concatenation of its parts, rendered by the token_metadata view
+    # A part can be a data URI prefix, a fragment or the bytes that only this token has
+    @sp.entrypoint
+    def add_fragment(self, fragment):
+        sp.set_type(fragment, sp.TBytes)
+        sp.verify(sp.sender == self.data.admin, message = self.error_message.not_admin())
+        self.data.fragments[self.data.next_fragment_id] = fragment
+        self.data.next_fragment_id += 1
+
+    @sp.entrypoint
+    def append_fragment(self, params):
+        sp.set_type(params, self.fragment_library.chunk_type())
+        sp.verify(sp.sender == self.data.admin, message = self.error_message.not_admin())
+        sp.verify(~self.data.sealed_fragments.contains(params.fragment_id), message = "Fragment is used by a token")
+        self.data.fragments[params.fragment_id] = self.data.fragments.get_opt(params.fragment_id).open_some("Fragment is undefined") + params.chunk
+
+    @sp.entrypoint
+    def mint_composed(self, params):
+        sp.set_type(params, self.fragment_library.mint_type())
+        def action():
+            self.verify_minter()
+            self.fragment_library.use(self.data, params.parts)
+            self.data.token_parts[self.data.next_token_id] = params.parts
+            self.mint_token(params.to_, params.amount, params.metadata)
+        self.with_lock(action)
+
+    # Content Addressed Artifacts
+    # store_artifact keeps a full artifact (for example a data URI) under the sha256 of its bytes, identical bytes are only stored once
+    # mint_with_artifact mints an edition that references a stored artifact by its hash instead of sending the bytes again,
+    # the token_metadata view sets its "artifactUri" to the stored bytes
+    # Check has_artifact before uploading, a duplicate upload is rejected
+    @sp.entrypoint
+    def store_artifact(self, artifact):
+        sp.set_type(artifact, sp.TBytes)
+        self.verify_minter()
+        artifact_hash = sp.compute(sp.sha256(artifact))
+        sp.verify(~self.data.artifacts.contains(artifact_hash), message = "Artifact is already stored")
+        self.data.artifacts[artifact_hash] = artifact
+
+    @sp.entrypoint
+    def mint_with_artifact(self, params):
+        sp.set_type(params, Artifact_ref_param().get_type())
+        def action():
+            self.verify_minter()
+            sp.verify(self.data.artifacts.contains(params.artifact), message = "Artifact is not stored")
+            self.data.token_artifacts[self.data.next_token_id] = params.artifact
+            self.mint_token(params.to_, params.amount, params.metadata)
+        self.with_lock(action)
+
+    # Sets the keys shared by every token, for example "creators", "rights", "formats", "decimals", "symbol" and "attributes"
+    # Tokens are then minted with only the keys that differ, the token_metadata view merges the two
+    # An empty map removes the template
+    @sp.entrypoint
+    def set_metadata_template(self, template):
+        sp.set_type(template, sp.TMap(sp.TString, sp.TBytes))
+        sp.verify(sp.sender == self.data.admin, message = self.error_message.not_admin())
+        sp.if sp.len(template) == 0:
+            del self.data.metadata_template[sp.unit]
+        sp.else:
+            self.data.metadata_template[sp.unit] = template
+
     @sp.entrypoint
     def add_collaborator(self, address):
         sp.set_type(address, sp.TAddress)
         sp.verify(sp.sender == self.data.admin, "Only the contract owner can add collaborators")
-        self.data.collaborators.add(address)
+        self.address_set.add(self.data.collaborators, address)
     
     @sp.entrypoint
     def remove_collaborator(self, address):
         sp.set_type(address, sp.TAddress)
         sp.verify(sp.sender == self.data.admin, "Only the contract owner can remove collaborators")
-        self.data.collaborators.remove(address)
+        self.address_set.remove(self.data.collaborators, address)
 
     @sp.entrypoint
     def add_child(self, address):
         sp.set_type(address, sp.TAddress)
         sp.verify(sp.sender == self.data.admin, "Only the contract owner can add children")
-        self.data.children.add(address)
+        self.address_set.add(self.data.children, address)
     
     @sp.entrypoint
     def remove_child(self, address):
         sp.set_type(address, sp.TAddress)
         sp.verify(sp.sender == self.data.admin, "Only the contract owner can remove children")
-        self.data.children.remove(address)
+        self.address_set.remove(self.data.children, address)
     
     @sp.entrypoint
     def add_parent(self, address):
         sp.set_type(address, sp.TAddress)
         sp.verify(sp.sender == self.data.admin, "Only the contract owner can add parents")
-        self.data.parents.add(address)
+        self.address_set.add(self.data.parents, address)
     
     @sp.entrypoint
     def remove_parent(self, address):
         sp.set_type(address, sp.TAddress)
         sp.verify(sp.sender == self.data.admin, "Only the contract owner can remove parents")
-        self.data.parents.remove(address)
+        self.address_set.remove(self.data.parents, address)
         
-    @sp.offchain_view(pure = True)
+    # get_balance, does_token_exist, total_supply and is_operator are on-chain views
+    # Other contracts read them synchronously with sp.view in the same operation,
+    # instead of calling balance_of with a callback which costs an internal operation and a second contract run
+    @sp.onchain_view(pure = True)
     def get_balance(self, req):
         sp.set_type(req, sp.TRecord(
             owner = sp.TAddress,
@@ -437,28 +1106,147 @@ class FA2_core(sp.Contract):
         ).layout(("owner", "token_id")))
         
         user = sp.pair(req.owner, req.token_id)
-        sp.verify(self.data.token_metadata.contains(req.token_id), 
+        sp.verify(req.token_id < self.data.next_token_id, 
                  message = self.error_message.token_undefined())
-        sp.result(self.data.ledger[user].balance)
+        sp.result(self.data.ledger.get(user, default_value = 0))
+
+    # Metadata of a token as marketplaces see it, the template with the keys of the token's own token_info on top
+    # Composed tokens get their "artifactUri" from their parts, tokens minted with a stored artifact from the artifact store,
+    # generative tokens get their "artifactUri" and "displayUri" from the renderer
+    def merged_token_info(self, token_id):
+        sp.set_type(token_id, sp.TNat)
+        sp.verify(token_id < self.data.next_token_id, message = self.error_message.token_undefined())
+        token_info = sp.local("token_info", self.data.metadata_template.get(sp.unit, default_value = sp.map(tkey = sp.TString, tvalue = sp.TBytes)))
+        sp.for item in self.data.token_metadata[token_id].token_info.items():
+            token_info.value[item.key] = item.value
+        sp.if self.data.token_parts.contains(token_id):
+            token_info.value["artifactUri"] = self.fragment_library.render(self.data, self.data.token_parts[token_id])
+        sp.if self.data.token_artifacts.contains(token_id):
+            token_info.value["artifactUri"] = self.data.artifacts[self.data.token_artifacts[token_id]]
+        if self.config.generative:
+            sp.if self.data.generative_tokens.contains(token_id):
+                renderer = sp.compute(self.data.renderer[sp.unit])
+                token = sp.compute(self.data.generative_tokens[token_id])
+                token_info.value["artifactUri"] = self.renderer.render(renderer.artifact, token)
+                token_info.value["displayUri"] = self.renderer.render(renderer.display, token)
+        return token_info.value
+
+    # TZIP-12 token metadata view
+    # Listed in the "views" of the compiled contract metadata so marketplaces read the merged metadata
+    @sp.offchain_view(pure = True)
+    def token_metadata(self, token_id):
+        sp.result(sp.record(token_id = token_id, token_info = self.merged_token_info(token_id)))
+
+    # Whether the "artifactUri" of a token is built from its parts, the artifact store or the renderer instead of its token_info
+    def has_rendered_artifact(self, token_id):
+        rendered = self.data.token_parts.contains(token_id) | self.data.token_artifacts.contains(token_id)
+        if self.config.generative:
+            rendered = rendered | self.data.generative_tokens.contains(token_id)
+        return rendered
+
+    # "artifactUri" of a token as the pieces it is joined from, the rest of the merged metadata is not built
+    # Empty when neither the token nor the template has one
+    def artifact_pieces(self, token_id):
+        sp.set_type(token_id, sp.TNat)
+        sp.verify(token_id < self.data.next_token_id, message = self.error_message.token_undefined())
+        pieces = sp.local("artifact_pieces", sp.list(t = sp.TBytes))
+        artifact = sp.local("artifact", self.data.token_metadata[token_id].token_info.get_opt("artifactUri"))
+        sp.if artifact.value.is_none():
+            artifact.value = self.data.metadata_template.get(sp.unit, default_value = sp.map(tkey = sp.TString, tvalue = sp.TBytes)).get_opt("artifactUri")
+        sp.if artifact.value.is_some():
+            pieces.value = [artifact.value.open_some()]
+        sp.if self.data.token_parts.contains(token_id):
+            pieces.value = self.fragment_library.pieces(self.data, self.data.token_parts[token_id])
+        sp.if self.data.token_artifacts.contains(token_id):
+            pieces.value = [self.data.artifacts[self.data.token_artifacts[token_id]]]
+        if self.config.generative:
+            sp.if self.data.generative_tokens.contains(token_id):
+                pieces.value = self.renderer.pieces(self.data.renderer[sp.unit].artifact, self.data.generative_tokens[token_id])
+        return pieces.value
+
+    # Partial reads so viewers and indexers do not download every artwork in full
+    # artifact_size is the length of the "artifactUri" in bytes, artifact_slice returns up to length bytes from offset
+    # and stops at the end of the artifact, token_metadata_key returns one key of the merged metadata if the token has it
+    # The artwork is read as its pieces, a slice only copies the pieces it overlaps and token_metadata_key
+    # only joins them when "artifactUri" or "displayUri" is asked for
+    @sp.offchain_view(pure = True)
+    def artifact_size(self, token_id):
+        size = sp.local("size", sp.nat(0))
+        sp.for piece in self.artifact_pieces(token_id):
+            size.value += sp.len(piece)
+        sp.result(size.value)
+
+    @sp.offchain_view(pure = True)
+    def artifact_slice(self, params):
+        sp.set_type(params, sp.TRecord(
+            token_id = sp.TNat,
+            offset = sp.TNat,
+            length = sp.TNat
+        ).layout(("token_id", ("offset", "length"))))
+        end = sp.compute(params.offset + params.length)
+        position = sp.local("position", sp.nat(0))
+        pieces = sp.local("slice_pieces", sp.list(t = sp.TBytes))
+        sp.for piece in self.artifact_pieces(params.token_id):
+            piece_end = sp.compute(position.value + sp.len(piece))
+            sp.if (piece_end > params.offset) & (position.value < end):
+                start = sp.compute(sp.as_nat(sp.max(params.offset, position.value) - position.value))
+                stop = sp.compute(sp.as_nat(sp.min(end, piece_end) - position.value))
+                pieces.value.push(sp.slice(piece, start, sp.as_nat(stop - start)).open_some())
+            position.value = piece_end
+        sp.result(sp.concat(pieces.value.rev()))
+
+    @sp.offchain_view(pure = True)
+    def token_metadata_key(self, params):
+        sp.set_type(params, sp.TRecord(
+            token_id = sp.TNat,
+            key = sp.TString
+        ).layout(("token_id", "key")))
+        sp.verify(params.token_id < self.data.next_token_id, message = self.error_message.token_undefined())
+        value = sp.local("value", self.data.token_metadata[params.token_id].token_info.get_opt(params.key))
+        sp.if value.value.is_none():
+            value.value = self.data.metadata_template.get(sp.unit, default_value = sp.map(tkey = sp.TString, tvalue = sp.TBytes)).get_opt(params.key)
+        sp.if (params.key == "artifactUri") & self.has_rendered_artifact(params.token_id):
+            value.value = sp.some(sp.concat(self.artifact_pieces(params.token_id)))
+        if self.config.generative:
+            sp.if (params.key == "displayUri") & self.data.generative_tokens.contains(params.token_id):
+                value.value = sp.some(self.renderer.render(self.data.renderer[sp.unit].display, self.data.generative_tokens[params.token_id]))
+        sp.result(value.value)
+
+    # Artifact of a token minted with mint_with_artifact
+    @sp.offchain_view(pure = True)
+    def token_artifact(self, token_id):
+        sp.set_type(token_id, sp.TNat)
+        artifact_hash = self.data.token_artifacts.get_opt(token_id).open_some("Token has no stored artifact")
+        sp.result(self.data.artifacts[artifact_hash])
+
+    @sp.offchain_view(pure = True)
+    def has_artifact(self, artifact_hash):
+        sp.set_type(artifact_hash, sp.TBytes)
+        sp.result(self.data.artifacts.contains(artifact_hash))
 
     @sp.offchain_view(pure = True)
     def count_tokens(self):
         sp.result(self.data.all_tokens)
 
-    @sp.offchain_view(pure = True)
+    @sp.onchain_view(pure = True)
     def does_token_exist(self, tok):
         sp.set_type(tok, sp.TNat)
-        sp.result(self.data.token_metadata.contains(tok))
+        sp.result(tok < self.data.next_token_id)
 
+    # Live token ids in pages, pass the offset of the first id and the maximum number of ids to return
+    # Fully burned tokens are left out, use count_tokens for the number of live tokens
     @sp.offchain_view(pure = True)
-    def all_tokens(self):
-        sp.result(sp.range(0, self.data.all_tokens))
+    def all_tokens(self, params):
+        sp.result(self.token_index.page(self.data, params))
 
-    @sp.offchain_view(pure = True)
+    @sp.onchain_view(pure = True)
     def total_supply(self, tok):
-        sp.result(self.data.total_supply[tok])
+        sp.set_type(tok, sp.TNat)
+        sp.verify(tok < self.data.next_token_id, 
+                 message = self.error_message.token_undefined())
+        sp.result(self.data.total_supply.get(tok, default_value = 0))
 
-    @sp.offchain_view(pure = True)
+    @sp.onchain_view(pure = True)
     def is_operator(self, query):
         sp.set_type(query,
                    sp.TRecord(token_id = sp.TNat,
@@ -472,13 +1260,25 @@ class FA2_core(sp.Contract):
                                       query.token_id)
         )
 
+    # True when operator can transfer every token of owner, is_operator only reports per token operators
+    @sp.onchain_view(pure = True)
+    def is_operator_for_all(self, query):
+        sp.set_type(query, Operator_for_all_set().key_type())
+        sp.result(self.operator_for_all_set.is_member(self.data.all_operators, query.owner, query.operator))
+
+    # Paged address views, pass the offset of the first address and the maximum number of addresses to return
+    # Keep increasing offset by limit until a page has fewer than limit addresses
     @sp.offchain_view(pure=True)
-    def get_children(self):
-        sp.result(self.data.children)
+    def get_children(self, params):
+        sp.result(self.address_set.page(self.data.children, params))
     
     @sp.offchain_view(pure=True)
-    def get_parents(self):
-        sp.result(self.data.parents)
+    def get_parents(self, params):
+        sp.result(self.address_set.page(self.data.parents, params))
+
+    @sp.offchain_view(pure=True)
+    def get_collaborators(self, params):
+        sp.result(self.address_set.page(self.data.collaborators, params))
         
 class View_consumer(sp.Contract):
     """Helper contract for testing view methods"""
@@ -500,9 +1300,38 @@ class View_consumer(sp.Contract):
         self.data.last_sum = 0
         sp.for resp in params:
             self.data.last_sum += resp.balance
+
+class View_reader(sp.Contract):
+    """Helper contract reading the on-chain views, the synchronous alternative to View_consumer"""
+    def __init__(self, contract):
+        self.contract = contract
+        self.init(
+            last_sum = 0,
+            last_supply = 0,
+            last_exists = False,
+            last_is_operator = False
+        )
+
+    @sp.entrypoint
+    def read_balances(self, params):
+        sp.set_type(params, sp.TList(Balance_of.request_type()))
+        self.data.last_sum = 0
+        sp.for req in params:
+            self.data.last_sum += sp.view("get_balance", self.contract.address, req, t = sp.TNat).open_some("Invalid view")
+
+    @sp.entrypoint
+    def read_token(self, token_id):
+        sp.set_type(token_id, sp.TNat)
+        self.data.last_exists = sp.view("does_token_exist", self.contract.address, token_id, t = sp.TBool).open_some("Invalid view")
+        self.data.last_supply = sp.view("total_supply", self.contract.address, token_id, t = sp.TNat).open_some("Invalid view")
+
+    @sp.entrypoint
+    def read_operator(self, query):
+        sp.set_type(query, Operator_param().get_type())
+        self.data.last_is_operator = sp.view("is_operator", self.contract.address, query, t = sp.TBool).open_some("Invalid view")
     
-def add_test(is_default=True):
-    @sp.add_test(name="NFT Editions Test Scenarios", is_default=is_default)
+def add_test(config=FA2_config(), name="NFT Editions Test Scenarios", is_default=True):
+    @sp.add_test(name=name, is_default=is_default)
     def test():
         scenario = sp.test_scenario()
 
@@ -516,7 +1345,7 @@ def add_test(is_default=True):
         scenario.show([artist, collector1, collaborator])
         
         # Contract deployment
-        c1 = FA2_core(metadata=contract_metadata)
+        c1 = FA2_core(metadata=contract_metadata, config=config)
         scenario += c1
 
         # === CRITICAL TESTS NEED TO REMAIN WHEN DEPLOYING ===
@@ -532,7 +1361,7 @@ def add_test(is_default=True):
             "decimals": sp.utils.bytes_of_string("0")
         })
         c1.mint(to_=artist.address, amount=10, metadata=edition1_md).run(sender=admin)
-        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)].balance == 10)
+        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)] == 10)
 
         # Test minting as collaborator (critical)
         collab_md = sp.map(l={
@@ -542,7 +1371,7 @@ def add_test(is_default=True):
             "decimals": sp.utils.bytes_of_string("0")
         })
         c1.mint(to_=artist.address, amount=5, metadata=collab_md).run(sender=collaborator)
-        scenario.verify(c1.data.ledger[sp.pair(artist.address, 1)].balance == 5)
+        scenario.verify(c1.data.ledger[sp.pair(artist.address, 1)] == 5)
 
         # Test unauthorized minting (critical)
         unauthorized = sp.test_account("Unauthorized")
@@ -558,8 +1387,8 @@ def add_test(is_default=True):
                 )
             ]
         ).run(sender=artist)
-        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)].balance == 7)
-        scenario.verify(c1.data.ledger[sp.pair(collector1.address, 0)].balance == 3)
+        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)] == 7)
+        scenario.verify(c1.data.ledger[sp.pair(collector1.address, 0)] == 3)
 
         # Test transfer with insufficient balance (critical)
         c1.transfer(
@@ -573,7 +1402,7 @@ def add_test(is_default=True):
 
         # Test burning (critical)
         c1.burn(sp.record(token_id=0, amount=2)).run(sender=artist)
-        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)].balance == 5)
+        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)] == 5)
 
         # Test total supply (critical)
         scenario.verify(c1.data.total_supply[0] == 8)  # Adjusted after burn
@@ -593,6 +1422,21 @@ def add_test(is_default=True):
         ).run(sender=artist)
         scenario.verify(consumer.data.last_sum == 5)
 
+        # The same reads through the on-chain views, without a callback
+        reader = View_reader(c1)
+        scenario += reader
+        reader.read_balances([
+            sp.record(owner=artist.address, token_id=0),
+            sp.record(owner=collector1.address, token_id=0)
+        ]).run(sender=artist)
+        scenario.verify(reader.data.last_sum == 5 + 3)
+        reader.read_token(0).run(sender=artist)
+        scenario.verify(reader.data.last_exists)
+        scenario.verify(reader.data.last_supply == 8)
+        reader.read_token(999).run(sender=artist, valid=False)
+        reader.read_operator(Operator_param().make(artist.address, collector1.address, 0)).run(sender=artist)
+        scenario.verify(~reader.data.last_is_operator)
+
 
         # Create a malicious contract to simulate reentrancy
         class MaliciousContract(sp.Contract):
@@ -616,6 +1460,10 @@ def add_test(is_default=True):
         # Try to trigger reentrancy
         scenario += malicious_contract.malicious_burn().run(sender=artist, valid=False)
 
+        # The failed attempt leaves balances and supply untouched, with or without the lock
+        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)] == 5)
+        scenario.verify(c1.data.total_supply[0] == 8)
+
 
         # === OPTIONAL/DEBUGGING TESTS CAN BE DELETED BEFORE DEPLOYING ===
         # Test operator functionality (can be removed before deployment)
@@ -635,8 +1483,8 @@ def add_test(is_default=True):
                 )
             ]
         ).run(sender=operator)
-        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)].balance == 4)
-        scenario.verify(c1.data.ledger[sp.pair(collector1.address, 0)].balance == 4)
+        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)] == 4)
+        scenario.verify(c1.data.ledger[sp.pair(collector1.address, 0)] == 4)
 
         # Test unauthorized operator transfer (can be removed)
         c1.transfer(
@@ -648,19 +1496,744 @@ def add_test(is_default=True):
             ]
         ).run(sender=operator, valid=False)
 
+        # Operator rights are checked per token even when the txs share the same from_
+        c1.transfer([batch_transfer.item(
+            from_=artist.address,
+            txs=[sp.record(to_=collector1.address, amount=1, token_id=0),
+                 sp.record(to_=collector1.address, amount=1, token_id=1)]
+        )]).run(sender=operator, valid=False, exception="FA2_NOT_OPERATOR")
+        c1.transfer([batch_transfer.item(
+            from_=artist.address,
+            txs=[sp.record(to_=collector1.address, amount=0, token_id=99)]
+        )]).run(sender=artist, valid=False, exception="FA2_TOKEN_UNDEFINED")
+
+        # An operator for all tokens of collector1 needs no per token entry
+        c1.update_operators_for_all([sp.variant("add_operator_for_all", operator.address)]).run(sender=collector1)
+        scenario.verify(c1.is_operator_for_all(sp.record(owner=collector1.address, operator=operator.address)))
+        scenario.verify(~c1.is_operator(Operator_param().make(collector1.address, operator.address, 0)))
+        c1.transfer([batch_transfer.item(
+            from_=collector1.address,
+            txs=[sp.record(to_=artist.address, amount=1, token_id=0)]
+        )]).run(sender=operator)
+        scenario.verify(c1.data.ledger[sp.pair(collector1.address, 0)] == 3)
+        c1.update_operators_for_all([sp.variant("remove_operator_for_all", operator.address)]).run(sender=collector1)
+        c1.transfer([batch_transfer.item(
+            from_=collector1.address,
+            txs=[sp.record(to_=artist.address, amount=1, token_id=0)]
+        )]).run(sender=operator, valid=False, exception="FA2_NOT_OPERATOR")
+
+        # A transfer to oneself leaves the balance unchanged
+        c1.transfer([batch_transfer.item(
+            from_=artist.address,
+            txs=[sp.record(to_=artist.address, amount=5, token_id=0)]
+        )]).run(sender=artist)
+        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)] == 5)
+
         # Test adding/removing child address (can be removed)
         test_address = sp.address("tz1XXExampleAddress")
         c1.add_child(test_address).run(sender=admin)
-        scenario.verify(c1.data.children.contains(test_address))
+        scenario.verify(c1.data.children.positions.contains(test_address))
         c1.remove_child(test_address).run(sender=admin)
-        scenario.verify(~c1.data.children.contains(test_address))
+        scenario.verify(~c1.data.children.positions.contains(test_address))
+
+def add_address_list_test(is_default=True):
+    @sp.add_test(name="NFT Editions Address Lists", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        admin = ADMIN_ADDRESS
+        artist = sp.test_account("Artist")
+        collaborator = sp.test_account("Collaborator")
+
+        c1 = FA2_core(metadata=contract_metadata)
+        scenario += c1
+
+        children = [sp.test_account("Child%d" % i).address for i in range(5)]
+        for child in children:
+            c1.add_child(child).run(sender=admin)
+        # Adding an address twice does not change the list
+        c1.add_child(children[0]).run(sender=admin)
+        scenario.verify(c1.data.children.size == 5)
+
+        # Pages follow the order the addresses were added in
+        scenario.verify_equal(c1.get_children(sp.record(offset=0, limit=2)), children[0:2])
+        scenario.verify_equal(c1.get_children(sp.record(offset=2, limit=2)), children[2:4])
+        scenario.verify_equal(c1.get_children(sp.record(offset=4, limit=2)), children[4:5])
+        scenario.verify_equal(c1.get_children(sp.record(offset=6, limit=2)), [])
+
+        # Removing an address moves the last address into its place
+        c1.remove_child(children[1]).run(sender=admin)
+        scenario.verify(~c1.data.children.positions.contains(children[1]))
+        scenario.verify(c1.data.children.size == 4)
+        scenario.verify_equal(c1.get_children(sp.record(offset=0, limit=10)), [children[0], children[4], children[2], children[3]])
+
+        # Removing the last address and an unknown address
+        c1.remove_child(children[3]).run(sender=admin)
+        c1.remove_child(children[3]).run(sender=admin)
+        scenario.verify_equal(c1.get_children(sp.record(offset=0, limit=10)), [children[0], children[4], children[2]])
+
+        # Parents and collaborators use the same structure
+        c1.add_parent(artist.address).run(sender=admin)
+        scenario.verify_equal(c1.get_parents(sp.record(offset=0, limit=10)), [artist.address])
+        c1.remove_parent(artist.address).run(sender=admin)
+        scenario.verify_equal(c1.get_parents(sp.record(offset=0, limit=10)), [])
+
+        c1.add_collaborator(collaborator.address).run(sender=admin)
+        scenario.verify_equal(c1.get_collaborators(sp.record(offset=0, limit=10)), [collaborator.address])
+        c1.mint(to_=collaborator.address, amount=1, metadata=sp.map(l={"name": sp.utils.bytes_of_string("Collab")})).run(sender=collaborator)
+        c1.remove_collaborator(collaborator.address).run(sender=admin)
+        c1.mint(to_=collaborator.address, amount=1, metadata=sp.map(l={"name": sp.utils.bytes_of_string("Collab")})).run(
+            sender=collaborator, valid=False, exception="Not authorized to mint")
+
+        # Only the admin can change the lists
+        c1.add_child(artist.address).run(sender=artist, valid=False, exception="Only the contract owner can add children")
+
+def add_mint_batch_test(is_default=True):
+    @sp.add_test(name="NFT Editions Batch Mint Scenarios", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        admin = ADMIN_ADDRESS
+        artist = sp.test_account("Artist")
+        collector1 = sp.test_account("Collector1")
+        unauthorized = sp.test_account("Unauthorized")
+
+        c1 = FA2_core(metadata=contract_metadata)
+        scenario += c1
+
+        mint_param = Mint_param()
+        def make_batch(size):
+            return [
+                mint_param.item(
+                    to_=artist.address if i % 2 == 0 else collector1.address,
+                    amount=i + 1,
+                    metadata=sp.map(l={
+                        "name": sp.utils.bytes_of_string("Series #%d" % i),
+                        "decimals": sp.utils.bytes_of_string("0")
+                    })
+                )
+                for i in range(size)
+            ]
+
+        # Batches of increasing size
+        # Compare the consumed gas of each call divided by the batch size to see the per token cost go down
+        next_id = 0
+        for size in [1, 10, 50]:
+            scenario.h2("Mint batch of %d tokens" % size)
+            c1.mint_batch(make_batch(size)).run(sender=admin)
+            scenario.verify(c1.data.next_token_id == next_id + size)
+            # Token ids are consecutive and each item keeps its own recipient, amount and metadata
+            scenario.verify(c1.data.ledger[sp.pair(artist.address, next_id)] == 1)
+            scenario.verify(c1.data.total_supply[next_id] == 1)
+            scenario.verify(c1.data.token_metadata[next_id].token_info["name"] == sp.utils.bytes_of_string("Series #0"))
+            if size > 1:
+                scenario.verify(c1.data.ledger[sp.pair(collector1.address, next_id + 1)] == 2)
+                scenario.verify(c1.data.total_supply[next_id + size - 1] == size)
+            next_id += size
+        scenario.verify(c1.data.all_tokens == next_id)
+
+        # An empty batch does not create any token
+        c1.mint_batch([]).run(sender=admin)
+        scenario.verify(c1.data.next_token_id == next_id)
+
+        # Test unauthorized batch minting
+        c1.mint_batch(make_batch(2)).run(sender=unauthorized, valid=False, exception="Not authorized to mint")
+        scenario.verify(c1.data.next_token_id == next_id)
+
+        # Empty editions are rejected, alone or anywhere in a batch, and never enter the live token index
+        empty_md = sp.map(l={"name": sp.utils.bytes_of_string("Empty")})
+        c1.mint(to_=artist.address, amount=0, metadata=empty_md).run(
+            sender=admin, valid=False, exception="Edition amount must be above zero")
+        c1.mint_batch(make_batch(2) + [mint_param.item(to_=artist.address, amount=0, metadata=empty_md)]).run(
+            sender=admin, valid=False, exception="Edition amount must be above zero")
+        c1.begin_artifact(mint_param.item(to_=artist.address, amount=0, metadata=empty_md)).run(
+            sender=admin, valid=False, exception="Edition amount must be above zero")
+        scenario.verify(c1.data.next_token_id == next_id)
+        scenario.verify(c1.data.all_tokens == next_id)
+
+def add_artifact_upload_test(is_default=True):
+    @sp.add_test(name="NFT Editions Chunked Artifact Upload", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        admin = ADMIN_ADDRESS
+        artist = sp.test_account("Artist")
+        collector1 = sp.test_account("Collector1")
+        collaborator = sp.test_account("Collaborator")
+
+        c1 = FA2_core(metadata=contract_metadata)
+        scenario += c1
+        c1.add_collaborator(collaborator.address).run(sender=admin)
+
+        # Simulated 200 KB artwork uploaded in chunks that each fit in one operation
+        # Each append_artifact_chunk call shows the gas and storage cost of one chunk
+        prefix = "data:image/svg+xml;utf8,"
+        body = "<svg xmlns='http://www.w3.org/2000/svg'>" + "<rect width='1' height='1'/>" * 7300 + "</svg>"
+        chunk_size = 24000
+        chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+        scenario.h2("Begin artifact")
+        upload_md = sp.map(l={
+            "name": sp.utils.bytes_of_string("Large Edition"),
+            "decimals": sp.utils.bytes_of_string("0"),
+            "artifactUri": sp.utils.bytes_of_string(prefix)
+        })
+        c1.begin_artifact(Mint_param().item(to_=artist.address, amount=10, metadata=upload_md)).run(sender=admin)
+        scenario.verify(c1.data.next_token_id == 1)
+        scenario.verify(~c1.data.ledger.contains(sp.pair(artist.address, 0)))
+
+        # The token cannot be transferred before it is finalized
+        c1.transfer([Batch_transfer().item(
+            from_=artist.address,
+            txs=[sp.record(to_=collector1.address, amount=1, token_id=0)]
+        )]).run(sender=artist, valid=False)
+
+        # Only the minter who started the upload can add to it
+        c1.append_artifact_chunk(Artifact_chunk().make(0, len(prefix), sp.utils.bytes_of_string(chunks[0]))).run(
+            sender=collaborator, valid=False, exception="Only the minter can upload this artifact")
+
+        uploaded = len(prefix)
+        for i, chunk in enumerate(chunks):
+            scenario.h3("Chunk %d of %d" % (i + 1, len(chunks)))
+            c1.append_artifact_chunk(Artifact_chunk().make(0, uploaded, sp.utils.bytes_of_string(chunk))).run(sender=admin)
+            uploaded += len(chunk)
+        scenario.verify(sp.len(c1.data.token_metadata[0].token_info["artifactUri"]) == uploaded)
+        scenario.verify(c1.data.token_metadata[0].token_info["artifactUri"] == sp.utils.bytes_of_string(prefix + body))
+
+        # A replayed or skipped chunk is rejected
+        c1.append_artifact_chunk(Artifact_chunk().make(0, 0, sp.utils.bytes_of_string(chunks[0]))).run(
+            sender=admin, valid=False, exception="Artifact chunk is out of order")
+
+        scenario.h2("Finalize artifact")
+        c1.finalize_artifact(0).run(sender=admin)
+        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)] == 10)
+        scenario.verify(c1.data.total_supply[0] == 10)
+        scenario.verify(c1.data.all_tokens == 1)
+
+        # The artifact is sealed and cannot be changed or finalized twice
+        c1.append_artifact_chunk(Artifact_chunk().make(0, uploaded, sp.utils.bytes_of_string("<!-- -->"))).run(
+            sender=admin, valid=False, exception="Artifact is sealed or was never started")
+        c1.finalize_artifact(0).run(sender=admin, valid=False, exception="Artifact is sealed or was never started")
+
+        # Tokens minted in one operation cannot be reopened for upload
+        c1.mint(to_=artist.address, amount=1, metadata=upload_md).run(sender=admin)
+        c1.append_artifact_chunk(Artifact_chunk().make(1, len(prefix), sp.utils.bytes_of_string("<svg/>"))).run(
+            sender=admin, valid=False, exception="Artifact is sealed or was never started")
+
+        # Only a minter can start an upload
+        c1.begin_artifact(Mint_param().item(to_=collector1.address, amount=1, metadata=upload_md)).run(
+            sender=collector1, valid=False, exception="Not authorized to mint")
+
+def add_token_enumeration_test(is_default=True):
+    @sp.add_test(name="NFT Editions Token Enumeration", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        admin = ADMIN_ADDRESS
+        artist = sp.test_account("Artist")
+
+        c1 = FA2_core(metadata=contract_metadata)
+        scenario += c1
+
+        md = sp.map(l={"name": sp.utils.bytes_of_string("Edition")})
+        c1.mint_batch([Mint_param().item(to_=artist.address, amount=2, metadata=md) for _ in range(5)]).run(sender=admin)
+        scenario.verify(c1.count_tokens() == 5)
+        scenario.verify_equal(c1.all_tokens(sp.record(offset=0, limit=3)), [0, 1, 2])
+        scenario.verify_equal(c1.all_tokens(sp.record(offset=3, limit=3)), [3, 4])
+        # Without burns no position needs to be stored
+        scenario.verify(~c1.data.token_slots.contains(0))
+
+        # A partial burn keeps the token live
+        c1.burn(sp.record(token_id=1, amount=1)).run(sender=artist)
+        scenario.verify(c1.count_tokens() == 5)
+
+        # Burning the rest removes it and the last live token takes its place
+        c1.burn(sp.record(token_id=1, amount=1)).run(sender=artist)
+        scenario.verify(c1.count_tokens() == 4)
+        scenario.verify_equal(c1.all_tokens(sp.record(offset=0, limit=10)), [0, 4, 2, 3])
+
+        # The artist's ledger entry for the burned token is deleted, burning zero of it fails and the count stays
+        c1.burn(sp.record(token_id=1, amount=0)).run(sender=artist, valid=False, exception="FA2_NOT_OWNER")
+        scenario.verify(c1.count_tokens() == 4)
+
+        # Burning the last live token
+        c1.burn(sp.record(token_id=3, amount=2)).run(sender=artist)
+        scenario.verify_equal(c1.all_tokens(sp.record(offset=0, limit=10)), [0, 4, 2])
+
+        # New tokens are appended after the live ones
+        c1.mint(to_=artist.address, amount=1, metadata=md).run(sender=admin)
+        scenario.verify_equal(c1.all_tokens(sp.record(offset=0, limit=10)), [0, 4, 2, 5])
+        c1.burn(sp.record(token_id=4, amount=2)).run(sender=artist)
+        c1.burn(sp.record(token_id=0, amount=2)).run(sender=artist)
+        scenario.verify_equal(c1.all_tokens(sp.record(offset=0, limit=10)), [2, 5])
+        scenario.verify(c1.count_tokens() == 2)
+
+def add_owner_index_test(is_default=True):
+    @sp.add_test(name="NFT Editions Owner Index", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        admin = ADMIN_ADDRESS
+        artist = sp.test_account("Artist")
+        collector1 = sp.test_account("Collector1")
+
+        c1 = FA2_core(metadata=contract_metadata, config=FA2_config(owner_index=True))
+        scenario += c1
+
+        md = sp.map(l={"name": sp.utils.bytes_of_string("Edition")})
+        c1.mint_batch([Mint_param().item(to_=artist.address, amount=3, metadata=md) for _ in range(4)]).run(sender=admin)
+        scenario.verify(c1.count_tokens_of_owner(artist.address) == 4)
+        scenario.verify_equal(c1.tokens_of_owner(sp.record(owner=artist.address, offset=0, limit=3)), [0, 1, 2])
+        scenario.verify_equal(c1.tokens_of_owner(sp.record(owner=artist.address, offset=3, limit=3)), [3])
+        scenario.verify(c1.count_tokens_of_owner(collector1.address) == 0)
+
+        batch_transfer = Batch_transfer()
+        # A partial transfer adds the token to the recipient and keeps it for the sender
+        c1.transfer([batch_transfer.item(
+            from_=artist.address,
+            txs=[sp.record(to_=collector1.address, amount=1, token_id=1)]
+        )]).run(sender=artist)
+        scenario.verify_equal(c1.tokens_of_owner(sp.record(owner=collector1.address, offset=0, limit=10)), [1])
+        scenario.verify(c1.count_tokens_of_owner(artist.address) == 4)
+
+        # Sending the last units removes the token from the sender
+        c1.transfer([batch_transfer.item(
+            from_=artist.address,
+            txs=[sp.record(to_=collector1.address, amount=2, token_id=1),
+                 sp.record(to_=collector1.address, amount=3, token_id=3)]
+        )]).run(sender=artist)
+        scenario.verify_equal(c1.tokens_of_owner(sp.record(owner=artist.address, offset=0, limit=10)), [0, 2])
+        scenario.verify_equal(c1.tokens_of_owner(sp.record(owner=collector1.address, offset=0, limit=10)), [1, 3])
+
+        # Zero amount transfers and transfers to oneself leave the index as it is
+        c1.transfer([batch_transfer.item(
+            from_=collector1.address,
+            txs=[sp.record(to_=artist.address, amount=0, token_id=1),
+                 sp.record(to_=collector1.address, amount=3, token_id=3)]
+        )]).run(sender=collector1)
+        scenario.verify(c1.count_tokens_of_owner(collector1.address) == 2)
+        scenario.verify(c1.count_tokens_of_owner(artist.address) == 2)
+
+        # Burning the last units removes the token
+        c1.burn(sp.record(token_id=1, amount=3)).run(sender=collector1)
+        scenario.verify_equal(c1.tokens_of_owner(sp.record(owner=collector1.address, offset=0, limit=10)), [3])
+
+def add_holder_index_test(is_default=True):
+    @sp.add_test(name="NFT Editions Holder Index", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        admin = ADMIN_ADDRESS
+        artist = sp.test_account("Artist")
+        collector1 = sp.test_account("Collector1")
+        collector2 = sp.test_account("Collector2")
+
+        c1 = FA2_core(metadata=contract_metadata, config=FA2_config(holder_index=True))
+        scenario += c1
+
+        md = sp.map(l={"name": sp.utils.bytes_of_string("Edition")})
+        c1.mint(to_=artist.address, amount=10, metadata=md).run(sender=admin)
+        scenario.verify(c1.holder_count(0) == 1)
+        scenario.verify_equal(c1.holders(sp.record(token_id=0, offset=0, limit=10)), [artist.address])
+        scenario.verify(c1.holder_count(1) == 0)
+
+        batch_transfer = Batch_transfer()
+        c1.transfer([batch_transfer.item(
+            from_=artist.address,
+            txs=[sp.record(to_=collector1.address, amount=2, token_id=0),
+                 sp.record(to_=collector2.address, amount=3, token_id=0)]
+        )]).run(sender=artist)
+        scenario.verify(c1.holder_count(0) == 3)
+        scenario.verify_equal(c1.holders(sp.record(token_id=0, offset=1, limit=1)), [collector1.address])
+        scenario.verify_equal(c1.holders(sp.record(token_id=0, offset=2, limit=5)), [collector2.address])
+
+        # Sending all units away drops the sender, the last holder takes its position
+        c1.transfer([batch_transfer.item(
+            from_=collector1.address,
+            txs=[sp.record(to_=collector2.address, amount=2, token_id=0)]
+        )]).run(sender=collector1)
+        scenario.verify_equal(c1.holders(sp.record(token_id=0, offset=0, limit=10)), [artist.address, collector2.address])
+
+        # Burned units are sent to the burn address, which then shows up as a holder
+        c1.burn(sp.record(token_id=0, amount=5)).run(sender=collector2)
+        scenario.verify(c1.holder_count(0) == 2)
+        scenario.verify_equal(c1.holders(sp.record(token_id=0, offset=0, limit=10)), [artist.address, sp.address("tz1burnburnburnburnburnburnburjAYjjX")])
+
+def add_net_transfers_test(is_default=True):
+    @sp.add_test(name="NFT Editions Netted Transfers", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        admin = ADMIN_ADDRESS
+        artist = sp.test_account("Artist")
+        collector1 = sp.test_account("Collector1")
+        collector2 = sp.test_account("Collector2")
+
+        c1 = FA2_core(metadata=contract_metadata, config=FA2_config(net_transfers=True, holder_index=True))
+        scenario += c1
+
+        md = sp.map(l={"name": sp.utils.bytes_of_string("Edition")})
+        c1.mint(to_=artist.address, amount=50, metadata=md).run(sender=admin)
+
+        batch_transfer = Batch_transfer()
+        # Many txs of one edition to one collector are written once
+        c1.transfer([batch_transfer.item(
+            from_=artist.address,
+            txs=[sp.record(to_=collector1.address, amount=10, token_id=0) for _ in range(4)]
+        )]).run(sender=artist)
+        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)] == 10)
+        scenario.verify(c1.data.ledger[sp.pair(collector1.address, 0)] == 40)
+
+        # Every tx is checked against the balance left by the txs before it
+        c1.transfer([batch_transfer.item(
+            from_=artist.address,
+            txs=[sp.record(to_=collector1.address, amount=6, token_id=0),
+                 sp.record(to_=collector1.address, amount=6, token_id=0)]
+        )]).run(sender=artist, valid=False, exception="FA2_INSUFFICIENT_BALANCE")
+
+        # Units received earlier in the batch can be sent on later in the same batch
+        c1.update_operators([
+            sp.variant("add_operator", Operator_param().make(owner=collector2.address, operator=artist.address, token_id=0))
+        ]).run(sender=collector2)
+        c1.transfer([
+            batch_transfer.item(from_=artist.address, txs=[sp.record(to_=collector2.address, amount=10, token_id=0)]),
+            batch_transfer.item(from_=collector2.address, txs=[sp.record(to_=collector1.address, amount=10, token_id=0)])
+        ]).run(sender=artist)
+        scenario.verify(~c1.data.ledger.contains(sp.pair(artist.address, 0)))
+        scenario.verify(c1.data.ledger[sp.pair(collector1.address, 0)] == 50)
+        # collector2 ends the batch as it started, with nothing, so the index never sees it
+        scenario.verify(~c1.data.ledger.contains(sp.pair(collector2.address, 0)))
+        scenario.verify_equal(c1.holders(sp.record(token_id=0, offset=0, limit=10)), [collector1.address])
+
+def add_true_burn_test(is_default=True):
+    @sp.add_test(name="NFT Editions True Burn", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        admin = ADMIN_ADDRESS
+        artist = sp.test_account("Artist")
+        collector1 = sp.test_account("Collector1")
+        burn_address = sp.address("tz1burnburnburnburnburnburnburjAYjjX")
+
+        c1 = FA2_core(metadata=contract_metadata, config=FA2_config(provenance_burn=False))
+        scenario += c1
+
+        md = sp.map(l={"name": sp.utils.bytes_of_string("Edition")})
+        c1.mint(to_=artist.address, amount=3, metadata=md).run(sender=admin)
+
+        # Sending every unit away deletes the sender's ledger entry, its balance still reads as 0
+        c1.transfer([Batch_transfer().item(
+            from_=artist.address,
+            txs=[sp.record(to_=collector1.address, amount=3, token_id=0)]
+        )]).run(sender=artist)
+        scenario.verify(~c1.data.ledger.contains(sp.pair(artist.address, 0)))
+        scenario.verify(c1.get_balance(sp.record(owner=artist.address, token_id=0)) == 0)
+
+        # Burned units are destroyed instead of moved to the burn address
+        c1.burn(sp.record(token_id=0, amount=1)).run(sender=collector1)
+        scenario.verify(c1.data.ledger[sp.pair(collector1.address, 0)] == 2)
+        scenario.verify(~c1.data.ledger.contains(sp.pair(burn_address, 0)))
+        scenario.verify(c1.total_supply(0) == 2)
+        c1.burn(sp.record(token_id=0, amount=2)).run(sender=collector1)
+        scenario.verify(~c1.data.ledger.contains(sp.pair(collector1.address, 0)))
+        scenario.verify(c1.total_supply(0) == 0)
+        scenario.verify(c1.count_tokens() == 0)
+        c1.burn(sp.record(token_id=0, amount=1)).run(sender=collector1, valid=False, exception="FA2_NOT_OWNER")
+
+def add_metadata_template_test(is_default=True):
+    @sp.add_test(name="NFT Editions Metadata Template", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        admin = ADMIN_ADDRESS
+        artist = sp.test_account("Artist")
+
+        c1 = FA2_core(metadata=contract_metadata)
+        scenario += c1
+
+        template = {
+            "symbol": sp.utils.bytes_of_string("ZERO"),
+            "decimals": sp.utils.bytes_of_string("0"),
+            "rights": sp.utils.bytes_of_string("No License / All Rights Reserved"),
+        }
+        c1.set_metadata_template(template).run(sender=artist, valid=False, exception="FA2_NOT_ADMIN")
+        c1.set_metadata_template(template).run(sender=admin)
+
+        # Only the keys that differ are stored with each edition, its own keys win over the template
+        c1.mint(to_=artist.address, amount=10, metadata=sp.map(l={
+            "name": sp.utils.bytes_of_string("Edition #1"),
+            "rights": sp.utils.bytes_of_string("CC0"),
+        })).run(sender=admin)
+        scenario.verify(sp.len(c1.data.token_metadata[0].token_info) == 2)
+        scenario.verify(c1.token_metadata(0).token_info["symbol"] == template["symbol"])
+        scenario.verify(c1.token_metadata(0).token_info["rights"] == sp.utils.bytes_of_string("CC0"))
+        scenario.verify(sp.len(c1.token_metadata(0).token_info) == 4)
+
+def add_generative_test(is_default=True):
+    @sp.add_test(name="NFT Editions Generative", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        admin = ADMIN_ADDRESS
+        artist = sp.test_account("Artist")
+
+        c1 = FA2_core(metadata=contract_metadata, config=FA2_config(generative=True))
+        scenario += c1
+
+        md = sp.map(l={"name": sp.utils.bytes_of_string("Generative #1")})
+        c1.mint_generative(Generative_param().make(artist.address, 1, 42, sp.utils.bytes_of_string("red"), md)).run(
+            sender=admin, valid=False, exception="Renderer is not set")
+
+        template = sp.record(
+            head=sp.utils.bytes_of_string("data:image/svg+xml;utf8,<svg><script>const seed="),
+            middle=sp.utils.bytes_of_string(";const color='"),
+            tail=sp.utils.bytes_of_string("';</script></svg>")
+        )
+        c1.set_renderer(sp.record(artifact=template, display=template)).run(sender=artist, valid=False, exception="FA2_NOT_ADMIN")
+        c1.set_renderer(sp.record(artifact=template, display=template)).run(sender=admin)
+        # Until a generative token is minted the renderer can still be replaced
+        c1.set_renderer(sp.record(artifact=template, display=template)).run(sender=admin)
+
+        # The token stores its seed and params, the artwork is rendered when the metadata is read
+        c1.mint_generative(Generative_param().make(artist.address, 1, 42, sp.utils.bytes_of_string("red"), md)).run(sender=admin)
+        c1.mint_generative(Generative_param().make(artist.address, 1, 0, sp.utils.bytes_of_string("blue"), md)).run(sender=admin)
+        scenario.verify(~c1.data.token_metadata[0].token_info.contains("artifactUri"))
+        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)] == 1)
+        scenario.verify(c1.token_metadata(0).token_info["artifactUri"] == sp.utils.bytes_of_string(
+            "data:image/svg+xml;utf8,<svg><script>const seed=42;const color='red';</script></svg>"))
+        scenario.verify(c1.token_metadata(1).token_info["displayUri"] == sp.utils.bytes_of_string(
+            "data:image/svg+xml;utf8,<svg><script>const seed=0;const color='blue';</script></svg>"))
+        scenario.verify(c1.token_metadata(1).token_info["name"] == sp.utils.bytes_of_string("Generative #1"))
+
+        # Once a generative token exists its artwork cannot be changed through the renderer
+        other = sp.record(
+            head=sp.utils.bytes_of_string("data:image/svg+xml;utf8,<svg><!--"),
+            middle=sp.utils.bytes_of_string(""),
+            tail=sp.utils.bytes_of_string("--></svg>")
+        )
+        c1.set_renderer(sp.record(artifact=other, display=other)).run(
+            sender=admin, valid=False, exception="Renderer is used by a token")
+        scenario.verify(c1.token_metadata(0).token_info["artifactUri"] == sp.utils.bytes_of_string(
+            "data:image/svg+xml;utf8,<svg><script>const seed=42;const color='red';</script></svg>"))
+
+def add_fragment_test(is_default=True):
+    @sp.add_test(name="NFT Editions Shared Fragments", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        admin = ADMIN_ADDRESS
+        artist = sp.test_account("Artist")
+
+        c1 = FA2_core(metadata=contract_metadata)
+        scenario += c1
+
+        c1.add_fragment(sp.utils.bytes_of_string("<defs>")).run(sender=artist, valid=False, exception="FA2_NOT_ADMIN")
+        c1.add_fragment(sp.utils.bytes_of_string("<defs>")).run(sender=admin)
+        c1.append_fragment(sp.record(fragment_id=0, chunk=sp.utils.bytes_of_string("</defs>"))).run(sender=admin)
+        scenario.verify(c1.data.fragments[0] == sp.utils.bytes_of_string("<defs></defs>"))
+
+        md = sp.map(l={"name": sp.utils.bytes_of_string("Composed")})
+        def mint(parts, valid=True, exception=None):
+            c1.mint_composed(sp.record(to_=artist.address, amount=2, parts=parts, metadata=md)).run(
+                sender=admin, valid=valid, exception=exception)
+
+        mint([sp.variant("fragment", 7)], valid=False, exception="Fragment is undefined")
+        mint([
+            sp.variant("inline", sp.utils.bytes_of_string("data:image/svg+xml;utf8,<svg>")),
+            sp.variant("fragment", 0),
+            sp.variant("inline", sp.utils.bytes_of_string("<circle/></svg>"))
+        ])
+        scenario.verify(c1.data.ledger[sp.pair(artist.address, 0)] == 2)
+        scenario.verify(c1.token_metadata(0).token_info["artifactUri"] == sp.utils.bytes_of_string(
+            "data:image/svg+xml;utf8,<svg><defs></defs><circle/></svg>"))
+
+        # Once a token uses a fragment it can no longer change
+        c1.append_fragment(sp.record(fragment_id=0, chunk=sp.utils.bytes_of_string("<g/>"))).run(
+            sender=admin, valid=False, exception="Fragment is used by a token")
+
+def add_artifact_store_test(is_default=True):
+    @sp.add_test(name="NFT Editions Artifact Store", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        admin = ADMIN_ADDRESS
+        artist = sp.test_account("Artist")
+
+        c1 = FA2_core(metadata=contract_metadata)
+        scenario += c1
+
+        artifact = sp.utils.bytes_of_string("data:image/svg+xml;utf8,<svg><rect/></svg>")
+        artifact_hash = sp.sha256(artifact)
+        md = sp.map(l={"name": sp.utils.bytes_of_string("Stored")})
+
+        c1.mint_with_artifact(Artifact_ref_param().make(artist.address, 1, artifact_hash, md)).run(
+            sender=admin, valid=False, exception="Artifact is not stored")
+        c1.store_artifact(artifact).run(sender=artist, valid=False, exception="Not authorized to mint")
+        c1.store_artifact(artifact).run(sender=admin)
+        scenario.verify(c1.has_artifact(artifact_hash))
+        c1.store_artifact(artifact).run(sender=admin, valid=False, exception="Artifact is already stored")
+
+        # Two variants share the same stored bytes
+        c1.mint_with_artifact(Artifact_ref_param().make(artist.address, 5, artifact_hash, md)).run(sender=admin)
+        c1.mint_with_artifact(Artifact_ref_param().make(artist.address, 1, artifact_hash, md)).run(sender=admin)
+        scenario.verify(c1.token_artifact(1) == artifact)
+        scenario.verify(c1.token_metadata(0).token_info["artifactUri"] == artifact)
+        scenario.verify(~c1.data.token_metadata[1].token_info.contains("artifactUri"))
+
+def add_partial_read_test(is_default=True):
+    @sp.add_test(name="NFT Editions Partial Reads", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        admin = ADMIN_ADDRESS
+        artist = sp.test_account("Artist")
+
+        c1 = FA2_core(metadata=contract_metadata)
+        scenario += c1
+
+        c1.set_metadata_template({"symbol": sp.utils.bytes_of_string("ZERO")}).run(sender=admin)
+        c1.mint(to_=artist.address, amount=1, metadata=sp.map(l={
+            "name": sp.utils.bytes_of_string("Slices"),
+            "artifactUri": sp.utils.bytes_of_string("data:text/plain,0123456789")
+        })).run(sender=admin)
+
+        scenario.verify(c1.artifact_size(0) == 26)
+        scenario.verify(c1.artifact_slice(sp.record(token_id=0, offset=16, length=4)) == sp.utils.bytes_of_string("0123"))
+        # Slices stop at the end of the artifact
+        scenario.verify(c1.artifact_slice(sp.record(token_id=0, offset=24, length=10)) == sp.utils.bytes_of_string("89"))
+        scenario.verify(c1.artifact_slice(sp.record(token_id=0, offset=30, length=10)) == sp.bytes("0x"))
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=0, key="symbol")) == sp.some(sp.utils.bytes_of_string("ZERO")))
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=0, key="rights")) == sp.none)
+        artifact = sp.utils.bytes_of_string("data:text/plain,0123456789")
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=0, key="artifactUri")) == sp.some(artifact))
+
+        # A composed token is sliced across its parts without joining them
+        c1.add_fragment(sp.utils.bytes_of_string("4567")).run(sender=admin)
+        c1.mint_composed(sp.record(to_=artist.address, amount=1, parts=[
+            sp.variant("inline", sp.utils.bytes_of_string("data:text/plain,0123")),
+            sp.variant("fragment", 0),
+            sp.variant("inline", sp.utils.bytes_of_string("89"))
+        ], metadata=sp.map(l={"name": sp.utils.bytes_of_string("Composed")}))).run(sender=admin)
+        scenario.verify(c1.artifact_size(1) == 26)
+        scenario.verify(c1.artifact_slice(sp.record(token_id=1, offset=18, length=7)) == sp.utils.bytes_of_string("2345678"))
+        scenario.verify(c1.artifact_slice(sp.record(token_id=1, offset=20, length=4)) == sp.utils.bytes_of_string("4567"))
+        scenario.verify(c1.artifact_slice(sp.record(token_id=1, offset=25, length=5)) == sp.utils.bytes_of_string("9"))
+        scenario.verify(c1.artifact_slice(sp.record(token_id=1, offset=16, length=0)) == sp.bytes("0x"))
+        scenario.verify(c1.artifact_slice(sp.record(token_id=1, offset=26, length=1)) == sp.bytes("0x"))
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=1, key="artifactUri")) == sp.some(artifact))
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=1, key="name")) == sp.some(sp.utils.bytes_of_string("Composed")))
+
+        # A stored artifact is sliced like an artifact of the token_info
+        c1.store_artifact(artifact).run(sender=admin)
+        c1.mint_with_artifact(Artifact_ref_param().make(
+            artist.address, 1, sp.sha256(artifact), sp.map(l={"name": sp.utils.bytes_of_string("Stored")})
+        )).run(sender=admin)
+        scenario.verify(c1.artifact_size(2) == 26)
+        scenario.verify(c1.artifact_slice(sp.record(token_id=2, offset=16, length=4)) == sp.utils.bytes_of_string("0123"))
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=2, key="artifactUri")) == sp.some(artifact))
+
+        # A token without an artwork has an empty one
+        c1.mint(to_=artist.address, amount=1, metadata=sp.map(l={"name": sp.utils.bytes_of_string("Empty")})).run(sender=admin)
+        scenario.verify(c1.artifact_size(3) == 0)
+        scenario.verify(c1.artifact_slice(sp.record(token_id=3, offset=0, length=10)) == sp.bytes("0x"))
+        scenario.verify(c1.token_metadata_key(sp.record(token_id=3, key="artifactUri")) == sp.none)
+
+        # A generative token is sliced across the pieces of the renderer, only the key asked for is rendered
+        c2 = FA2_core(metadata=contract_metadata, config=FA2_config(generative=True))
+        scenario += c2
+        c2.set_renderer(sp.record(
+            artifact=sp.record(head=sp.utils.bytes_of_string("data:text/plain,"), middle=sp.utils.bytes_of_string("-"), tail=sp.utils.bytes_of_string("!")),
+            display=sp.record(head=sp.utils.bytes_of_string("data:text/plain,d"), middle=sp.utils.bytes_of_string("-"), tail=sp.utils.bytes_of_string("!"))
+        )).run(sender=admin)
+        c2.mint_generative(Generative_param().make(
+            artist.address, 1, 42, sp.utils.bytes_of_string("red"), sp.map(l={"name": sp.utils.bytes_of_string("Generative")})
+        )).run(sender=admin)
+        scenario.verify(c2.artifact_size(0) == 23)
+        scenario.verify(c2.artifact_slice(sp.record(token_id=0, offset=15, length=5)) == sp.utils.bytes_of_string(",42-r"))
+        scenario.verify(c2.token_metadata_key(sp.record(token_id=0, key="artifactUri")) == sp.some(sp.utils.bytes_of_string("data:text/plain,42-red!")))
+        scenario.verify(c2.token_metadata_key(sp.record(token_id=0, key="displayUri")) == sp.some(sp.utils.bytes_of_string("data:text/plain,d42-red!")))
+        scenario.verify(c2.token_metadata(0).token_info["artifactUri"] == sp.utils.bytes_of_string("data:text/plain,42-red!"))
+
+def add_metadata_views_test(is_default=True):
+    @sp.add_test(name="NFT Editions Metadata Views", is_default=is_default)
+    def test():
+        scenario = sp.test_scenario()
+
+        for config in [FA2_config(), FA2_config(owner_index=True, holder_index=True, generative=True)]:
+            c1 = FA2_core(metadata=contract_metadata, config=config)
+            scenario += c1
+
+            # The compiled metadata lists the views that render composed, stored and generative artworks
+            metadata = c1.collection_metadata()
+            names = c1.offchain_view_names()
+            for name in ["token_metadata", "artifact_size", "artifact_slice", "token_metadata_key", "token_artifact"]:
+                assert name in names, name
+            if config.owner_index:
+                assert "tokens_of_owner" in names and "holders" in names
+            assert metadata["views"] == [getattr(c1, name) for name in names]
+            assert all(metadata[key] == value for key, value in contract_metadata_fields.items())
 
 # Add test to the compilation target
 if "templates" not in __name__:
     add_test()
+    add_test(config=FA2_config(reentrancy_lock=True), name="NFT Editions Test Scenarios With Lock")
+    add_mint_batch_test()
+    add_artifact_upload_test()
+    add_address_list_test()
+    add_token_enumeration_test()
+    add_owner_index_test()
+    add_holder_index_test()
+    add_net_transfers_test()
+    add_true_burn_test()
+    add_metadata_template_test()
+    add_generative_test()
+    add_fragment_test()
+    add_artifact_store_test()
+    add_partial_read_test()
+    add_metadata_views_test()
     sp.add_compilation_target(
         "nft_editions",
         FA2_core(
             metadata=contract_metadata
         )
     )
+    # Same contract with the legacy lock, only used to compare gas with tools/bench.py
+    sp.add_compilation_target(
+        "nft_editions_locked",
+        FA2_core(
+            metadata=contract_metadata,
+            config=FA2_config(reentrancy_lock=True)
+        )
+    )
+    # Same contract with netted transfer batches, used to compare transfer gas with tools/bench.py
+    sp.add_compilation_target(
+        "nft_editions_netted",
+        FA2_core(
+            metadata=contract_metadata,
+            config=FA2_config(net_transfers=True)
+        )
+    )
+    # Same contract with burns that destroy the units, used to compare ledger growth with tools/bench.py
+    sp.add_compilation_target(
+        "nft_editions_true_burn",
+        FA2_core(
+            metadata=contract_metadata,
+            config=FA2_config(provenance_burn=False)
+        )
+    )
+    # Generative collection, tokens store a seed and params and the artwork is rendered by the token_metadata view
+    sp.add_compilation_target(
+        "nft_editions_generative",
+        FA2_core(
+            metadata=contract_metadata,
+            config=FA2_config(generative=True)
+        )
+    )
+    # Same contract with the optional indexes, used to measure their write cost with tools/bench.py
+    sp.add_compilation_target(
+        "nft_editions_indexed",
+        FA2_core(
+            metadata=contract_metadata,
+            config=FA2_config(owner_index=True, holder_index=True)
+        )
+    )
@@ -0,0 +1,733 @@
+#!/usr/bin/env python3
+# Gas and storage benchmarks for the Zero Contracts
+# Every entrypoint is called at increasing sizes on an octez-client mockup chain
+# and the consumed gas and paid storage bytes of each call are written to a JSON report
+#
+# The SmartPy test scenarios only check that calls succeed or fail, this gives the numbers behind them
+#
+# Usage
+# 1. Set ADMIN_ADDRESS in both contracts to the mockup bootstrap1 address (MOCKUP_ADMIN below)
+# 2. Compile both contracts with the legacy SmartPy CLI, for example
+#      SmartPy.sh compile ZeroContract-v1-Onchain-Tezos-Artwork.py out
+#      SmartPy.sh compile ZeroContract-v2-Onchain-Tezos-Editions.py out
+# 3. Run the benchmarks against the compiled code and initial storage
+#      python tools/bench.py \
+#          --v1 out/nft_artwork/step_000_cont_0_contract.tz out/nft_artwork/step_000_cont_0_storage.tz \
+#          --v2 out/nft_editions/step_000_cont_0_contract.tz out/nft_editions/step_000_cont_0_storage.tz \
+#          --report bench.json
+# 4. Keep the report and pass it as --baseline on the next run to catch regressions before originating a new collection
+#
+# Other builds of the same contract, for example a compilation target with different FA2_config options,
+# can be run next to the default build with --variant and are compared call by call
+#      --variant locked v2 out/nft_editions_locked/step_000_cont_0_contract.tz out/nft_editions_locked/step_000_cont_0_storage.tz
+#      --variant netted v2 out/nft_editions_netted/step_000_cont_0_contract.tz out/nft_editions_netted/step_000_cont_0_storage.tz
+#
+# The scaling group grows one collection to 10k tokens spread over 1k holders and samples the same calls and views
+# at every step, the report then flags every call whose gas or paid storage keeps growing with the collection
+#      python tools/bench.py --v2 ... --groups scaling --scaling-tokens 10000 --report scaling.json
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from mint import fit_line
+
+# Bootstrap accounts of every octez-client mockup chain
+MOCKUP_ADMIN = "tz1KqTpEZ7Yob7QbPE4Hy4Wo8fHG8LhKxZSx"  # bootstrap1
+MOCKUP_ACCOUNTS = [
+    MOCKUP_ADMIN,
+    "tz1gjaF81ZRRvdzjobyfVNsAeSC6PScjfQwN",  # bootstrap2
+    "tz1faswCTDciRzE4oJ9jn2Vm2dvjeyA9fUzU",  # bootstrap3
+    "tz1b7tUupMgCNw2cCLpKTkSD1NZzB5TkP2sv",  # bootstrap4
+    "tz1ddb9NMYHZi5UzPdzTZMYQQZoMub195zgv",  # bootstrap5
+]
+
+# Sizes used by the benchmark groups
+BATCH_SIZES = [1, 10, 100]
+PAYLOAD_SIZES = [1024, 2048, 5120, 10240, 20480, 30720]
+LEDGER_SIZES = [10, 100, 1000, 10000]
+ARTIFACT_SIZE = 200 * 1024
+ARTIFACT_CHUNK_SIZE = 24000
+
+# Long run of transfers between the bootstrap accounts, in transfer operations of up to CHURN_BATCH_SIZE txs
+CHURN_TRANSFERS = 10000
+CHURN_BATCH_SIZE = 100
+CHURN_TOKENS = 20
+
+# Collection sizes the scaling group measures at, as shares of --scaling-tokens, with one holder per SCALING_TOKENS_PER_HOLDER tokens
+# and one child, parent and collaborator per SCALING_TOKENS_PER_ADDRESS tokens
+SCALING_TOKENS = 10000
+SCALING_STEPS = [0.01, 0.1, 0.25, 0.5, 1.0]
+SCALING_TOKENS_PER_HOLDER = 10
+SCALING_TOKENS_PER_ADDRESS = 100
+# Growth between the smallest and the largest collection a per call cost may have before it is flagged
+SCALING_TOLERANCE = 0.05
+
+# Largest number of tokens minted per operation while preparing a ledger
+PRELOAD_BATCH_SIZE = 100
+
+# Receives balance_of responses, it only has to accept the FA2 callback type
+BALANCE_RECEIVER = (
+    "parameter (list (pair (pair address nat) nat)); "
+    "storage unit; "
+    "code { CDR ; NIL operation ; PAIR }"
+)
+
+# Reads get_balance for a list of (owner, token_id) through the on-chain view and stores the sum,
+# the synchronous alternative to calling balance_of with BALANCE_RECEIVER as callback
+BALANCE_VIEW_READER = (
+    "parameter (pair address (list (pair address nat))); "
+    "storage nat; "
+    "code { CAR ; UNPAIR ; SWAP ; PUSH nat 0 ; SWAP ; "
+    "ITER { DUP 3 ; SWAP ; VIEW \"get_balance\" nat ; "
+    "IF_NONE { PUSH string \"get_balance failed\" ; FAILWITH } {} ; ADD } ; "
+    "SWAP ; DROP ; NIL operation ; PAIR }"
+)
+
+# Reads is_operator for an (owner, operator, token_id) through the on-chain view and stores the answer
+OPERATOR_VIEW_READER = (
+    "parameter (pair address (pair address (pair address nat))); "
+    "storage bool; "
+    "code { CAR ; UNPAIR ; SWAP ; VIEW \"is_operator\" bool ; "
+    "IF_NONE { PUSH string \"is_operator failed\" ; FAILWITH } {} ; NIL operation ; PAIR }"
+)
+
+DATA_URI_PREFIX = b"data:image/svg+xml;utf8,"
+
+
+# Michelson literals for entrypoint arguments
+
+def m_string(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def m_bytes(value):
+    return "0x" + value.hex()
+
+def m_nat(value):
+    return str(int(value))
+
+def m_pair(*items):
+    # Right comb, the layout used by every explicit .layout(("a", ("b", "c"))) in the contracts
+    if len(items) == 2:
+        return "(Pair %s %s)" % items
+    return "(Pair %s %s)" % (items[0], m_pair(*items[1:]))
+
+def m_list(items):
+    items = list(items)
+    if not items:
+        return "{}"
+    return "{ " + " ; ".join(items) + " }"
+
+def m_token_info(token_info):
+    # Michelson maps must list their keys in increasing order
+    return m_list("Elt %s %s" % (m_string(k), m_bytes(v)) for k, v in sorted(token_info.items()))
+
+def m_left(value):
+    return "(Left %s)" % value
+
+def m_right(value):
+    return "(Right %s)" % value
+
+
+def make_token_info(name, artifact_size=0):
+    token_info = {"name": name.encode("utf-8"), "decimals": b"0"}
+    if artifact_size:
+        body = b"<svg xmlns='http://www.w3.org/2000/svg'>"
+        filler = b"<rect width='1' height='1'/>"
+        needed = max(artifact_size - len(DATA_URI_PREFIX) - len(body) - len(b"</svg>"), 0)
+        body += (filler * (needed // len(filler) + 1))[:needed] + b"</svg>"
+        token_info["artifactUri"] = DATA_URI_PREFIX + body
+    return token_info
+
+B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+TZ1_PREFIX = bytes([6, 161, 159])
+
+def b58check(payload):
+    data = payload + hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4]
+    number, encoded = int.from_bytes(data, "big"), ""
+    while number:
+        number, digit = divmod(number, 58)
+        encoded = B58_ALPHABET[digit] + encoded
+    return "1" * (len(data) - len(data.lstrip(b"\x00"))) + encoded
+
+def holder_address(index):
+    # Valid tz1 address without a key, holders only receive tokens so nobody has to sign for them
+    return b58check(TZ1_PREFIX + hashlib.sha256(b"zero-bench-holder-%d" % index).digest()[:20])
+
+
+class OctezError(RuntimeError):
+    pass
+
+
+class Mockup:
+    """octez-client in mockup mode, state persists in base_dir between calls"""
+
+    GAS_RE = re.compile(r"Consumed gas: ([0-9.]+)")
+    PAID_RE = re.compile(r"Paid storage size diff: (-?[0-9]+) bytes")
+    SIZE_RE = re.compile(r"Storage size: ([0-9]+) bytes")
+
+    def __init__(self, client="octez-client", protocol=None, base_dir=None):
+        self.client = client
+        self.base_dir = base_dir or tempfile.mkdtemp(prefix="zero-bench-")
+        create = ["create", "mockup"]
+        if protocol:
+            create += ["--protocol", protocol]
+        self.run(*create)
+
+    def run(self, *args):
+        cmd = [self.client, "--mode", "mockup", "--base-dir", self.base_dir] + list(args)
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise OctezError("%s\n%s" % (" ".join(args[:6]), proc.stderr.strip() or proc.stdout.strip()))
+        return proc.stdout
+
+    def originate(self, alias, code, storage):
+        self.run(
+            "originate", "contract", alias, "transferring", "0", "from", "bootstrap1",
+            "running", code, "--init", storage, "--burn-cap", "100", "--force",
+        )
+        return self.run("show", "known", "contract", alias).strip()
+
+    def call(self, alias, entrypoint, arg, sender="bootstrap1"):
+        receipt = self.run(
+            "transfer", "0", "from", sender, "to", alias,
+            "--entrypoint", entrypoint, "--arg", arg, "--burn-cap", "100",
+        )
+        return self.parse_receipt(receipt)
+
+    def parse_receipt(self, receipt):
+        # The first figures belong to the called contract, the rest to internal operations it emitted
+        gas = [float(g) for g in self.GAS_RE.findall(receipt)]
+        paid = [int(p) for p in self.PAID_RE.findall(receipt)]
+        size = [int(s) for s in self.SIZE_RE.findall(receipt)]
+        return {
+            "consumed_gas": gas[0] if gas else None,
+            "total_gas": sum(gas) if gas else None,
+            "paid_storage_bytes": paid[0] if paid else 0,
+            "storage_size": size[0] if size else None,
+        }
+
+    def cleanup(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+
+class Collection:
+    """One originated contract plus the argument encoding of its entrypoints"""
+
+    contract = None
+
+    def __init__(self, mockup, alias, code, storage, receiver, variant="default"):
+        self.mockup = mockup
+        self.alias = alias
+        self.variant = variant
+        self.address = mockup.originate(alias, code, storage)
+        self.receiver = receiver
+        self.next_token_id = 0
+        self.rows = []
+        # Used by the scaling group, a (holder, token_id) with a balance and the sizes of the address sets
+        self.holding = None
+        self.set_sizes = {}
+
+    def measure(self, group, entrypoint, arg, sender="bootstrap1", target=None, **dims):
+        # target calls another contract, for example a reader of this one, and records the row under entrypoint
+        result = self.mockup.call(target or self.alias, "default" if target else entrypoint, arg, sender)
+        row = {"contract": self.contract, "variant": self.variant, "group": group, "entrypoint": entrypoint}
+        row.update(dims)
+        row.update(result)
+        self.rows.append(row)
+        return row
+
+    def call(self, entrypoint, arg, sender="bootstrap1"):
+        return self.mockup.call(self.alias, entrypoint, arg, sender)
+
+    def preload(self, count, to_=MOCKUP_ADMIN):
+        # Mint count small tokens to to_ with as few operations as possible
+        while count > 0:
+            size = min(count, PRELOAD_BATCH_SIZE)
+            first = self.next_token_id
+            self.call("mint_batch", self.mint_batch_arg(
+                [(to_, make_token_info("Bench #%d" % (first + i))) for i in range(size)]
+            ))
+            count -= size
+
+    def transfer_arg(self, from_, txs):
+        return m_list([m_pair(m_string(from_), m_list(
+            m_pair(m_string(to_), m_nat(token_id), m_nat(amount)) for to_, token_id, amount in txs
+        ))])
+
+    def balance_of_arg(self, requests):
+        return m_pair(
+            m_list(m_pair(m_string(owner), m_nat(token_id)) for owner, token_id in requests),
+            m_string(self.receiver),
+        )
+
+    def update_operators_arg(self, updates):
+        items = []
+        for action, owner, operator, token_id in updates:
+            param = m_pair(m_string(owner), m_string(operator), m_nat(token_id))
+            items.append(m_left(param) if action == "add_operator" else m_right(param))
+        return m_list(items)
+
+    def append_artifact_chunk_arg(self, token_id, offset, chunk):
+        return m_pair(m_nat(token_id), m_nat(offset), m_bytes(chunk))
+
+    def is_operator_arg(self, owner, operator, token_id):
+        return m_pair(m_string(owner), m_string(operator), m_nat(token_id))
+
+
+class V1Collection(Collection):
+    # Fa2NftMint, one token per id and the ledger maps token_id -> owner
+    contract = "v1"
+    edition = 1
+    # Admin entrypoints adding an address to one of the paged address sets
+    address_sets = ("add_child", "add_parent")
+
+    def mint_arg(self, to_, token_info):
+        self.next_token_id += 1
+        return m_pair(m_string(to_), m_token_info(token_info))
+
+    def mint_batch_arg(self, items):
+        self.next_token_id += len(items)
+        return m_list(m_pair(m_string(to_), m_token_info(info)) for to_, info in items)
+
+    def begin_artifact_arg(self, to_, token_info):
+        return self.mint_arg(to_, token_info)
+
+    def burn_arg(self, token_id, amount=1):
+        # Single field record compiles to its only field
+        return m_nat(token_id)
+
+
+class V2Collection(Collection):
+    # FA2_core, editions keyed by (owner, token_id) in the ledger
+    contract = "v2"
+    edition = 10
+    address_sets = ("add_child", "add_parent", "add_collaborator")
+
+    def mint_arg(self, to_, token_info, amount=None):
+        self.next_token_id += 1
+        return m_pair(m_string(to_), m_nat(amount or self.edition), m_token_info(token_info))
+
+    def mint_batch_arg(self, items):
+        self.next_token_id += len(items)
+        return m_list(
+            m_pair(m_string(to_), m_nat(self.edition), m_token_info(info)) for to_, info in items
+        )
+
+    def begin_artifact_arg(self, to_, token_info):
+        return self.mint_arg(to_, token_info)
+
+    def burn_arg(self, token_id, amount=1):
+        # burn has no explicit layout, the default layout orders the fields by name
+        return m_pair(m_nat(amount), m_nat(token_id))
+
+
+# Benchmark groups, each one originates its own contract
+
+def bench_payloads(collection):
+    # mint with artifacts of 1 KB to 30 KB
+    for size in PAYLOAD_SIZES:
+        info = make_token_info("Payload %d" % size, size)
+        collection.measure("payloads", "mint", collection.mint_arg(MOCKUP_ADMIN, info), payload_bytes=size)
+
+def bench_batches(collection):
+    # Batch lengths 1/10/100 for every list based entrypoint
+    largest = max(BATCH_SIZES)
+    for size in BATCH_SIZES:
+        first = collection.next_token_id
+        items = [(MOCKUP_ADMIN, make_token_info("Batch #%d" % (first + i))) for i in range(size)]
+        collection.measure("batches", "mint_batch", collection.mint_batch_arg(items), batch=size)
+    # Tokens used by the transfer, balance_of and update_operators batches
+    first = collection.next_token_id
+    collection.preload(largest)
+    receiver = MOCKUP_ACCOUNTS[1]
+    operator = MOCKUP_ACCOUNTS[2]
+    for size in BATCH_SIZES:
+        ids = list(range(first, first + size))
+        collection.measure("batches", "update_operators", collection.update_operators_arg(
+            [("add_operator", MOCKUP_ADMIN, operator, token_id) for token_id in ids]
+        ), batch=size)
+        collection.measure("batches", "balance_of", collection.balance_of_arg(
+            [(MOCKUP_ADMIN, token_id) for token_id in ids]
+        ), batch=size)
+        collection.measure("batches", "transfer", collection.transfer_arg(
+            MOCKUP_ADMIN, [(receiver, token_id, 1) for token_id in ids]
+        ), batch=size)
+        # Send them back so the next size starts from the same ledger
+        collection.call("transfer", collection.transfer_arg(
+            receiver, [(MOCKUP_ADMIN, token_id, 1) for token_id in ids]
+        ), sender="bootstrap2")
+        collection.call("update_operators", collection.update_operators_arg(
+            [("remove_operator", MOCKUP_ADMIN, operator, token_id) for token_id in ids]
+        ))
+
+def bench_ledger(collection, max_ledger=max(LEDGER_SIZES)):
+    # Single calls on a ledger that grows from 10 to 10k entries
+    receiver = MOCKUP_ACCOUNTS[1]
+    operator = MOCKUP_ACCOUNTS[2]
+    for size in [s for s in LEDGER_SIZES if s <= max_ledger]:
+        collection.preload(size - collection.next_token_id)
+        token_id = collection.next_token_id - 1
+        info = make_token_info("Ledger %d" % size, 1024)
+        collection.measure("ledger", "mint", collection.mint_arg(MOCKUP_ADMIN, info), ledger_entries=size)
+        collection.measure("ledger", "update_operators", collection.update_operators_arg(
+            [("add_operator", MOCKUP_ADMIN, operator, token_id)]
+        ), ledger_entries=size)
+        collection.measure("ledger", "balance_of", collection.balance_of_arg(
+            [(MOCKUP_ADMIN, token_id)]
+        ), ledger_entries=size)
+        collection.measure("ledger", "transfer", collection.transfer_arg(
+            MOCKUP_ADMIN, [(receiver, token_id, 1)]
+        ), ledger_entries=size)
+        burned = collection.next_token_id - 1
+        collection.measure("ledger", "burn", collection.burn_arg(burned), ledger_entries=size)
+
+def bench_artifact(collection):
+    # Chunked upload of a 200 KB artifact, one row per chunk
+    info = make_token_info("Artifact", ARTIFACT_SIZE)
+    artifact = info.pop("artifactUri")
+    token_id = collection.next_token_id
+    info["artifactUri"] = DATA_URI_PREFIX
+    collection.measure("artifact", "begin_artifact", collection.begin_artifact_arg(MOCKUP_ADMIN, info))
+    offset = len(DATA_URI_PREFIX)
+    rest = artifact[offset:]
+    for index in range(0, len(rest), ARTIFACT_CHUNK_SIZE):
+        chunk = rest[index:index + ARTIFACT_CHUNK_SIZE]
+        collection.measure("artifact", "append_artifact_chunk",
+            collection.append_artifact_chunk_arg(token_id, offset, chunk),
+            chunk=index // ARTIFACT_CHUNK_SIZE, payload_bytes=offset + len(chunk))
+        offset += len(chunk)
+    collection.measure("artifact", "finalize_artifact", m_nat(token_id), payload_bytes=offset)
+
+def bench_sweeps(collection):
+    # Transfers whose txs all move one unit of the same edition to the same collector, so every tx
+    # touches the same two ledger entries, compare a netted build with --variant
+    if collection.edition == 1:
+        return
+    largest = max(BATCH_SIZES)
+    receiver = MOCKUP_ACCOUNTS[1]
+    token_id = collection.next_token_id
+    collection.call("mint", collection.mint_arg(MOCKUP_ADMIN, make_token_info("Sweep"), 2 * largest))
+    for size in BATCH_SIZES:
+        collection.measure("sweeps", "transfer", collection.transfer_arg(
+            MOCKUP_ADMIN, [(receiver, token_id, 1)] * size
+        ), batch=size)
+
+def bench_churn(collection, transfers=CHURN_TRANSFERS):
+    # Editions moved at random between the bootstrap accounts, then every holder burns what it has
+    # The storage_size column shows how the contract grows over the run, compare the default build with
+    # a build that burns without the burn address using --variant
+    rng = random.Random(0)
+    first = collection.next_token_id
+    collection.call("mint_batch", collection.mint_batch_arg(
+        [(MOCKUP_ADMIN, make_token_info("Churn #%d" % i)) for i in range(CHURN_TOKENS)]
+    ))
+    tokens = range(first, first + CHURN_TOKENS)
+    # Local copy of the ledger so every generated tx is valid
+    holdings = {(MOCKUP_ADMIN, token_id): collection.edition for token_id in tokens}
+    done = 0
+    step = 0
+    while done < transfers:
+        sender = rng.randrange(len(MOCKUP_ACCOUNTS))
+        owner = MOCKUP_ACCOUNTS[sender]
+        txs = []
+        while len(txs) < min(CHURN_BATCH_SIZE, transfers - done):
+            owned = [token_id for token_id in tokens if holdings.get((owner, token_id), 0) > 0]
+            if not owned:
+                break
+            token_id = rng.choice(owned)
+            to_ = rng.choice(MOCKUP_ACCOUNTS)
+            holdings[(owner, token_id)] -= 1
+            holdings[(to_, token_id)] = holdings.get((to_, token_id), 0) + 1
+            txs.append((to_, token_id, 1))
+        if not txs:
+            continue
+        collection.measure("churn", "transfer", collection.transfer_arg(owner, txs),
+            sender="bootstrap%d" % (sender + 1), batch=len(txs), step=step)
+        done += len(txs)
+        step += 1
+    for (owner, token_id), amount in sorted(holdings.items()):
+        if amount > 0:
+            collection.measure("churn", "burn", collection.burn_arg(token_id, amount),
+                sender="bootstrap%d" % (MOCKUP_ACCOUNTS.index(owner) + 1), step=step)
+            step += 1
+
+def bench_views(collection):
+    # Reading balances from another contract, balance_of with a callback against the get_balance on-chain view
+    # Compare total_gas, it includes the callback contract and the internal operation
+    reader = collection.mockup.originate(collection.alias + "_reader", BALANCE_VIEW_READER, "0")
+    first = collection.next_token_id
+    collection.preload(max(BATCH_SIZES))
+    for size in BATCH_SIZES:
+        requests = [(MOCKUP_ADMIN, token_id) for token_id in range(first, first + size)]
+        collection.measure("views", "balance_of", collection.balance_of_arg(requests), batch=size)
+        collection.measure("views", "get_balance view", m_pair(
+            m_string(collection.address),
+            m_list(m_pair(m_string(owner), m_nat(token_id)) for owner, token_id in requests),
+        ), target=reader, batch=size)
+
+def grow_collection(collection, tokens, holders, addresses):
+    # Mint up to tokens, send one unit of every SCALING_TOKENS_PER_HOLDER-th new token to a holder, one token per holder,
+    # add an operator for every token the admin keeps
+    # and add addresses to the child, parent and collaborator sets until each has addresses entries
+    first = collection.next_token_id
+    collection.preload(tokens - first)
+    operator = MOCKUP_ACCOUNTS[2]
+    ids = range(first, collection.next_token_id)
+    sent = [token_id for token_id in ids if token_id % SCALING_TOKENS_PER_HOLDER == 0]
+    txs = [(holder_address((token_id // SCALING_TOKENS_PER_HOLDER) % holders), token_id, 1) for token_id in sent]
+    updates = [("add_operator", MOCKUP_ADMIN, operator, token_id)
+               for token_id in ids if token_id % SCALING_TOKENS_PER_HOLDER != 0]
+    for start in range(0, len(txs), CHURN_BATCH_SIZE):
+        collection.call("transfer", collection.transfer_arg(MOCKUP_ADMIN, txs[start:start + CHURN_BATCH_SIZE]))
+    if txs:
+        collection.holding = txs[-1][:2]
+    for start in range(0, len(updates), CHURN_BATCH_SIZE):
+        collection.call("update_operators", collection.update_operators_arg(updates[start:start + CHURN_BATCH_SIZE]))
+    for entrypoint in collection.address_sets:
+        for index in range(collection.set_sizes.get(entrypoint, 0), addresses):
+            collection.call(entrypoint, m_string(holder_address(index)))
+        collection.set_sizes[entrypoint] = max(collection.set_sizes.get(entrypoint, 0), addresses)
+
+def bench_scaling(collection, max_tokens=SCALING_TOKENS):
+    # The same single calls and view reads at every step of a growing collection, one curve per entrypoint
+    # A call that only touches the entries it reads or writes costs the same at every step
+    balance_reader = collection.mockup.originate(collection.alias + "_balance_reader", BALANCE_VIEW_READER, "0")
+    operator_reader = collection.mockup.originate(collection.alias + "_operator_reader", OPERATOR_VIEW_READER, "False")
+    operator = MOCKUP_ACCOUNTS[2]
+    for step, share in enumerate(SCALING_STEPS):
+        tokens = max(int(max_tokens * share), 2)
+        holders = max(tokens // SCALING_TOKENS_PER_HOLDER, 1)
+        addresses = tokens // SCALING_TOKENS_PER_ADDRESS
+        grow_collection(collection, tokens, holders, addresses)
+        dims = {"step": step, "tokens": tokens, "holders": holders}
+        # The probed token is minted at this step and held by the admin, it moves to a new holder last
+        info = make_token_info("Scaling %d" % step)
+        collection.measure("scaling", "mint", collection.mint_arg(MOCKUP_ADMIN, info), **dims)
+        token_id = collection.next_token_id - 1
+        holder, held = collection.holding
+        collection.measure("scaling", "update_operators", collection.update_operators_arg(
+            [("add_operator", MOCKUP_ADMIN, operator, token_id)]
+        ), **dims)
+        collection.measure("scaling", "balance_of", collection.balance_of_arg(
+            [(MOCKUP_ADMIN, token_id), (holder, held)]
+        ), **dims)
+        collection.measure("scaling", "get_balance view", m_pair(
+            m_string(collection.address), m_list([m_pair(m_string(holder), m_nat(held))])
+        ), target=balance_reader, **dims)
+        collection.measure("scaling", "is_operator view", m_pair(
+            m_string(collection.address), collection.is_operator_arg(MOCKUP_ADMIN, operator, token_id)
+        ), target=operator_reader, **dims)
+        for entrypoint in collection.address_sets:
+            collection.measure("scaling", entrypoint, m_string(holder_address(max_tokens + step)), **dims)
+        collection.measure("scaling", "transfer", collection.transfer_arg(
+            MOCKUP_ADMIN, [(holder_address(max_tokens + step), token_id, 1)]
+        ), **dims)
+
+COLLECTIONS = {"v1": V1Collection, "v2": V2Collection}
+
+GROUPS = {
+    "payloads": bench_payloads,
+    "batches": bench_batches,
+    "ledger": bench_ledger,
+    "artifact": bench_artifact,
+    "sweeps": bench_sweeps,
+    "churn": bench_churn,
+    "views": bench_views,
+    "scaling": bench_scaling,
+}
+
+
+# Report handling
+
+ROW_KEYS = ("contract", "variant", "group", "entrypoint", "batch", "payload_bytes", "ledger_entries", "chunk", "step",
+            "tokens", "holders")
+# Costs of a single call that should not depend on the size of the collection
+SCALING_METRICS = ("consumed_gas", "total_gas", "paid_storage_bytes")
+
+def row_key(row):
+    return tuple(row.get(k) for k in ROW_KEYS)
+
+def compare(rows, baseline_rows, tolerance):
+    # Any call that costs more gas or paid storage than the baseline by more than tolerance is a regression
+    baseline = {row_key(row): row for row in baseline_rows}
+    regressions = []
+    for row in rows:
+        old = baseline.get(row_key(row))
+        if old is None:
+            continue
+        for metric in ("consumed_gas", "paid_storage_bytes"):
+            before, after = old.get(metric), row.get(metric)
+            if before is None or after is None:
+                continue
+            if after > before * (1 + tolerance) and after - before > 1:
+                regressions.append((row, metric, before, after))
+    return regressions
+
+def compare_variants(rows):
+    # Each variant call next to the same call on the default build of its contract
+    default = {row_key(dict(row, variant="default")): row for row in rows if row["variant"] == "default"}
+    deltas = []
+    for row in rows:
+        base = default.get(row_key(dict(row, variant="default")))
+        if row["variant"] == "default" or base is None:
+            continue
+        delta = {k: row.get(k) for k in ROW_KEYS}
+        for metric in ("consumed_gas", "paid_storage_bytes"):
+            if row.get(metric) is not None and base.get(metric) is not None:
+                delta[metric] = {"default": base[metric], "variant": row[metric], "delta": round(row[metric] - base[metric], 3)}
+        deltas.append(delta)
+    return deltas
+
+def scaling_curves(rows, tolerance):
+    # One curve per call and metric over the steps of the scaling group, flagged when the cost at the largest
+    # collection is above the cost at the smallest by more than tolerance
+    # exponent is the slope of log(cost) against log(tokens), 0 for a constant cost and 1 for a cost linear in the tokens
+    calls = {}
+    for row in rows:
+        if row["group"] == "scaling":
+            calls.setdefault((row["contract"], row["variant"], row["entrypoint"]), []).append(row)
+    curves = []
+    for (contract, variant, entrypoint), call_rows in sorted(calls.items()):
+        for metric in SCALING_METRICS:
+            points = [(row["tokens"], row[metric]) for row in call_rows if row.get(metric) is not None]
+            if len(points) < 2:
+                continue
+            # total_gas only differs from consumed_gas for the view readers and calls with internal operations
+            if metric == "total_gas" and all(row.get("total_gas") == row.get("consumed_gas") for row in call_rows):
+                continue
+            first, last = points[0][1], points[-1][1]
+            exponent = None
+            if all(cost > 0 for _, cost in points):
+                exponent = round(fit_line([(math.log(tokens), math.log(cost)) for tokens, cost in points])[1], 3)
+            curves.append({
+                "contract": contract, "variant": variant, "entrypoint": entrypoint, "metric": metric,
+                "points": points, "exponent": exponent,
+                "flagged": last - first > max(abs(first) * tolerance, 1),
+            })
+        # Size of the whole contract per token, only flagged when it grows faster than the collection
+        sizes = [(row["tokens"], row["storage_size"]) for row in call_rows if row.get("storage_size")]
+        if entrypoint == "mint" and len(sizes) >= 2:
+            per_token = [(tokens, round(size / tokens, 1)) for tokens, size in sizes]
+            curves.append({
+                "contract": contract, "variant": variant, "entrypoint": entrypoint, "metric": "storage_size_per_token",
+                "points": per_token, "exponent": None,
+                "flagged": per_token[-1][1] - per_token[0][1] > max(per_token[0][1] * tolerance, 1),
+            })
+    return curves
+
+def format_curve(curve):
+    return "%s %-8s %-22s %-22s exponent=%-7s %s" % (
+        curve["contract"], curve["variant"], curve["entrypoint"], curve["metric"], curve["exponent"],
+        " ".join("%s:%s" % point for point in curve["points"]))
+
+def format_row(row):
+    dims = ", ".join("%s=%s" % (k, row[k]) for k in ROW_KEYS[4:] if row.get(k) is not None)
+    return "%s %-8s %-8s %-22s %-28s gas=%-10s total_gas=%-10s paid=%s" % (
+        row["contract"], row["variant"], row["group"], row["entrypoint"], dims,
+        row["consumed_gas"], row["total_gas"], row["paid_storage_bytes"])
+
+def run(args):
+    mockup = Mockup(args.octez_client, args.protocol)
+    rows = []
+    try:
+        receiver = mockup.originate("balance_receiver", BALANCE_RECEIVER, "Unit")
+        contracts = []
+        if args.v1:
+            contracts.append((V1Collection, "default", args.v1))
+        if args.v2:
+            contracts.append((V2Collection, "default", args.v2))
+        for label, kind, code_path, storage_path in args.variant:
+            contracts.append((COLLECTIONS[kind], label, (code_path, storage_path)))
+        for cls, variant, (code_path, storage_path) in contracts:
+            with open(storage_path) as f:
+                storage = f.read().strip()
+            for group in args.groups:
+                alias = "%s_%s_%s" % (cls.contract, variant, group)
+                collection = cls(mockup, alias, code_path, storage, receiver, variant)
+                if group == "ledger":
+                    bench_ledger(collection, args.max_ledger)
+                elif group == "churn":
+                    bench_churn(collection, args.churn_transfers)
+                elif group == "scaling":
+                    bench_scaling(collection, args.scaling_tokens)
+                else:
+                    GROUPS[group](collection)
+                for row in collection.rows:
+                    print(format_row(row))
+                rows += collection.rows
+    finally:
+        if not args.keep_mockup:
+            mockup.cleanup()
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gas and storage benchmarks for the Zero Contracts")
+    parser.add_argument("--v1", nargs=2, metavar=("CODE", "STORAGE"), help="compiled Fa2NftMint contract and initial storage")
+    parser.add_argument("--v2", nargs=2, metavar=("CODE", "STORAGE"), help="compiled FA2_core contract and initial storage")
+    parser.add_argument("--variant", nargs=4, action="append", default=[], metavar=("LABEL", "CONTRACT", "CODE", "STORAGE"),
+                        help="another build of the v1 or v2 contract to compare with the default build, can be repeated")
+    parser.add_argument("--groups", default=",".join(GROUPS), help="comma separated groups to run (default: all)")
+    parser.add_argument("--max-ledger", type=int, default=max(LEDGER_SIZES), help="largest ledger size to grow to")
+    parser.add_argument("--churn-transfers", type=int, default=CHURN_TRANSFERS, help="number of transfers in the churn run")
+    parser.add_argument("--scaling-tokens", type=int, default=SCALING_TOKENS, help="number of tokens the scaling group grows to")
+    parser.add_argument("--scaling-tolerance", type=float, default=SCALING_TOLERANCE,
+                        help="allowed growth of a per call cost over the scaling steps (default: 5%%)")
+    parser.add_argument("--report", default="bench.json", help="JSON report to write")
+    parser.add_argument("--baseline", help="previous JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="allowed increase over the baseline (default: 2%%)")
+    parser.add_argument("--octez-client", default="octez-client")
+    parser.add_argument("--protocol", help="mockup protocol hash (default: the client's latest)")
+    parser.add_argument("--keep-mockup", action="store_true", help="keep the mockup base dir for inspection")
+    args = parser.parse_args(argv)
+    args.groups = [g for g in args.groups.split(",") if g]
+    unknown = [g for g in args.groups if g not in GROUPS]
+    if unknown:
+        parser.error("unknown groups: %s" % ", ".join(unknown))
+    if not (args.v1 or args.v2):
+        parser.error("pass --v1 and/or --v2")
+    for label, kind, _, _ in args.variant:
+        if kind not in COLLECTIONS or label == "default":
+            parser.error("--variant needs a label other than default and a contract of v1 or v2")
+
+    rows = run(args)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "protocol": args.protocol,
+        "contracts": {name: os.path.basename(paths[0]) for name, paths in (("v1", args.v1), ("v2", args.v2)) if paths},
+        "results": rows,
+        "variants": compare_variants(rows),
+        "scaling": scaling_curves(rows, args.scaling_tolerance),
+    }
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=1)
+    for delta in report["variants"]:
+        print("VARIANT %s %s %s %s: gas %s, paid storage %s" % (
+            delta["contract"], delta["variant"], delta["group"], delta["entrypoint"],
+            delta.get("consumed_gas", {}).get("delta"), delta.get("paid_storage_bytes", {}).get("delta")))
+    flagged = [curve for curve in report["scaling"] if curve["flagged"]]
+    for curve in report["scaling"]:
+        print("%s %s" % ("GROWTH " if curve["flagged"] else "SCALING", format_curve(curve)))
+    print("Wrote %d results to %s" % (len(rows), args.report))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(rows, baseline, args.tolerance)
+        for row, metric, before, after in regressions:
+            print("REGRESSION %s: %s %s -> %s" % (format_row(row), metric, before, after))
+        if regressions:
+            return 1
+    return 1 if flagged else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# Random operation streams for the contract models of tools/model.py
+#
+# simulate replays a long stream through a model only, a secondary market of 100k transfers between 10k holders
+# takes seconds, and prints how the ledger grows along the way
+#      python tools/differential.py simulate --contract v2 --transfers 100000 --holders 10000
+#
+# scenario replays a short stream through a model and writes the same stream as a SmartPy test scenario
+# Every operation is run with the outcome the model had, valid or failing with the same error, and the scenario
+# ends by checking every storage entry the stream touched against the final storage of the model
+#      python tools/differential.py scenario --contract v2 --operations 300 --seed 7 --out differential_v2.py
+#      SmartPy.sh test differential_v2.py out
+# Run it from the repository root, the scenario imports the contract file from there
+
+import argparse
+import random
+import sys
+import time
+
+from metadata_builder import sp_bytes
+from model import BURN_ADDRESS, MODELS, ModelError
+
+ADMIN = "admin"
+CONTRACT_FILES = {
+    "v1": "ZeroContract-v1-Onchain-Tezos-Artwork.py",
+    "v2": "ZeroContract-v2-Onchain-Tezos-Editions.py",
+}
+
+# Share of the operations of each kind, transfers make up the rest
+MINT_SHARE = 0.08
+OPERATOR_SHARE = 0.08
+OPERATOR_FOR_ALL_SHARE = 0.02
+BURN_SHARE = 0.03
+# Share of the operations that are made invalid on purpose
+INVALID_SHARE = 0.05
+
+EDITION = 10
+MAX_BATCH = 5
+
+
+class Stream:
+    """Random operations that are valid against the current state of a model unless made invalid on purpose"""
+
+    def __init__(self, model, rng, holders, operators, invalid_share=INVALID_SHARE):
+        self.model = model
+        self.rng = rng
+        self.holders = ["holder%d" % i for i in range(holders)]
+        self.operators = ["operator%d" % i for i in range(operators)]
+        self.invalid_share = invalid_share
+        self.editions = model.__class__.__name__ == "EditionsModel"
+        # (owner, token_id) pairs that held a balance when they were added, stale pairs are dropped when drawn
+        self.holdings = []
+
+    def invalid(self):
+        return self.rng.random() < self.invalid_share
+
+    def token_id(self):
+        # An id one past the last token is undefined
+        return self.rng.randrange(self.model.next_token_id[0] + 1)
+
+    def balance(self, owner, token_id):
+        try:
+            return self.model.get_balance(owner, token_id)
+        except ModelError:
+            return 0
+
+    def holding(self):
+        while self.holdings:
+            index = self.rng.randrange(len(self.holdings))
+            owner, token_id = self.holdings[index]
+            balance = self.balance(owner, token_id)
+            if balance:
+                return owner, token_id, balance
+            self.holdings[index] = self.holdings[-1]
+            self.holdings.pop()
+        return None
+
+    def metadata(self, token_id):
+        return {"name": ("Token %d" % token_id).encode("utf-8")}
+
+    def next(self):
+        draw = self.rng.random()
+        if draw < MINT_SHARE:
+            return self.mint()
+        # Every tracked holding can be stale once tokens were moved or burnt, mint again then
+        holding = self.holding()
+        if holding is None:
+            return self.mint()
+        draw -= MINT_SHARE
+        if draw < OPERATOR_SHARE:
+            return self.update_operators(holding)
+        draw -= OPERATOR_SHARE
+        if draw < OPERATOR_FOR_ALL_SHARE:
+            return self.update_operators_for_all(holding)
+        draw -= OPERATOR_FOR_ALL_SHARE
+        if draw < BURN_SHARE:
+            return self.burn(holding)
+        return self.transfer(holding)
+
+    def mint(self):
+        sender = self.rng.choice(self.holders) if self.invalid() else ADMIN
+        items = []
+        for _ in range(self.rng.randint(1, MAX_BATCH)):
+            to_ = self.rng.choice(self.holders)
+            token_id = self.model.next_token_id[0] + len(items)
+            metadata = self.metadata(token_id)
+            items.append((to_, EDITION, metadata) if self.editions else (to_, metadata))
+            self.holdings.append((to_, token_id))
+        if len(items) == 1:
+            return ("mint", sender) + items[0]
+        return ("mint_batch", sender, items)
+
+    def transfer(self, holding):
+        owner, token_id, balance = holding
+        to_ = self.rng.choice(self.holders)
+        amount = self.rng.randint(1, balance)
+        sender = owner
+        if self.rng.random() < 0.2 and self.operators:
+            sender = self.rng.choice(self.operators)
+        if self.invalid():
+            kind = self.rng.randrange(3)
+            if kind == 0:
+                amount = balance + 1
+            elif kind == 1:
+                sender = self.rng.choice(self.holders)
+            else:
+                token_id = self.model.next_token_id[0]
+        self.holdings.append((to_, token_id))
+        return ("transfer", sender, [(owner, [(to_, token_id, amount)])])
+
+    def update_operators(self, holding):
+        owner, token_id, _ = holding
+        sender = self.rng.choice(self.holders) if self.invalid() else owner
+        action = "add_operator" if self.rng.random() < 0.7 else "remove_operator"
+        return ("update_operators", sender, [(action, owner, self.rng.choice(self.operators), token_id)])
+
+    def update_operators_for_all(self, holding):
+        owner, _, _ = holding
+        action = "add_operator_for_all" if self.rng.random() < 0.6 else "remove_operator_for_all"
+        return ("update_operators_for_all", owner, [(action, self.rng.choice(self.operators))])
+
+    def burn(self, holding):
+        owner, token_id, balance = holding
+        if self.editions:
+            amount = balance + 1 if self.invalid() else self.rng.randint(1, balance)
+            return ("burn", owner, token_id, amount)
+        sender = self.rng.choice(self.holders) if self.invalid() else owner
+        return ("burn", sender, token_id)
+
+
+def apply(model, op):
+    # Outcome of one operation, None when it succeeded or the ModelError it failed with
+    entrypoint, sender = op[0], op[1]
+    try:
+        getattr(model, entrypoint)(sender, *op[2:])
+    except ModelError as error:
+        return error
+    return None
+
+
+# SmartPy scenario
+
+def address_expr(name):
+    if name == ADMIN:
+        return "admin"
+    if name == BURN_ADDRESS:
+        return 'sp.address("%s")' % BURN_ADDRESS
+    if name.startswith("holder"):
+        return "holders[%s]" % name[len("holder"):]
+    return "operators[%s]" % name[len("operator"):]
+
+def metadata_expr(metadata):
+    return "{%s}" % ", ".join('"%s": %s' % (key, sp_bytes(value)) for key, value in sorted(metadata.items()))
+
+def call_expr(contract, op):
+    entrypoint = op[0]
+    if entrypoint == "mint":
+        if contract == "v1":
+            return "mint(sp.record(to_=%s, metadata=%s))" % (address_expr(op[2]), metadata_expr(op[3]))
+        return "mint(to_=%s, amount=%d, metadata=%s)" % (address_expr(op[2]), op[3], metadata_expr(op[4]))
+    if entrypoint == "mint_batch":
+        if contract == "v1":
+            items = ["sp.record(to_=%s, metadata=%s)" % (address_expr(to_), metadata_expr(md)) for to_, md in op[2]]
+        else:
+            items = ["sp.record(to_=%s, amount=%d, metadata=%s)" % (address_expr(to_), amount, metadata_expr(md))
+                     for to_, amount, md in op[2]]
+        return "mint_batch([%s])" % ", ".join(items)
+    if entrypoint == "transfer":
+        return "transfer([%s])" % ", ".join(
+            "sp.record(from_=%s, txs=[%s])" % (address_expr(from_), ", ".join(
+                "sp.record(to_=%s, token_id=%d, amount=%d)" % (address_expr(to_), token_id, amount)
+                for to_, token_id, amount in txs))
+            for from_, txs in op[2])
+    if entrypoint == "update_operators":
+        return "update_operators([%s])" % ", ".join(
+            'sp.variant("%s", sp.record(owner=%s, operator=%s, token_id=%d))' % (
+                action, address_expr(owner), address_expr(operator), token_id)
+            for action, owner, operator, token_id in op[2])
+    if entrypoint == "update_operators_for_all":
+        return "update_operators_for_all([%s])" % ", ".join(
+            'sp.variant("%s", %s)' % (action, address_expr(operator)) for action, operator in op[2])
+    if entrypoint == "burn":
+        if contract == "v1":
+            return "burn(sp.record(token_id=%d))" % op[2]
+        return "burn(sp.record(token_id=%d, amount=%d))" % (op[2], op[3])
+    raise ValueError("no scenario call for %s" % entrypoint)
+
+def run_expr(op, outcome):
+    sender = address_expr(op[1])
+    if outcome is None:
+        return ".run(sender=%s)" % sender
+    if outcome.message is None:
+        # A missing big_map key, the error value depends on the compiler
+        return ".run(sender=%s, valid=False)" % sender
+    return '.run(sender=%s, valid=False, exception="%s")' % (sender, outcome.message)
+
+def touched_keys(contract, ops):
+    # Ledger and operator keys the stream wrote or tried to write
+    ledger, operators, all_operators = set(), set(), set()
+    for op in ops:
+        entrypoint = op[0]
+        if entrypoint == "transfer":
+            for from_, txs in op[2]:
+                for to_, token_id, _ in txs:
+                    ledger.update([(from_, token_id), (to_, token_id)])
+        elif entrypoint == "update_operators":
+            operators.update((owner, operator, token_id) for _, owner, operator, token_id in op[2])
+        elif entrypoint == "update_operators_for_all":
+            all_operators.update((op[1], operator) for _, operator in op[2])
+        elif entrypoint == "burn" and contract == "v2":
+            ledger.update([(op[1], op[2]), (BURN_ADDRESS, op[2])])
+    return ledger, operators, all_operators
+
+def write_scenario(out, contract, ops, outcomes, model, name):
+    storage = model.storage()
+    module = "Artwork" if contract == "v1" else "Editions"
+    holders = 1 + max([int(n[len("holder"):]) for n in model.addresses.names if n.startswith("holder")] or [0])
+    operators = 1 + max([int(n[len("operator"):]) for n in model.addresses.names if n.startswith("operator")] or [0])
+    lines = [
+        "# Generated by tools/differential.py, the expected outcomes and storage come from tools/model.py",
+        "import smartpy as sp",
+        "",
+        '%s = sp.io.import_script_from_url("file:%s")' % (module, CONTRACT_FILES[contract]),
+        "",
+        '@sp.add_test(name="%s")' % name,
+        "def test():",
+        "    scenario = sp.test_scenario()",
+        "    admin = %s.ADMIN_ADDRESS" % module,
+        '    holders = [sp.test_account("Holder %%d" %% i).address for i in range(%d)]' % holders,
+        '    operators = [sp.test_account("Operator %%d" %% i).address for i in range(%d)]' % operators,
+    ]
+    if contract == "v1":
+        lines.append("    c1 = %s.Fa2NftMint(metadata_base=%s.contract_metadata, ADMIN_ADDRESS=admin)" % (module, module))
+    else:
+        lines.append("    c1 = %s.FA2_core(metadata=%s.contract_metadata)" % (module, module))
+    lines.append("    scenario += c1")
+    lines.append("")
+    for op, outcome in zip(ops, outcomes):
+        lines.append("    c1.%s%s" % (call_expr(contract, op), run_expr(op, outcome)))
+
+    lines.append("")
+    lines.append("    # Final storage of the model")
+    lines.append("    scenario.verify(c1.data.next_token_id == %d)" % storage["next_token_id"])
+    lines.append("    scenario.verify(c1.data.all_tokens == %d)" % storage["all_tokens"])
+    ledger, operators_touched, all_operators_touched = touched_keys(contract, ops)
+    if contract == "v1":
+        for token_id in range(storage["next_token_id"]):
+            owner = storage["ledger"].get(token_id)
+            if owner is None:
+                lines.append("    scenario.verify(~c1.data.ledger.contains(%d))" % token_id)
+            else:
+                lines.append("    scenario.verify(c1.data.ledger[%d] == %s)" % (token_id, address_expr(owner)))
+    else:
+        for owner, token_id in sorted(ledger):
+            balance = storage["ledger"].get((owner, token_id))
+            key = "sp.pair(%s, %d)" % (address_expr(owner), token_id)
+            if balance is None:
+                lines.append("    scenario.verify(~c1.data.ledger.contains(%s))" % key)
+            else:
+                lines.append("    scenario.verify(c1.data.ledger[%s] == %d)" % (key, balance))
+        for token_id, supply in sorted(storage["total_supply"].items()):
+            lines.append("    scenario.verify(c1.data.total_supply[%d] == %d)" % (token_id, supply))
+    for name_, slots in (("token_slots", storage["token_slots"]), ("token_positions", storage["token_positions"])):
+        for key in range(storage["next_token_id"]):
+            if key in slots:
+                lines.append("    scenario.verify(c1.data.%s[%d] == %d)" % (name_, key, slots[key]))
+            else:
+                lines.append("    scenario.verify(~c1.data.%s.contains(%d))" % (name_, key))
+    operators_set = set(storage["operators"])
+    for owner, operator, token_id in sorted(operators_touched):
+        key = "sp.record(owner=%s, operator=%s, token_id=%d)" % (address_expr(owner), address_expr(operator), token_id)
+        lines.append("    scenario.verify(%sc1.data.operators.contains(%s))" % (
+            "" if (owner, operator, token_id) in operators_set else "~", key))
+    all_operators_set = set(storage["all_operators"])
+    for owner, operator in sorted(all_operators_touched):
+        key = "sp.record(owner=%s, operator=%s)" % (address_expr(owner), address_expr(operator))
+        lines.append("    scenario.verify(%sc1.data.all_operators.contains(%s))" % (
+            "" if (owner, operator) in all_operators_set else "~", key))
+    out.write("\n".join(lines) + "\n")
+
+
+def simulate(args):
+    model = MODELS[args.contract](ADMIN)
+    stream = Stream(model, random.Random(args.seed), args.holders, args.operators)
+    # Every holder starts with a token so the market has something to trade
+    for first in range(0, args.holders, 100):
+        owners = stream.holders[first:first + 100]
+        items = [(owner, EDITION, {}) if stream.editions else (owner, {}) for owner in owners]
+        model.mint_batch(ADMIN, items)
+        stream.holdings += [(owner, first + i) for i, owner in enumerate(owners)]
+    started = time.time()
+    transfers = failures = operations = 0
+    sample = max(args.transfers // 10, 1)
+    while transfers < args.transfers:
+        op = stream.next()
+        if apply(model, op) is not None:
+            failures += 1
+        operations += 1
+        if op[0] == "transfer":
+            transfers += 1
+            if transfers % sample == 0:
+                print("transfers=%-8d ledger_entries=%-8d operators=%-6d live_tokens=%d" % (
+                    transfers, len(model.ledger) if stream.editions else sum(1 for o in model.ledger if o >= 0),
+                    len(model.operators), model.all_tokens[0]))
+    elapsed = time.time() - started
+    print("%d operations (%d failed on purpose or by chance) in %.2fs, %.0f operations/s" % (
+        operations, failures, elapsed, operations / elapsed if elapsed else 0))
+    return 0
+
+def scenario(args):
+    model = MODELS[args.contract](ADMIN)
+    stream = Stream(model, random.Random(args.seed), args.holders, args.operators)
+    ops, outcomes = [], []
+    for _ in range(args.operations):
+        op = stream.next()
+        ops.append(op)
+        outcomes.append(apply(model, op))
+    name = "Differential %s seed %d" % (args.contract, args.seed)
+    with open(args.out, "w") as f:
+        write_scenario(f, args.contract, ops, outcomes, model, name)
+    print("Wrote %d operations (%d failing) to %s" % (
+        len(ops), sum(1 for outcome in outcomes if outcome is not None), args.out))
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Random operation streams for the Zero Contract models")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command, default_holders in (("simulate", 10000), ("scenario", 6)):
+        sub = commands.add_parser(command)
+        sub.add_argument("--contract", choices=sorted(MODELS), default="v2")
+        sub.add_argument("--seed", type=int, default=0)
+        sub.add_argument("--holders", type=int, default=default_holders)
+        sub.add_argument("--operators", type=int, default=max(default_holders // 10, 2))
+    commands.choices["simulate"].add_argument("--transfers", type=int, default=100000)
+    commands.choices["scenario"].add_argument("--operations", type=int, default=200)
+    commands.choices["scenario"].add_argument("--out", default="differential_test.py")
+    args = parser.parse_args(argv)
+    return simulate(args) if args.command == "simulate" else scenario(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
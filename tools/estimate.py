@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+# Storage burn and gas estimates for planned operations on the Zero Contracts
+# Replays a manifest of mints, transfers, operator updates and burns against a model of the big_maps of
+# Fa2NftMint (v1) or FA2_core (v2) and prints the bytes every operation adds and the tez it burns
+#
+# Storage is counted the way the protocol does: a new big_map entry costs 65 bytes plus the binary Micheline
+# of its value, deleting it frees the same, and only growth past the most storage the contract ever used is paid
+#
+# Usage
+#      python tools/estimate.py drop.json [--bench bench.json] [--report estimate.json]
+# with a manifest such as
+#      {"contract": "v2", "config": {"owner_index": false, "holder_index": false, "provenance_burn": true},
+#       "operations": [
+#          {"entrypoint": "mint", "to_": "tz1...", "amount": 10, "token_info": {"name": "#1", "artifactUri": "data:..."}},
+#          {"entrypoint": "mint_batch", "items": [{"to_": "tz1...", "amount": 10, "token_info": {...}}]},
+#          {"entrypoint": "transfer", "batch": [{"from_": "tz1...", "txs": [{"to_": "tz1...", "token_id": 0, "amount": 1}]}]},
+#          {"entrypoint": "update_operators", "updates": [{"add_operator": {"owner": "tz1...", "operator": "KT1...", "token_id": 0}}]},
+#          {"entrypoint": "update_operators_for_all", "sender": "tz1...", "updates": [{"add_operator_for_all": "KT1..."}]},
+#          {"entrypoint": "burn", "sender": "tz1...", "token_id": 0, "amount": 1}]}
+# token_info values are text, {"file": path} for an artwork encoded like tools/mint.py does, lists and objects are stored as JSON
+# The model starts from a freshly originated contract, set "next_token_id" in the manifest for one that already has tokens
+#
+# Gas is only estimated with --bench, from a tools/bench.py report of the same contract
+# --check replays the payloads, batches and ledger groups of such a report and compares the paid storage call by call
+
+import argparse
+import json
+import sys
+import time
+
+from bench import BATCH_SIZES, LEDGER_SIZES, MOCKUP_ACCOUNTS, MOCKUP_ADMIN, PAYLOAD_SIZES, PRELOAD_BATCH_SIZE
+from bench import make_token_info, row_key
+from metadata_builder import DEFAULT_CACHE_DIR, MetadataBuilder
+from mint import ADDRESS_SIZE, GasModel, fit_line, int_size, pair_size, token_info_size
+
+# Protocol constants
+COST_PER_BYTE_MUTEZ = 250
+# Every big_map entry pays for its key hash and bookkeeping on top of its value
+BIG_MAP_KEY_BYTES = 65
+UNIT_SIZE = 2
+
+BURN_ADDRESS = "tz1burnburnburnburnburnburnburjAYjjX"
+
+
+class EstimateError(ValueError):
+    pass
+
+
+class BigMap:
+    """Values of one big_map with their serialized size, enough to know what every write adds or frees"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.values = {}
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def get(self, key, default=None):
+        entry = self.values.get(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key, value, size):
+        old = self.values.get(key)
+        if old is None:
+            self.collection.used += BIG_MAP_KEY_BYTES + size
+        else:
+            self.collection.used += size - old[1]
+        self.values[key] = (value, size)
+
+    def set_nat(self, key, value):
+        self.set(key, value, int_size(value))
+
+    def delete(self, key):
+        old = self.values.pop(key, None)
+        if old is not None:
+            self.collection.used -= BIG_MAP_KEY_BYTES + old[1]
+
+
+class PagedIndex:
+    """owner_tokens of v1 and the Paged_index of v2, items (group, position) -> value, positions and sizes"""
+
+    def __init__(self, collection, value_size, position_key):
+        self.items = BigMap(collection)
+        self.positions = BigMap(collection)
+        self.sizes = BigMap(collection)
+        self.value_size = value_size
+        # v1 keys positions by token id alone, v2 by (group, value)
+        self.position_key = position_key
+
+    def add(self, group, value):
+        key = self.position_key(group, value)
+        if key in self.positions:
+            return
+        size = self.sizes.get(group, 0)
+        self.items.set((group, size), value, self.value_size(value))
+        self.positions.set_nat(key, size)
+        self.sizes.set_nat(group, size + 1)
+
+    def remove(self, group, value):
+        key = self.position_key(group, value)
+        if key not in self.positions:
+            return
+        position = self.positions.get(key)
+        last = self.sizes.get(group) - 1
+        if position != last:
+            moved = self.items.get((group, last))
+            self.items.set((group, position), moved, self.value_size(moved))
+            self.positions.set_nat(self.position_key(group, moved), position)
+        self.items.delete((group, last))
+        self.positions.delete(key)
+        if last == 0:
+            self.sizes.delete(group)
+        else:
+            self.sizes.set_nat(group, last)
+
+
+def token_metadata_size(token_id, token_info):
+    return pair_size(int_size(token_id), token_info_size(token_info))
+
+
+class Collection:
+    """Storage of one contract as far as the estimated entrypoints change it"""
+
+    contract = None
+    entrypoints = ("mint", "mint_batch", "transfer", "update_operators", "update_operators_for_all", "burn")
+
+    def __init__(self, next_token_id=0):
+        # Bytes used by the contract above its origination and the most it ever used, the paid storage
+        self.used = 0
+        self.paid = 0
+        self.next_token_id = next_token_id
+        self.all_tokens = next_token_id
+        self.ledger = BigMap(self)
+        self.token_metadata = BigMap(self)
+        self.token_slots = BigMap(self)
+        self.token_positions = BigMap(self)
+        self.operators = BigMap(self)
+        self.all_operators = BigMap(self)
+
+    def set_counter(self, name, value):
+        self.used += int_size(value) - int_size(getattr(self, name))
+        setattr(self, name, value)
+
+    def run(self, op):
+        entrypoint = op.get("entrypoint")
+        if entrypoint not in self.entrypoints:
+            raise EstimateError("cannot estimate entrypoint %r" % entrypoint)
+        before = self.used
+        getattr(self, entrypoint)(op)
+        paid = max(self.used - self.paid, 0)
+        self.paid = max(self.paid, self.used)
+        return {
+            "entrypoint": entrypoint,
+            "added_bytes": self.used - before,
+            "paid_storage_bytes": paid,
+            "burn_mutez": paid * COST_PER_BYTE_MUTEZ,
+        }
+
+    # Live token ids, only positions that differ from the token id are stored
+    def token_slot(self, position):
+        return self.token_slots.get(position, position)
+
+    def place_token(self, position, token_id):
+        if position == token_id:
+            self.token_slots.delete(position)
+            self.token_positions.delete(token_id)
+        else:
+            self.token_slots.set_nat(position, token_id)
+            self.token_positions.set_nat(token_id, position)
+
+    def add_live_token(self, token_id):
+        self.place_token(self.all_tokens, token_id)
+        self.set_counter("all_tokens", self.all_tokens + 1)
+
+    def remove_live_token(self, token_id):
+        position = self.token_positions.get(token_id, token_id)
+        last = self.all_tokens - 1
+        if position != last:
+            self.place_token(position, self.token_slot(last))
+        self.token_slots.delete(last)
+        self.token_positions.delete(token_id)
+        self.set_counter("all_tokens", last)
+
+    def mint(self, op):
+        self.mint_token(op["to_"], op.get("amount", 1), op["token_info"])
+
+    def mint_batch(self, op):
+        for item in op["items"]:
+            self.mint_token(item["to_"], item.get("amount", 1), item["token_info"])
+
+    def update_operators(self, op):
+        for update in op["updates"]:
+            for action, param in update.items():
+                key = (param["owner"], param["operator"], param["token_id"])
+                if action == "add_operator":
+                    self.operators.set(key, None, UNIT_SIZE)
+                else:
+                    self.operators.delete(key)
+
+    def update_operators_for_all(self, op):
+        for update in op["updates"]:
+            for action, operator in update.items():
+                if action == "add_operator_for_all":
+                    self.all_operators.set((op["sender"], operator), None, UNIT_SIZE)
+                else:
+                    self.all_operators.delete((op["sender"], operator))
+
+
+class V1Collection(Collection):
+    # Fa2NftMint, the ledger maps token_id -> owner
+    contract = "v1"
+
+    def __init__(self, owner_index=False, next_token_id=0):
+        super().__init__(next_token_id)
+        self.owner_tokens = PagedIndex(self, int_size, lambda owner, token_id: token_id) if owner_index else None
+
+    def mint_token(self, to_, amount, token_info):
+        if amount != 1:
+            raise EstimateError("v1 tokens are 1/1")
+        token_id = self.next_token_id
+        self.token_metadata.set(token_id, token_info, token_metadata_size(token_id, token_info))
+        self.ledger.set(token_id, to_, ADDRESS_SIZE)
+        if self.owner_tokens:
+            self.owner_tokens.add(to_, token_id)
+        self.add_live_token(token_id)
+        self.set_counter("next_token_id", token_id + 1)
+
+    def transfer(self, op):
+        for transfer in op["batch"]:
+            for tx in transfer["txs"]:
+                if tx["token_id"] >= self.next_token_id:
+                    raise EstimateError("This Token is Undefined for Transfer")
+                if tx["amount"] > 0:
+                    if tx["amount"] != 1 or self.ledger.get(tx["token_id"]) != transfer["from_"]:
+                        raise EstimateError("You cannot Transfer more Tokens than you Own")
+                    if self.owner_tokens:
+                        self.owner_tokens.remove(transfer["from_"], tx["token_id"])
+                        self.owner_tokens.add(tx["to_"], tx["token_id"])
+                    self.ledger.set(tx["token_id"], tx["to_"], ADDRESS_SIZE)
+
+    def burn(self, op):
+        token_id = op["token_id"]
+        if self.ledger.get(token_id) != op["sender"]:
+            raise EstimateError("You are not the Owner and cannot Burn this Token")
+        if self.owner_tokens:
+            self.owner_tokens.remove(op["sender"], token_id)
+        self.ledger.delete(token_id)
+        self.token_metadata.delete(token_id)
+        self.remove_live_token(token_id)
+
+
+class V2Collection(Collection):
+    # FA2_core, editions keyed by (owner, token_id) in the ledger, zero balances are deleted
+    contract = "v2"
+
+    def __init__(self, owner_index=False, holder_index=False, provenance_burn=True, next_token_id=0):
+        super().__init__(next_token_id)
+        self.provenance_burn = provenance_burn
+        self.total_supply = BigMap(self)
+        self.owner_tokens = PagedIndex(self, int_size, lambda owner, token_id: (owner, token_id)) if owner_index else None
+        self.token_holders = PagedIndex(self, lambda owner: ADDRESS_SIZE, lambda token_id, owner: (token_id, owner)) if holder_index else None
+
+    def set_balance(self, owner, token_id, balance):
+        if balance == 0:
+            self.ledger.delete((owner, token_id))
+        else:
+            self.ledger.set_nat((owner, token_id), balance)
+
+    def credit(self, owner, token_id, amount):
+        balance = self.ledger.get((owner, token_id), 0)
+        if balance == 0 and amount > 0:
+            if self.owner_tokens:
+                self.owner_tokens.add(owner, token_id)
+            if self.token_holders:
+                self.token_holders.add(token_id, owner)
+        self.set_balance(owner, token_id, balance + amount)
+
+    def debit(self, owner, token_id, amount):
+        balance = self.ledger.get((owner, token_id), 0)
+        if balance < amount:
+            raise EstimateError("FA2_INSUFFICIENT_BALANCE")
+        self.set_balance(owner, token_id, balance - amount)
+        if balance == amount and amount > 0:
+            if self.owner_tokens:
+                self.owner_tokens.remove(owner, token_id)
+            if self.token_holders:
+                self.token_holders.remove(token_id, owner)
+
+    def mint_token(self, to_, amount, token_info):
+        if amount == 0:
+            raise EstimateError("Edition amount must be above zero")
+        token_id = self.next_token_id
+        self.token_metadata.set(token_id, token_info, token_metadata_size(token_id, token_info))
+        self.credit(to_, token_id, amount)
+        self.total_supply.set_nat(token_id, self.total_supply.get(token_id, 0) + amount)
+        self.add_live_token(token_id)
+        self.set_counter("next_token_id", token_id + 1)
+
+    def transfer(self, op):
+        for transfer in op["batch"]:
+            for tx in transfer["txs"]:
+                if tx["token_id"] >= self.next_token_id:
+                    raise EstimateError("FA2_TOKEN_UNDEFINED")
+                if tx["amount"] > 0:
+                    self.debit(transfer["from_"], tx["token_id"], tx["amount"])
+                    self.credit(tx["to_"], tx["token_id"], tx["amount"])
+
+    def burn(self, op):
+        token_id, amount = op["token_id"], op.get("amount", 1)
+        if token_id >= self.next_token_id:
+            raise EstimateError("FA2_TOKEN_UNDEFINED")
+        if (op["sender"], token_id) not in self.ledger:
+            raise EstimateError("FA2_NOT_OWNER")
+        self.debit(op["sender"], token_id, amount)
+        if self.provenance_burn:
+            self.credit(BURN_ADDRESS, token_id, amount)
+        supply = self.total_supply.get(token_id) - amount
+        self.total_supply.set_nat(token_id, supply)
+        if amount > 0 and supply == 0:
+            self.remove_live_token(token_id)
+
+
+def encode_operation(op, builder):
+    # token_info values of the manifest as the bytes the contract stores, artworks given as {"file": path} included
+    op = dict(op)
+    if "token_info" in op:
+        op["token_info"] = builder.token_info(op["token_info"])
+    if "items" in op:
+        op["items"] = [dict(item, token_info=builder.token_info(item["token_info"])) for item in op["items"]]
+    return op
+
+def make_collection(manifest):
+    config = dict(manifest.get("config", {}))
+    config["next_token_id"] = manifest.get("next_token_id", 0)
+    if manifest.get("contract", "v2") == "v1":
+        return V1Collection(**config)
+    return V2Collection(**config)
+
+
+class GasTable:
+    """Gas of every estimated entrypoint fitted to a tools/bench.py report of the same contract"""
+
+    def __init__(self, report, contract):
+        rows = [row for row in report["results"]
+                if row["contract"] == contract and row["variant"] == "default" and row.get("consumed_gas") is not None]
+        # Mints grow with their metadata, batches of transfers and operator updates with their length
+        self.mint = GasModel.from_bench(report, contract)
+        self.lines = {}
+        for entrypoint in ("transfer", "update_operators"):
+            points = [(row["batch"], row["consumed_gas"]) for row in rows
+                      if row["group"] == "batches" and row["entrypoint"] == entrypoint]
+            if points:
+                self.lines[entrypoint] = fit_line(points)
+        points = [(1, row["consumed_gas"]) for row in rows if row["group"] == "ledger" and row["entrypoint"] == "burn"]
+        if points:
+            self.lines["burn"] = fit_line(points)
+
+    def estimate(self, op, collection):
+        entrypoint = op["entrypoint"]
+        if entrypoint in ("mint", "mint_batch"):
+            items = op["items"] if entrypoint == "mint_batch" else [op]
+            return sum(self.mint.estimate(token_info_size(item["token_info"])) for item in items)
+        if entrypoint not in self.lines:
+            return None
+        intercept, slope = self.lines[entrypoint]
+        if entrypoint == "transfer":
+            count = sum(len(transfer["txs"]) for transfer in op["batch"])
+        elif entrypoint == "update_operators":
+            count = len(op["updates"])
+        else:
+            count = 1
+        return (intercept + slope * count) * self.mint.margin
+
+
+def estimate(manifest, gas_table=None, builder=None):
+    collection = make_collection(manifest)
+    builder = builder or MetadataBuilder(None)
+    rows = []
+    for index, op in enumerate(manifest["operations"]):
+        op = encode_operation(op, builder)
+        try:
+            row = collection.run(op)
+        except EstimateError as error:
+            raise EstimateError("operation %d (%s): %s" % (index, op.get("entrypoint"), error))
+        if gas_table:
+            gas = gas_table.estimate(op, collection)
+            row["estimated_gas"] = None if gas is None else round(gas)
+        rows.append(row)
+    return rows
+
+
+# Replays of the benchmark groups, every group starts from a freshly originated contract like tools/bench.py does
+
+def bench_mint_batch(collection, items):
+    edition = 1 if collection.contract == "v1" else 10
+    return collection.run({"entrypoint": "mint_batch", "items": [
+        {"to_": to_, "amount": edition, "token_info": info} for to_, info in items
+    ]})
+
+def bench_preload(collection, count):
+    while count > 0:
+        size = min(count, PRELOAD_BATCH_SIZE)
+        first = collection.next_token_id
+        bench_mint_batch(collection, [(MOCKUP_ADMIN, make_token_info("Bench #%d" % (first + i))) for i in range(size)])
+        count -= size
+
+def bench_mint(collection, info):
+    edition = 1 if collection.contract == "v1" else 10
+    return collection.run({"entrypoint": "mint", "to_": MOCKUP_ADMIN, "amount": edition, "token_info": info})
+
+def bench_operators(collection, action, ids):
+    return collection.run({"entrypoint": "update_operators", "updates": [
+        {action: {"owner": MOCKUP_ADMIN, "operator": MOCKUP_ACCOUNTS[2], "token_id": token_id}} for token_id in ids
+    ]})
+
+def bench_transfer(collection, from_, to_, ids):
+    return collection.run({"entrypoint": "transfer", "batch": [
+        {"from_": from_, "txs": [{"to_": to_, "token_id": token_id, "amount": 1} for token_id in ids]}
+    ]})
+
+def replay_payloads(collection):
+    for size in PAYLOAD_SIZES:
+        yield "mint", {"payload_bytes": size}, bench_mint(collection, make_token_info("Payload %d" % size, size))
+
+def replay_batches(collection):
+    for size in BATCH_SIZES:
+        first = collection.next_token_id
+        items = [(MOCKUP_ADMIN, make_token_info("Batch #%d" % (first + i))) for i in range(size)]
+        yield "mint_batch", {"batch": size}, bench_mint_batch(collection, items)
+    first = collection.next_token_id
+    bench_preload(collection, max(BATCH_SIZES))
+    receiver = MOCKUP_ACCOUNTS[1]
+    for size in BATCH_SIZES:
+        ids = list(range(first, first + size))
+        yield "update_operators", {"batch": size}, bench_operators(collection, "add_operator", ids)
+        yield "balance_of", {"batch": size}, {"paid_storage_bytes": 0}
+        yield "transfer", {"batch": size}, bench_transfer(collection, MOCKUP_ADMIN, receiver, ids)
+        bench_transfer(collection, receiver, MOCKUP_ADMIN, ids)
+        bench_operators(collection, "remove_operator", ids)
+
+def replay_ledger(collection):
+    receiver = MOCKUP_ACCOUNTS[1]
+    for size in LEDGER_SIZES:
+        bench_preload(collection, size - collection.next_token_id)
+        token_id = collection.next_token_id - 1
+        dims = {"ledger_entries": size}
+        yield "mint", dims, bench_mint(collection, make_token_info("Ledger %d" % size, 1024))
+        yield "update_operators", dims, bench_operators(collection, "add_operator", [token_id])
+        yield "balance_of", dims, {"paid_storage_bytes": 0}
+        yield "transfer", dims, bench_transfer(collection, MOCKUP_ADMIN, receiver, [token_id])
+        burned = collection.next_token_id - 1
+        yield "burn", dims, collection.run({"entrypoint": "burn", "sender": MOCKUP_ADMIN, "token_id": burned, "amount": 1})
+
+REPLAYS = {"payloads": replay_payloads, "batches": replay_batches, "ledger": replay_ledger}
+
+def check(report):
+    # Paid storage of every replayed call next to the figure the mockup chain reported
+    measured = {row_key(row): row for row in report["results"] if row["variant"] == "default"}
+    compared, mismatches = 0, []
+    for contract, cls in (("v1", V1Collection), ("v2", V2Collection)):
+        for group, replay in REPLAYS.items():
+            for entrypoint, dims, result in replay(cls()):
+                row = dict(contract=contract, variant="default", group=group, entrypoint=entrypoint, **dims)
+                actual = measured.get(row_key(row))
+                if actual is None:
+                    continue
+                compared += 1
+                if actual["paid_storage_bytes"] != result["paid_storage_bytes"]:
+                    mismatches.append((row, actual["paid_storage_bytes"], result["paid_storage_bytes"]))
+    return compared, mismatches
+
+
+def format_tez(mutez):
+    return "%d.%06d tez" % divmod(mutez, 1000000)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Storage burn and gas estimates for planned Zero Contract operations")
+    parser.add_argument("manifest", nargs="?", help="JSON manifest of planned operations")
+    parser.add_argument("--bench", help="tools/bench.py report used to estimate gas")
+    parser.add_argument("--check", metavar="REPORT", help="compare the model with the paid storage of a tools/bench.py report")
+    parser.add_argument("--report", help="JSON file for the estimate of every operation")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="cache of encoded artworks (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if not (args.manifest or args.check):
+        parser.error("pass a manifest and/or --check")
+
+    status = 0
+    if args.check:
+        with open(args.check) as f:
+            compared, mismatches = check(json.load(f))
+        for row, actual, estimated in mismatches:
+            print("MISMATCH %s %s %s %s: paid %s, estimated %s" % (
+                row["contract"], row["group"], row["entrypoint"],
+                ", ".join("%s=%s" % (k, v) for k, v in row.items() if k not in ("contract", "variant", "group", "entrypoint")),
+                actual, estimated))
+        print("Checked %d benchmark calls, %d mismatches" % (compared, len(mismatches)))
+        status = 1 if mismatches else 0
+
+    if args.manifest:
+        with open(args.manifest) as f:
+            manifest = json.load(f)
+        gas_table = None
+        if args.bench:
+            with open(args.bench) as f:
+                gas_table = GasTable(json.load(f), manifest.get("contract", "v2"))
+        started = time.time()
+        try:
+            rows = estimate(manifest, gas_table, MetadataBuilder(args.cache_dir))
+        except EstimateError as error:
+            print("ERROR %s" % error)
+            return 1
+        paid = sum(row["paid_storage_bytes"] for row in rows)
+        print("%d operations estimated in %.0f ms" % (len(rows), (time.time() - started) * 1000))
+        print("Storage added: %d bytes, paid: %d bytes, burn: %s" % (
+            sum(row["added_bytes"] for row in rows), paid, format_tez(paid * COST_PER_BYTE_MUTEZ)))
+        if gas_table:
+            gas = [row["estimated_gas"] for row in rows if row["estimated_gas"] is not None]
+            print("Estimated gas: %d over %d operations" % (sum(gas), len(gas)))
+        if args.report:
+            with open(args.report, "w") as f:
+                json.dump({"contract": manifest.get("contract", "v2"), "operations": rows}, f, indent=1)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+# Metadata builder shared by the Zero Contract tools
+# Encodes the token_info fields of both contracts once and writes them as Michelson or SmartPy values
+#
+# Artworks are read with mmap once they are larger than MMAP_THRESHOLD so hashing and hex encoding work on the
+# page cache instead of copies, and hex is written in chunks straight to the output file
+# The data URI of every artwork is cached under the sha256 of its source, a second run over the same collection
+# only hashes the files and maps the cached URIs
+#
+#      builder = MetadataBuilder()
+#      token_info = builder.token_info({"name": "Series #1", "artifactUri": {"file": "art/1.svg"}, "creators": ["tz1..."]})
+#      with open("mint.tz", "w") as f:
+#          write_michelson_token_info(f, token_info)
+#
+# Values of a token_info are text, bytes, {"file": path} for an artwork or lists and objects stored as JSON
+
+import base64
+import binascii
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import re
+import tempfile
+from urllib.parse import quote
+
+# Files at least this large are mapped instead of read
+MMAP_THRESHOLD = 64 * 1024
+# Bytes hex encoded per write
+HEX_CHUNK = 64 * 1024
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "zero-contract")
+# Part of every cache key, bump it when minify or the data URI encoding changes
+CACHE_VERSION = 1
+
+MIME_TYPES = {".svg": "image/svg+xml", ".html": "text/html", ".htm": "text/html"}
+
+# Bytes left as they are in a percent encoded data URI, everything else is written as %XX
+# Spaces, quotes and angle brackets are accepted by browsers and marketplaces, % and # are not
+PERCENT_SAFE = "".join(chr(c) for c in range(0x20, 0x7f) if chr(c) not in "%#")
+
+
+# Minification
+
+COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.S)
+XML_PROLOG_RE = re.compile(r"<\?xml[^>]*\?>\s*", re.I)
+PROTECTED_RE = re.compile(r"(<(script|style|pre|textarea|text)\b.*?</\2\s*>)", re.S | re.I)
+SPACE_RE = re.compile(r"\s+")
+
+def collapse(text):
+    return SPACE_RE.sub(" ", text)
+
+def minify(source, mime):
+    # Conservative minifier, comments and indentation are removed but nothing that changes the rendering
+    # script, pre and textarea keep their whitespace, style and SVG text only have runs of whitespace collapsed
+    source = COMMENT_RE.sub("", source)
+    if mime == "image/svg+xml" and not re.search(r"<\?xml[^>]*encoding=[\"'](?!utf-?8)", source, re.I):
+        source = XML_PROLOG_RE.sub("", source)
+    # Whitespace between two tags only matters for inline HTML elements, SVG drops it
+    between_tags = "><" if mime == "image/svg+xml" else "> <"
+    parts = []
+    for index, part in enumerate(PROTECTED_RE.split(source)):
+        # split returns text, protected block and its tag name in turn
+        kind = index % 3
+        if kind == 0:
+            parts.append(re.sub(r">\s+<", between_tags, collapse(part)))
+        elif kind == 1:
+            tag = PROTECTED_RE.match(part).group(2).lower()
+            parts.append(collapse(part) if tag in ("style", "text") else part)
+    return "".join(parts).strip()
+
+
+# Data URIs
+
+def percent_data_uri(body, mime):
+    # XML defaults to UTF-8, HTML needs the charset once it has non ASCII characters
+    charset = ";charset=utf-8" if mime != "image/svg+xml" and any(b > 0x7f for b in body) else ""
+    return ("data:%s%s," % (mime, charset)).encode("ascii") + quote(body, safe=PERCENT_SAFE).encode("ascii")
+
+def base64_data_uri(body, mime):
+    return ("data:%s;base64," % mime).encode("ascii") + base64.b64encode(body)
+
+def data_uri(body, mime):
+    # Percent encoding wins for plain ASCII markup, base64 once about a sixth of the bytes need escaping
+    candidates = [("percent", percent_data_uri(body, mime)), ("base64", base64_data_uri(body, mime))]
+    return min(candidates, key=lambda candidate: len(candidate[1]))
+
+
+# Sources
+
+def map_file(path):
+    # Small files are read, larger ones mapped read only
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if size < MMAP_THRESHOLD:
+            return f.read()
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+@contextlib.contextmanager
+def source_buffer(value):
+    # Buffer of a token_info value, cached artifacts are mapped for as long as the block runs
+    if not isinstance(value, Artifact):
+        yield value
+        return
+    data = map_file(value.path)
+    try:
+        with memoryview(data) as view:
+            with view[value.offset:value.offset + value.size] as part:
+                yield part
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+class Artifact:
+    """Encoded artwork kept in the builder cache, only its location and length are passed around"""
+
+    __slots__ = ("path", "offset", "size")
+
+    def __init__(self, path, offset, size):
+        self.path = path
+        self.offset = offset
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def read(self):
+        with source_buffer(self) as data:
+            return bytes(data)
+
+
+class MetadataBuilder:
+    """Encodes token_info values once, artworks are cached by the sha256 of their source across runs"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        # cache_dir None keeps every encoded artwork in memory
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def artifact(self, path):
+        # Returns the data URI of an artwork, an Artifact when it is cached, and what was done to the source
+        mime = MIME_TYPES[os.path.splitext(path)[1].lower()]
+        source = map_file(path)
+        try:
+            info = {"sha256": hashlib.sha256(source).hexdigest(), "source_bytes": len(source)}
+            cached = self.cached(info["sha256"], mime)
+            if cached:
+                artifact, info["encoding"], info["minified_bytes"] = cached
+                return artifact, info
+            body = minify(bytes(source).decode("utf-8"), mime).encode("utf-8")
+        finally:
+            if isinstance(source, mmap.mmap):
+                source.close()
+        info["encoding"], uri = data_uri(body, mime)
+        info["minified_bytes"] = len(body)
+        if self.cache_dir:
+            uri = self.store(info["sha256"], mime, info["encoding"], len(body), uri)
+        return uri, info
+
+    def cache_path(self, digest, mime):
+        return os.path.join(self.cache_dir, "%s-%s-v%d" % (digest, mime.replace("/", "_").replace("+", "_"), CACHE_VERSION))
+
+    def cached(self, digest, mime):
+        # Cache entries are a header line "<encoding> <minified bytes>" followed by the data URI
+        if not self.cache_dir:
+            return None
+        path = self.cache_path(digest, mime)
+        try:
+            with open(path, "rb") as f:
+                header = f.readline()
+                size = os.fstat(f.fileno()).st_size - len(header)
+        except FileNotFoundError:
+            return None
+        encoding, minified_bytes = header.decode("ascii").split()
+        return Artifact(path, len(header), size), encoding, int(minified_bytes)
+
+    def store(self, digest, mime, encoding, minified_bytes, uri):
+        # Written to a temporary file and renamed so parallel workers never see half an entry
+        path = self.cache_path(digest, mime)
+        header = ("%s %d\n" % (encoding, minified_bytes)).encode("ascii")
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir)
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(uri)
+        os.replace(tmp, path)
+        return Artifact(path, len(header), len(uri))
+
+    def value(self, value):
+        if isinstance(value, (bytes, Artifact)):
+            return value
+        if isinstance(value, dict) and set(value) == {"file"}:
+            return self.artifact(value["file"])[0]
+        return metadata_bytes(value)
+
+    def token_info(self, fields):
+        return {key: self.value(value) for key, value in fields.items()}
+
+
+def metadata_bytes(value):
+    # token_info values are bytes, lists and objects are stored as JSON like the "creators" key
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+def value_bytes(value):
+    # Full bytes of a token_info value, only for values that have to be held in memory
+    return value.read() if isinstance(value, Artifact) else value
+
+
+# Output
+
+def write_hex(out, value):
+    with source_buffer(value) as data:
+        for start in range(0, len(data), HEX_CHUNK):
+            out.write(binascii.hexlify(data[start:start + HEX_CHUNK]).decode("ascii"))
+
+def michelson_string(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+def write_michelson_bytes(out, value):
+    out.write("0x")
+    write_hex(out, value)
+
+def write_michelson_token_info(out, token_info):
+    # Michelson maps must list their keys in increasing order
+    if not token_info:
+        out.write("{}")
+        return
+    out.write("{ ")
+    for index, key in enumerate(sorted(token_info)):
+        out.write("%sElt %s " % (" ; " if index else "", michelson_string(key)))
+        write_michelson_bytes(out, token_info[key])
+    out.write(" }")
+
+def write_sp_bytes(out, value):
+    out.write('sp.bytes("0x')
+    write_hex(out, value)
+    out.write('")')
+
+def write_smartpy_token_info(out, token_info):
+    # A dict literal of sp.bytes, accepted wherever both contracts take a TMap(TString, TBytes)
+    out.write("{")
+    for index, key in enumerate(sorted(token_info)):
+        out.write("%s%s: " % (", " if index else "", json.dumps(key)))
+        write_sp_bytes(out, token_info[key])
+    out.write("}")
+
+def sp_bytes(value):
+    # For values small enough to be built as one string, for example in generated test scenarios
+    return 'sp.bytes("0x%s")' % value_bytes(value).hex()
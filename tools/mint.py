@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# Offline minting pipeline for the Zero Contracts
+# Turns a directory of SVG/HTML artworks into mint_batch arguments ready for octez-client
+#
+# Every artwork is minified, encoded as the smallest of a base64 or a percent encoded data URI
+# and stored as the "artifactUri" of a token_info map, the other keys come from --metadata
+# Encoded artworks are cached by tools/metadata_builder.py, a second run only hashes unchanged files
+# The tokens are then split into mint_batch operations that stay under the operation size and gas limits
+#
+# Usage
+#      python tools/mint.py artworks/ --contract v2 --to tz1... --amount 10 \
+#          --name "Series #{index}" --metadata shared.json --out mint/
+# Each mint/mint_batch_NNN.tz holds one argument for
+#      octez-client transfer 0 from <admin> to <collection> --entrypoint mint_batch --arg "$(cat mint/mint_batch_000.tz)"
+# and mint/manifest.json lists which file went to which batch with its encoding and size
+#
+# The gas of a mint is estimated with a linear model, pass the report of tools/bench.py with --bench
+# to fit it to the payloads group of the same contract instead of the conservative defaults below
+# Artworks too large for a single operation are listed in the manifest, upload them with begin_artifact
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from metadata_builder import DEFAULT_CACHE_DIR, MIME_TYPES, MetadataBuilder, michelson_string, write_michelson_token_info
+
+# Protocol limits of a single manager operation
+MAX_OPERATION_SIZE = 32768
+HARD_GAS_LIMIT_PER_OPERATION = 1040000
+
+# Branch, signature and the transaction fields around the parameter
+OPERATION_OVERHEAD = 200
+
+# mint_batch limits Fa2NftMint checks itself, it counts the serialized size of the items like mint_item_size does
+V1_MAX_MINT_BATCH_SIZE = 100
+V1_MAX_MINT_BATCH_BYTES = 32000
+
+# Gas of one mint_batch item, per item and per byte of its token_info, kept on the high side
+# until they are fitted to a benchmark report
+DEFAULT_GAS_PER_ITEM = 4000
+DEFAULT_GAS_PER_BYTE = 2.0
+GAS_MARGIN = 1.2
+
+
+# Token metadata
+
+def prepare_artwork(path, index, name, metadata, cache_dir):
+    # Runs in a worker process, the encoded artwork stays in the builder cache and only its length comes back
+    builder = MetadataBuilder(cache_dir)
+    uri, info = builder.artifact(path)
+    token_info = builder.token_info(metadata)
+    token_info["name"] = name.format(index=index, stem=os.path.splitext(os.path.basename(path))[0]).encode("utf-8")
+    token_info["artifactUri"] = uri
+    artwork = {"file": path, "index": index}
+    artwork.update(info)
+    artwork["uri_bytes"] = len(uri)
+    artwork["token_info"] = token_info
+    return artwork
+
+
+# Sizes of the binary Micheline the node counts against MAX_OPERATION_SIZE
+
+def zarith_size(value):
+    # 6 bits in the first byte next to the sign, 7 bits in every following byte
+    size, value = 1, int(value) >> 6
+    while value:
+        size, value = size + 1, value >> 7
+    return size
+
+def int_size(value):
+    return 1 + zarith_size(value)
+
+def string_size(value):
+    return 5 + len(value)
+
+def bytes_size(value):
+    return 5 + len(value)
+
+# Addresses are sent in their optimized form, 22 bytes
+ADDRESS_SIZE = bytes_size(b"\x00" * 22)
+
+def pair_size(*items):
+    return 2 * (len(items) - 1) + sum(items)
+
+def token_info_size(token_info):
+    return 5 + sum(pair_size(string_size(key.encode("utf-8")), bytes_size(value)) for key, value in token_info.items())
+
+def mint_item_size(contract, token_info, amount):
+    if contract == "v1":
+        return pair_size(ADDRESS_SIZE, token_info_size(token_info))
+    return pair_size(ADDRESS_SIZE, int_size(amount), token_info_size(token_info))
+
+def write_mint_item(out, contract, to_, token_info, amount):
+    if contract == "v1":
+        out.write("(Pair %s " % michelson_string(to_))
+        write_michelson_token_info(out, token_info)
+        out.write(")")
+    else:
+        out.write("(Pair %s (Pair %d " % (michelson_string(to_), amount))
+        write_michelson_token_info(out, token_info)
+        out.write("))")
+
+
+# Batching
+
+def fit_line(points):
+    # Least squares fit of y = intercept + slope * x, a single x gives a flat line through the mean
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if not spread:
+        return mean_y, 0
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+    return mean_y - slope * mean_x, slope
+
+
+class GasModel:
+    """Linear estimate of the gas a mint_batch item consumes"""
+
+    def __init__(self, per_item=DEFAULT_GAS_PER_ITEM, per_byte=DEFAULT_GAS_PER_BYTE, margin=GAS_MARGIN):
+        self.per_item = per_item
+        self.per_byte = per_byte
+        self.margin = margin
+
+    @classmethod
+    def from_bench(cls, report, contract):
+        # consumed_gas against payload_bytes over the mint calls of the payloads group
+        points = [
+            (row["payload_bytes"], row["consumed_gas"]) for row in report["results"]
+            if row["contract"] == contract and row["variant"] == "default" and row["group"] == "payloads"
+            and row["entrypoint"] == "mint" and row.get("consumed_gas") is not None
+        ]
+        if len(points) < 2:
+            raise ValueError("the report has no payloads results for %s" % contract)
+        per_item, per_byte = fit_line(points)
+        return cls(max(per_item, 0), max(per_byte, 0))
+
+    def estimate(self, size):
+        return (self.per_item + self.per_byte * size) * self.margin
+
+
+def plan_batches(artworks, contract, amount, gas_model, gas_limit=HARD_GAS_LIMIT_PER_OPERATION,
+                 max_size=MAX_OPERATION_SIZE, max_items=None):
+    # Greedy, in file order so token ids follow the order of the files
+    # Returns the batches and the artworks that do not fit in an operation on their own
+    budget = max_size - OPERATION_OVERHEAD - 5
+    if contract == "v1":
+        budget = min(budget, V1_MAX_MINT_BATCH_BYTES)
+        max_items = min(max_items or V1_MAX_MINT_BATCH_SIZE, V1_MAX_MINT_BATCH_SIZE)
+    batches, oversized = [], []
+    current, size, gas = [], 0, 0
+    for artwork in artworks:
+        item_size = mint_item_size(contract, artwork["token_info"], amount)
+        item_gas = gas_model.estimate(item_size)
+        artwork["arg_bytes"] = item_size
+        if item_size > budget or item_gas > gas_limit:
+            oversized.append(artwork)
+            continue
+        if current and (size + item_size > budget or gas + item_gas > gas_limit
+                        or (max_items and len(current) >= max_items)):
+            batches.append(current)
+            current, size, gas = [], 0, 0
+        current.append(artwork)
+        size += item_size
+        gas += item_gas
+    if current:
+        batches.append(current)
+    return batches, oversized
+
+
+def find_artworks(directory):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if os.path.splitext(name)[1].lower() in MIME_TYPES
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prepare mint_batch arguments for a directory of SVG/HTML artworks")
+    parser.add_argument("directory", help="directory of .svg and .html artworks, minted in file name order")
+    parser.add_argument("--contract", choices=("v1", "v2"), default="v2")
+    parser.add_argument("--to", required=True, help="address receiving the tokens")
+    parser.add_argument("--amount", type=int, default=1, help="edition size of every token (v2 only)")
+    parser.add_argument("--name", default="{stem}", help="token name, {index} and {stem} are replaced (default: the file name)")
+    parser.add_argument("--first-index", type=int, default=1, help="{index} of the first artwork")
+    parser.add_argument("--metadata", help="JSON object of keys added to every token_info, or leave them to set_metadata_template")
+    parser.add_argument("--bench", help="tools/bench.py report used to fit the gas estimate")
+    parser.add_argument("--gas-limit", type=int, default=HARD_GAS_LIMIT_PER_OPERATION, help="gas budget of one operation")
+    parser.add_argument("--max-items", type=int, help="largest number of tokens per mint_batch (at most 100 for v1)")
+    parser.add_argument("--workers", type=int, help="encoding processes (default: one per CPU)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="cache of encoded artworks (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="encode every artwork again and keep it in memory")
+    parser.add_argument("--out", default="mint", help="directory for the batch arguments and manifest.json")
+    args = parser.parse_args(argv)
+    if args.contract == "v1" and args.amount != 1:
+        parser.error("v1 tokens are 1/1, --amount only applies to v2")
+
+    metadata = {}
+    if args.metadata:
+        with open(args.metadata) as f:
+            metadata = json.load(f)
+    gas_model = GasModel()
+    if args.bench:
+        with open(args.bench) as f:
+            gas_model = GasModel.from_bench(json.load(f), args.contract)
+
+    paths = find_artworks(args.directory)
+    if not paths:
+        parser.error("no .svg or .html files in %s" % args.directory)
+    started = time.time()
+    prepare = partial(prepare_artwork, name=args.name, metadata=metadata, cache_dir=None if args.no_cache else args.cache_dir)
+    indexes = range(args.first_index, args.first_index + len(paths))
+    with ProcessPoolExecutor(args.workers) as pool:
+        artworks = list(pool.map(prepare, paths, indexes, chunksize=max(len(paths) // 64, 1)))
+
+    batches, oversized = plan_batches(artworks, args.contract, args.amount, gas_model, args.gas_limit, max_items=args.max_items)
+    os.makedirs(args.out, exist_ok=True)
+    manifest = {
+        "contract": args.contract,
+        "to": args.to,
+        "amount": args.amount,
+        "gas_model": {"per_item": gas_model.per_item, "per_byte": gas_model.per_byte, "margin": gas_model.margin},
+        "batches": [],
+        "oversized": [],
+    }
+    for number, batch in enumerate(batches):
+        path = os.path.join(args.out, "mint_batch_%03d.tz" % number)
+        with open(path, "w") as f:
+            # Hex is written straight from the cached artworks, no argument is built in memory
+            f.write("{ ")
+            for position, artwork in enumerate(batch):
+                f.write(" ; " if position else "")
+                write_mint_item(f, args.contract, args.to, artwork["token_info"], args.amount)
+            f.write(" }")
+        manifest["batches"].append({
+            "arg": path,
+            "arg_bytes": 5 + sum(a["arg_bytes"] for a in batch),
+            "estimated_gas": round(sum(gas_model.estimate(a["arg_bytes"]) for a in batch)),
+            "files": [a["file"] for a in batch],
+        })
+    for artwork in oversized:
+        manifest["oversized"].append({"file": artwork["file"], "arg_bytes": artwork["arg_bytes"]})
+    manifest["artworks"] = [{k: v for k, v in a.items() if k != "token_info"} for a in artworks]
+    with open(os.path.join(args.out, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1)
+
+    source = sum(a["source_bytes"] for a in artworks)
+    encoded = sum(a["uri_bytes"] for a in artworks)
+    print("Prepared %d artworks in %.1fs, %d bytes of source as %d bytes of data URIs" % (
+        len(artworks), time.time() - started, source, encoded))
+    print("Wrote %d mint_batch arguments to %s" % (len(batches), args.out))
+    for artwork in oversized:
+        print("OVERSIZED %s: %d bytes, upload it with begin_artifact" % (artwork["file"], artwork["arg_bytes"]))
+    return 1 if oversized else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,452 @@
+# Executable models of Fa2NftMint (v1) and FA2_core (v2) for simulations far larger than a SmartPy scenario can run
+# Entrypoints check in the same order and fail with the same strings as the contracts, a failing operation changes nothing
+#
+# Addresses are interned to small ints, the v1 ledger and the v2 supplies are arrays indexed by token id
+# and every other big_map is a dict with packed int keys
+#
+#      model = EditionsModel("admin")
+#      model.mint("admin", "alice", 10, {"name": b"#1"})
+#      model.transfer("alice", [("alice", [("bob", 0, 3)])])
+#      model.get_balance("bob", 0)
+#
+# Entrypoints take the sender first and then the parameter as plain tuples in the field order of the contract
+# tools/differential.py replays random streams through a model and writes the same stream as a SmartPy scenario
+#
+# The default build of each contract is modelled, without the owner and holder indexes and without the reentrancy lock
+# The lock cannot change the outcome of a scenario, the indexes only add storage next to the ledger
+
+import functools
+from array import array
+
+# Fa2NftMint
+V1_NOT_MINTER = "Only the Collector Owner can Mint Tokens"
+V1_BATCH_TOO_LONG = "Mint Batch has too many Tokens"
+V1_BATCH_TOO_LARGE = "Mint Batch Metadata is too large"
+V1_TRANSFER_UNDEFINED = "This Token is Undefined for Transfer"
+V1_NOT_OPERATOR = "You are not the Owner or Operator of this Token"
+V1_INSUFFICIENT_BALANCE = "You cannot Transfer more Tokens than you Own"
+V1_NOT_OWNER = "You are not the Owner of this Token"
+V1_BURN_UNDEFINED = "Non-existand Token cannot be Burnt"
+V1_BURN_NOT_OWNER = "You are not the Owner and cannot Burn this Token"
+V1_BALANCE_UNDEFINED = "This Token has Undefined Balance"
+V1_VIEW_BALANCE_UNDEFINED = "This Token has Undefined Offchain Balance"
+V1_MAX_MINT_BATCH_SIZE = 100
+V1_MAX_MINT_BATCH_BYTES = 32000
+V1_MINT_ITEM_OVERHEAD = 34
+V1_METADATA_ENTRY_OVERHEAD = 12
+
+# FA2_core, the strings of Error_message and of its own checks
+FA2_TOKEN_UNDEFINED = "FA2_TOKEN_UNDEFINED"
+FA2_INSUFFICIENT_BALANCE = "FA2_INSUFFICIENT_BALANCE"
+FA2_NOT_OPERATOR = "FA2_NOT_OPERATOR"
+FA2_NOT_OWNER = "FA2_NOT_OWNER"
+V2_NOT_MINTER = "Not authorized to mint"
+V2_NOT_ADMIN_ADD_COLLABORATOR = "Only the contract owner can add collaborators"
+V2_NOT_ADMIN_REMOVE_COLLABORATOR = "Only the contract owner can remove collaborators"
+V2_EMPTY_EDITION = "Edition amount must be above zero"
+
+BURN_ADDRESS = "tz1burnburnburnburnburnburnburjAYjjX"
+
+# Token ids and address ids packed into one int key
+ID_BITS = 32
+
+MISSING = object()
+APPEND = object()
+
+
+class ModelError(Exception):
+    """Failed operation, message is the string the contract fails with, None for a lookup of a missing big_map key"""
+
+    def __init__(self, message=None):
+        super().__init__(message)
+        self.message = message
+
+
+class Addresses:
+    """Interned addresses, ids are handed out in the order addresses are first seen"""
+
+    __slots__ = ("ids", "names")
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def id(self, name):
+        address_id = self.ids.get(name)
+        if address_id is None:
+            address_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return address_id
+
+    def name(self, address_id):
+        return self.names[address_id]
+
+
+def entrypoint(method):
+    # Runs an entrypoint as one operation, a ModelError undoes every write it made before it is raised again
+    @functools.wraps(method)
+    def run(self, sender, *args):
+        undo = self.undo = []
+        try:
+            return method(self, self.addresses.id(sender), *args)
+        except ModelError:
+            for container, key, old in reversed(undo):
+                if key is APPEND:
+                    container.pop()
+                elif old is MISSING:
+                    del container[key]
+                else:
+                    container[key] = old
+            raise
+        finally:
+            self.undo = None
+    return run
+
+
+class Model:
+    """Storage shared by both contracts and the journaled writes every entrypoint goes through"""
+
+    __slots__ = ("addresses", "undo", "admin", "next_token_id", "all_tokens", "token_slots", "token_positions",
+                 "operators", "all_operators", "token_metadata")
+
+    def __init__(self, admin):
+        self.addresses = Addresses()
+        self.undo = None
+        self.admin = self.addresses.id(admin)
+        # next_token_id and all_tokens are one element arrays so they are journaled like every other write
+        self.next_token_id = array("Q", [0])
+        self.all_tokens = array("Q", [0])
+        self.token_slots = {}
+        self.token_positions = {}
+        # (owner, operator, token_id) and (owner, operator) packed into ints
+        self.operators = {}
+        self.all_operators = {}
+        self.token_metadata = {}
+
+    def put(self, container, key, value):
+        if self.undo is not None:
+            self.undo.append((container, key, container.get(key, MISSING) if isinstance(container, dict) else container[key]))
+        container[key] = value
+
+    def delete(self, container, key):
+        if key in container:
+            if self.undo is not None:
+                self.undo.append((container, key, container[key]))
+            del container[key]
+
+    def append(self, container, value):
+        if self.undo is not None:
+            self.undo.append((container, APPEND, None))
+        container.append(value)
+
+    def operator_key(self, owner, operator, token_id):
+        return (((owner << ID_BITS) | operator) << ID_BITS) | token_id
+
+    def operator_for_all_key(self, owner, operator):
+        return (owner << ID_BITS) | operator
+
+    # Live token ids in a dense range of positions, only positions that differ from the token id are stored
+    def token_slot(self, position):
+        return self.token_slots.get(position, position)
+
+    def place_token(self, position, token_id):
+        if position == token_id:
+            self.delete(self.token_slots, position)
+            self.delete(self.token_positions, token_id)
+        else:
+            self.put(self.token_slots, position, token_id)
+            self.put(self.token_positions, token_id, position)
+
+    def add_live_token(self, token_id):
+        self.place_token(self.all_tokens[0], token_id)
+        self.put(self.all_tokens, 0, self.all_tokens[0] + 1)
+
+    def remove_live_token(self, token_id):
+        position = self.token_positions.get(token_id, token_id)
+        last = self.all_tokens[0] - 1
+        if position != last:
+            self.place_token(position, self.token_slot(last))
+        self.delete(self.token_slots, last)
+        self.delete(self.token_positions, token_id)
+        self.put(self.all_tokens, 0, last)
+
+    def new_token_id(self):
+        token_id = self.next_token_id[0]
+        self.put(self.next_token_id, 0, token_id + 1)
+        return token_id
+
+    @entrypoint
+    def update_operators_for_all(self, sender, updates):
+        for action, operator in updates:
+            key = self.operator_for_all_key(sender, self.addresses.id(operator))
+            if action == "add_operator_for_all":
+                self.put(self.all_operators, key, True)
+            else:
+                self.delete(self.all_operators, key)
+
+    def is_operator(self, owner, operator, token_id):
+        return self.operator_key(self.addresses.id(owner), self.addresses.id(operator), token_id) in self.operators
+
+    def is_operator_for_all(self, owner, operator):
+        return self.operator_for_all_key(self.addresses.id(owner), self.addresses.id(operator)) in self.all_operators
+
+    def count_tokens(self):
+        return self.all_tokens[0]
+
+    def storage(self):
+        # Plain copy of the modelled storage with address names, used to compare runs
+        name = self.addresses.name
+        mask = (1 << ID_BITS) - 1
+        return {
+            "next_token_id": self.next_token_id[0],
+            "all_tokens": self.all_tokens[0],
+            "token_slots": dict(self.token_slots),
+            "token_positions": dict(self.token_positions),
+            "operators": sorted(
+                (name(key >> 2 * ID_BITS), name((key >> ID_BITS) & mask), key & mask) for key in self.operators
+            ),
+            "all_operators": sorted((name(key >> ID_BITS), name(key & mask)) for key in self.all_operators),
+        }
+
+
+class ArtworkModel(Model):
+    """Fa2NftMint, one owner per token id, -1 for a token that is burned"""
+
+    __slots__ = ("ledger",)
+
+    def __init__(self, admin):
+        super().__init__(admin)
+        self.ledger = array("q")
+
+    def owner_of(self, token_id):
+        # ledger[token_id] in the contract, a missing entry fails the whole operation
+        if token_id >= len(self.ledger) or self.ledger[token_id] < 0:
+            raise ModelError()
+        return self.ledger[token_id]
+
+    def mint_token(self, to_, metadata):
+        token_id = self.new_token_id()
+        self.put(self.token_metadata, token_id, metadata)
+        self.append(self.ledger, self.addresses.id(to_))
+        self.add_live_token(token_id)
+
+    @entrypoint
+    def mint(self, sender, to_, metadata):
+        if sender != self.admin:
+            raise ModelError(V1_NOT_MINTER)
+        self.mint_token(to_, metadata)
+
+    @entrypoint
+    def mint_batch(self, sender, items):
+        if sender != self.admin:
+            raise ModelError(V1_NOT_MINTER)
+        if len(items) > V1_MAX_MINT_BATCH_SIZE:
+            raise ModelError(V1_BATCH_TOO_LONG)
+        batch_bytes = 0
+        for to_, metadata in items:
+            batch_bytes += V1_MINT_ITEM_OVERHEAD + sum(
+                V1_METADATA_ENTRY_OVERHEAD + len(key) + len(value) for key, value in metadata.items())
+            if batch_bytes > V1_MAX_MINT_BATCH_BYTES:
+                raise ModelError(V1_BATCH_TOO_LARGE)
+            self.mint_token(to_, metadata)
+
+    @entrypoint
+    def transfer(self, sender, batch):
+        for from_, txs in batch:
+            from_id = self.addresses.id(from_)
+            may_transfer_all = from_id == sender or self.operator_for_all_key(from_id, sender) in self.all_operators
+            for to_, token_id, amount in txs:
+                if token_id >= self.next_token_id[0]:
+                    raise ModelError(V1_TRANSFER_UNDEFINED)
+                if not (may_transfer_all or self.operator_key(from_id, sender, token_id) in self.operators):
+                    raise ModelError(V1_NOT_OPERATOR)
+                if amount > 0:
+                    if amount != 1 or self.owner_of(token_id) != from_id:
+                        raise ModelError(V1_INSUFFICIENT_BALANCE)
+                    self.put(self.ledger, token_id, self.addresses.id(to_))
+
+    @entrypoint
+    def update_operators(self, sender, updates):
+        for action, owner, operator, token_id in updates:
+            if sender != self.owner_of(token_id):
+                raise ModelError(V1_NOT_OWNER)
+            key = self.operator_key(self.addresses.id(owner), self.addresses.id(operator), token_id)
+            if action == "add_operator":
+                self.put(self.operators, key, True)
+            else:
+                self.delete(self.operators, key)
+
+    @entrypoint
+    def burn(self, sender, token_id):
+        if token_id >= self.next_token_id[0]:
+            raise ModelError(V1_BURN_UNDEFINED)
+        if self.owner_of(token_id) != sender:
+            raise ModelError(V1_BURN_NOT_OWNER)
+        self.put(self.ledger, token_id, -1)
+        self.delete(self.token_metadata, token_id)
+        self.remove_live_token(token_id)
+
+    @entrypoint
+    def balance_of(self, sender, requests):
+        responses = []
+        for owner, token_id in requests:
+            if token_id >= self.next_token_id[0]:
+                raise ModelError(V1_BALANCE_UNDEFINED)
+            responses.append(((owner, token_id), 1 if self.owner_of(token_id) == self.addresses.id(owner) else 0))
+        return responses
+
+    def get_balance(self, owner, token_id):
+        if token_id >= self.next_token_id[0]:
+            raise ModelError(V1_VIEW_BALANCE_UNDEFINED)
+        return 1 if token_id < len(self.ledger) and self.ledger[token_id] == self.addresses.id(owner) else 0
+
+    def storage(self):
+        storage = super().storage()
+        storage["ledger"] = {
+            token_id: self.addresses.name(owner) for token_id, owner in enumerate(self.ledger) if owner >= 0
+        }
+        return storage
+
+
+class EditionsModel(Model):
+    """FA2_core, balances keyed by (owner, token_id) with zero balances deleted, supplies indexed by token id"""
+
+    __slots__ = ("ledger", "total_supply", "collaborators", "provenance_burn", "burn_address")
+
+    def __init__(self, admin, provenance_burn=True):
+        super().__init__(admin)
+        self.ledger = {}
+        self.total_supply = array("Q")
+        self.collaborators = {}
+        self.provenance_burn = provenance_burn
+        self.burn_address = self.addresses.id(BURN_ADDRESS)
+
+    def ledger_key(self, owner, token_id):
+        return (owner << ID_BITS) | token_id
+
+    def set_balance(self, key, balance):
+        if balance == 0:
+            self.delete(self.ledger, key)
+        else:
+            self.put(self.ledger, key, balance)
+
+    def verify_minter(self, sender):
+        if sender != self.admin and sender not in self.collaborators:
+            raise ModelError(V2_NOT_MINTER)
+
+    def mint_token(self, to_, amount, metadata):
+        if amount == 0:
+            raise ModelError(V2_EMPTY_EDITION)
+        token_id = self.new_token_id()
+        self.put(self.token_metadata, token_id, metadata)
+        key = self.ledger_key(self.addresses.id(to_), token_id)
+        self.set_balance(key, self.ledger.get(key, 0) + amount)
+        self.append(self.total_supply, amount)
+        self.add_live_token(token_id)
+
+    @entrypoint
+    def mint(self, sender, to_, amount, metadata):
+        self.verify_minter(sender)
+        self.mint_token(to_, amount, metadata)
+
+    @entrypoint
+    def mint_batch(self, sender, items):
+        self.verify_minter(sender)
+        for to_, amount, metadata in items:
+            self.mint_token(to_, amount, metadata)
+
+    @entrypoint
+    def transfer(self, sender, batch):
+        for from_, txs in batch:
+            from_id = self.addresses.id(from_)
+            may_transfer_all = from_id == sender or self.operator_for_all_key(from_id, sender) in self.all_operators
+            for to_, token_id, amount in txs:
+                if not (may_transfer_all or self.operator_key(from_id, sender, token_id) in self.operators):
+                    raise ModelError(FA2_NOT_OPERATOR)
+                if token_id >= self.next_token_id[0]:
+                    raise ModelError(FA2_TOKEN_UNDEFINED)
+                if amount > 0:
+                    from_key = self.ledger_key(from_id, token_id)
+                    from_balance = self.ledger.get(from_key, 0)
+                    if from_balance < amount:
+                        raise ModelError(FA2_INSUFFICIENT_BALANCE)
+                    self.set_balance(from_key, from_balance - amount)
+                    to_key = self.ledger_key(self.addresses.id(to_), token_id)
+                    self.set_balance(to_key, self.ledger.get(to_key, 0) + amount)
+
+    @entrypoint
+    def update_operators(self, sender, updates):
+        for action, owner, operator, token_id in updates:
+            owner_id = self.addresses.id(owner)
+            if owner_id != sender:
+                raise ModelError(FA2_NOT_OWNER)
+            key = self.operator_key(owner_id, self.addresses.id(operator), token_id)
+            if action == "add_operator":
+                self.put(self.operators, key, True)
+            else:
+                self.delete(self.operators, key)
+
+    @entrypoint
+    def burn(self, sender, token_id, amount):
+        if token_id >= self.next_token_id[0]:
+            raise ModelError(FA2_TOKEN_UNDEFINED)
+        key = self.ledger_key(sender, token_id)
+        balance = self.ledger.get(key)
+        if balance is None:
+            raise ModelError(FA2_NOT_OWNER)
+        if balance < amount:
+            raise ModelError(FA2_INSUFFICIENT_BALANCE)
+        self.set_balance(key, balance - amount)
+        if self.provenance_burn:
+            burn_key = self.ledger_key(self.burn_address, token_id)
+            self.set_balance(burn_key, self.ledger.get(burn_key, 0) + amount)
+        supply = self.total_supply[token_id]
+        if supply < amount:
+            raise ModelError(FA2_INSUFFICIENT_BALANCE)
+        self.put(self.total_supply, token_id, supply - amount)
+        if amount > 0 and supply == amount:
+            self.remove_live_token(token_id)
+
+    @entrypoint
+    def add_collaborator(self, sender, address):
+        if sender != self.admin:
+            raise ModelError(V2_NOT_ADMIN_ADD_COLLABORATOR)
+        self.put(self.collaborators, self.addresses.id(address), True)
+
+    @entrypoint
+    def remove_collaborator(self, sender, address):
+        if sender != self.admin:
+            raise ModelError(V2_NOT_ADMIN_REMOVE_COLLABORATOR)
+        self.delete(self.collaborators, self.addresses.id(address))
+
+    @entrypoint
+    def balance_of(self, sender, requests):
+        responses = []
+        for owner, token_id in requests:
+            if token_id >= self.next_token_id[0]:
+                raise ModelError(FA2_TOKEN_UNDEFINED)
+            responses.append(((owner, token_id), self.ledger.get(self.ledger_key(self.addresses.id(owner), token_id), 0)))
+        return responses
+
+    def get_balance(self, owner, token_id):
+        if token_id >= self.next_token_id[0]:
+            raise ModelError(FA2_TOKEN_UNDEFINED)
+        return self.ledger.get(self.ledger_key(self.addresses.id(owner), token_id), 0)
+
+    def get_total_supply(self, token_id):
+        # total_supply view
+        if token_id >= self.next_token_id[0]:
+            raise ModelError(FA2_TOKEN_UNDEFINED)
+        return self.total_supply[token_id]
+
+    def storage(self):
+        storage = super().storage()
+        name = self.addresses.name
+        mask = (1 << ID_BITS) - 1
+        storage["ledger"] = {(name(key >> ID_BITS), key & mask): balance for key, balance in self.ledger.items()}
+        storage["total_supply"] = dict(enumerate(self.total_supply))
+        storage["collaborators"] = sorted(name(address_id) for address_id in self.collaborators)
+        return storage
+
+
+MODELS = {"v1": ArtworkModel, "v2": EditionsModel}
@@ -0,0 +1,73 @@
+# Tests of the random operation streams of tools/differential.py
+#      python -m pytest tools
+
+import ast
+import io
+import random
+
+import pytest
+
+import differential
+from differential import ADMIN, Stream, apply, write_scenario
+from model import MODELS
+
+
+def replay(contract, seed, operations, holders=6, operators=2):
+    model = MODELS[contract](ADMIN)
+    stream = Stream(model, random.Random(seed), holders, operators)
+    ops, outcomes = [], []
+    for _ in range(operations):
+        op = stream.next()
+        ops.append(op)
+        outcomes.append(apply(model, op))
+    return model, stream, ops, outcomes
+
+
+@pytest.mark.parametrize("contract", sorted(MODELS))
+@pytest.mark.parametrize("seed", [0, 1, 2, 5, 7, 12, 21, 33])
+def test_long_streams_with_few_holders(contract, seed):
+    # With two holders every tracked holding is soon stale, the stream mints again instead of failing
+    model, stream, ops, outcomes = replay(contract, seed, 2000, holders=2)
+    assert len(ops) == 2000
+    failing = sum(1 for outcome in outcomes if outcome is not None)
+    assert failing < len(ops) // 4
+
+@pytest.mark.parametrize("contract", sorted(MODELS))
+def test_streams_are_reproducible(contract):
+    _, _, first, _ = replay(contract, 3, 300)
+    _, _, second, _ = replay(contract, 3, 300)
+    assert first == second
+
+@pytest.mark.parametrize("contract", sorted(MODELS))
+def test_valid_streams_do_not_fail(contract):
+    model = MODELS[contract](ADMIN)
+    stream = Stream(model, random.Random(5), 6, 2, invalid_share=0)
+    kinds = set()
+    for _ in range(1000):
+        op = stream.next()
+        kinds.add(op[0])
+        outcome = apply(model, op)
+        # Operators can still be drawn for a token they were never approved for
+        assert outcome is None or op[0] == "transfer" and op[1].startswith("operator")
+    assert {"mint", "transfer", "update_operators", "update_operators_for_all", "burn"} <= kinds
+
+@pytest.mark.parametrize("contract", sorted(MODELS))
+def test_scenario_is_valid_python(contract):
+    model, _, ops, outcomes = replay(contract, 12, 300, holders=2)
+    out = io.StringIO()
+    write_scenario(out, contract, ops, outcomes, model, "Differential %s" % contract)
+    source = out.getvalue()
+    ast.parse(source)
+    assert source.count("c1.") >= len(ops)
+    assert "scenario.verify(c1.data.next_token_id == %d)" % model.storage()["next_token_id"] in source
+
+def test_scenario_command(tmp_path):
+    out = tmp_path / "differential_v1.py"
+    args = ["scenario", "--contract", "v1", "--holders", "2", "--operators", "2", "--operations", "2000",
+            "--seed", "12", "--out", str(out)]
+    assert differential.main(args) == 0
+    ast.parse(out.read_text())
+
+def test_simulate_command(capsys):
+    assert differential.main(["simulate", "--contract", "v2", "--transfers", "2000", "--holders", "50"]) == 0
+    assert "operations/s" in capsys.readouterr().out
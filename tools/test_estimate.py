@@ -0,0 +1,109 @@
+# Tests of the storage accounting of tools/estimate.py
+#      python -m pytest tools
+
+import json
+
+import pytest
+
+import estimate
+from estimate import BIG_MAP_KEY_BYTES, COST_PER_BYTE_MUTEZ, EstimateError, V1Collection, V2Collection
+from mint import ADDRESS_SIZE, int_size, token_info_size
+
+INFO = {"name": b"#1", "artifactUri": b"data:image/svg+xml,<svg/>"}
+
+
+def mint(collection, to_="alice", amount=1, token_info=INFO):
+    return collection.run({"entrypoint": "mint", "to_": to_, "amount": amount, "token_info": token_info})
+
+def transfer(collection, from_, to_, token_id, amount=1):
+    return collection.run({"entrypoint": "transfer", "batch": [
+        {"from_": from_, "txs": [{"to_": to_, "token_id": token_id, "amount": amount}]}]})
+
+
+def test_v2_mint_pays_for_new_entries():
+    collection = V2Collection()
+    row = mint(collection, amount=10)
+    # token_metadata, ledger and total_supply, token 0 sits at position 0 so no slot is stored
+    metadata = BIG_MAP_KEY_BYTES + 2 + int_size(0) + token_info_size(INFO)
+    expected = metadata + 2 * (BIG_MAP_KEY_BYTES + int_size(10))
+    assert row["added_bytes"] == row["paid_storage_bytes"] == expected
+    assert row["burn_mutez"] == expected * COST_PER_BYTE_MUTEZ
+
+def test_v1_mint_stores_the_owner_address():
+    collection = V1Collection()
+    row = mint(collection)
+    assert row["added_bytes"] == BIG_MAP_KEY_BYTES + 2 + int_size(0) + token_info_size(INFO) + BIG_MAP_KEY_BYTES + ADDRESS_SIZE
+    with pytest.raises(EstimateError):
+        mint(collection, amount=2)
+
+def test_storage_below_the_high_water_mark_is_free():
+    collection = V2Collection()
+    mint(collection, amount=2)
+    # A new ledger entry for bob
+    first = transfer(collection, "alice", "bob", 0)
+    assert first["paid_storage_bytes"] == first["added_bytes"] == BIG_MAP_KEY_BYTES + int_size(1) - int_size(2) + int_size(1)
+    # Alice's entry is deleted, the bytes are freed but nothing is refunded
+    freed = transfer(collection, "alice", "bob", 0)
+    assert freed["added_bytes"] < 0 and freed["paid_storage_bytes"] == 0
+    # Growing back to the old size is already paid for
+    back = transfer(collection, "bob", "alice", 0)
+    assert back["added_bytes"] == -freed["added_bytes"]
+    assert back["paid_storage_bytes"] == 0
+
+def test_operators_cost_a_unit_entry():
+    collection = V2Collection()
+    mint(collection)
+    update = {"owner": "alice", "operator": "KT1", "token_id": 0}
+    row = collection.run({"entrypoint": "update_operators", "updates": [{"add_operator": update}]})
+    assert row["added_bytes"] == BIG_MAP_KEY_BYTES + 2
+    row = collection.run({"entrypoint": "update_operators", "updates": [{"remove_operator": update}]})
+    assert row["added_bytes"] == -(BIG_MAP_KEY_BYTES + 2)
+
+def test_v2_burn_moves_the_balance_to_the_burn_address():
+    provenance, true_burn = V2Collection(), V2Collection(provenance_burn=False)
+    for collection in (provenance, true_burn):
+        mint(collection, amount=3)
+        collection.run({"entrypoint": "burn", "sender": "alice", "token_id": 0, "amount": 3})
+    assert (estimate.BURN_ADDRESS, 0) in provenance.ledger
+    assert not true_burn.ledger.values
+    assert true_burn.all_tokens == 0
+    assert true_burn.used < provenance.used
+
+def test_errors():
+    collection = V2Collection()
+    with pytest.raises(EstimateError, match="above zero"):
+        mint(collection, amount=0)
+    mint(collection, amount=1)
+    with pytest.raises(EstimateError, match="FA2_INSUFFICIENT_BALANCE"):
+        transfer(collection, "alice", "bob", 0, amount=2)
+    with pytest.raises(EstimateError, match="FA2_TOKEN_UNDEFINED"):
+        transfer(collection, "alice", "bob", 1)
+    with pytest.raises(EstimateError, match="FA2_NOT_OWNER"):
+        collection.run({"entrypoint": "burn", "sender": "bob", "token_id": 0, "amount": 1})
+    with pytest.raises(EstimateError, match="cannot estimate"):
+        collection.run({"entrypoint": "set_metadata"})
+
+def test_owner_and_holder_indexes_add_storage():
+    plain, indexed = V2Collection(), V2Collection(owner_index=True, holder_index=True)
+    for collection in (plain, indexed):
+        mint(collection, amount=2)
+        transfer(collection, "alice", "bob", 0)
+    assert indexed.used > plain.used
+    assert indexed.owner_tokens.sizes.get("bob") == 1
+    assert indexed.token_holders.sizes.get(0) == 2
+
+def test_manifest(tmp_path, capsys):
+    manifest = {"contract": "v2", "operations": [
+        {"entrypoint": "mint", "to_": "tz1a", "amount": 10, "token_info": {"name": "#1", "creators": ["tz1a"]}},
+        {"entrypoint": "transfer", "batch": [{"from_": "tz1a", "txs": [{"to_": "tz1b", "token_id": 0, "amount": 1}]}]},
+    ]}
+    rows = estimate.estimate(manifest)
+    assert [row["entrypoint"] for row in rows] == ["mint", "transfer"]
+    path = tmp_path / "drop.json"
+    path.write_text(json.dumps(manifest))
+    assert estimate.main([str(path), "--cache-dir", str(tmp_path / "cache")]) == 0
+    assert "burn:" in capsys.readouterr().out
+    manifest["operations"].append(
+        {"entrypoint": "transfer", "batch": [{"from_": "tz1a", "txs": [{"to_": "tz1b", "token_id": 0, "amount": 20}]}]})
+    with pytest.raises(EstimateError, match="operation 2"):
+        estimate.estimate(manifest)
@@ -0,0 +1,123 @@
+# Tests of the encoding and cache of tools/metadata_builder.py
+#      python -m pytest tools
+
+import base64
+import io
+import re
+from urllib.parse import unquote_to_bytes
+
+import pytest
+
+import metadata_builder as mb
+from metadata_builder import Artifact, MetadataBuilder, data_uri, minify
+
+SVG = """<?xml version="1.0" encoding="UTF-8"?>
+<!-- drawn by hand -->
+<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 10">
+    <style>
+        rect   { fill: #f00; }
+    </style>
+    <rect width="10"   height="10"/>
+    <text x="1">50% off   #1</text>
+</svg>
+"""
+
+HTML = """<!DOCTYPE html>
+<html>
+  <body>
+    <p>Zero   <b>on</b> <i>chain</i></p>
+    <pre>  keep
+    this</pre>
+    <script>
+      let a = "  two  spaces";
+    </script>
+  </body>
+</html>
+"""
+
+
+def decode(uri):
+    header, _, payload = uri.partition(b",")
+    if header.endswith(b";base64"):
+        return base64.b64decode(payload)
+    return unquote_to_bytes(payload)
+
+
+def test_minify_svg():
+    result = minify(SVG, "image/svg+xml")
+    assert result.startswith("<svg") and result.endswith("</svg>")
+    assert "drawn by hand" not in result
+    assert "  " not in result
+    assert '<rect width="10" height="10"/>' in result
+    assert "<text x=\"1\">50% off #1</text>" in result
+
+def test_minify_keeps_preformatted_html():
+    result = minify(HTML, "text/html")
+    assert "<b>on</b> <i>chain</i>" in result
+    assert "<pre>  keep\n    this</pre>" in result
+    assert 'let a = "  two  spaces";' in result
+
+@pytest.mark.parametrize("source, mime", [(SVG, "image/svg+xml"), (HTML, "text/html"), ("<p>zéro</p>", "text/html")])
+def test_data_uris_decode_to_the_minified_source(source, mime):
+    body = minify(source, mime).encode("utf-8")
+    for uri in (mb.percent_data_uri(body, mime), mb.base64_data_uri(body, mime)):
+        assert uri.startswith(b"data:" + mime.encode("ascii"))
+        assert decode(uri) == body
+    # % and # would end or break the URI, both are only written escaped
+    percent = mb.percent_data_uri(body, mime)
+    assert b"#" not in percent
+    assert re.fullmatch(rb"([^%]|%[0-9A-F]{2})*", percent)
+
+
+def test_data_uri_picks_the_shorter_encoding():
+    text = b"<svg>" + b"a" * 300 + b"</svg>"
+    assert data_uri(text, "image/svg+xml")[0] == "percent"
+    binary = bytes(range(256)) * 2
+    encoding, uri = data_uri(binary, "text/html")
+    assert encoding == "base64"
+    assert decode(uri) == binary
+
+def test_cached_artifacts(tmp_path):
+    art = tmp_path / "art.svg"
+    art.write_text(SVG)
+    builder = MetadataBuilder(str(tmp_path / "cache"))
+    first, info = builder.artifact(str(art))
+    assert isinstance(first, Artifact)
+    assert decode(first.read()) == minify(SVG, "image/svg+xml").encode("utf-8")
+    # A second builder finds the same entry without encoding again
+    second, cached_info = MetadataBuilder(str(tmp_path / "cache")).artifact(str(art))
+    assert second.path == first.path and second.read() == first.read()
+    assert cached_info == info
+    # A changed source is another entry
+    art.write_text(SVG.replace("#f00", "#0f0"))
+    third, _ = builder.artifact(str(art))
+    assert third.path != first.path
+
+def test_large_artworks_are_mapped(tmp_path):
+    art = tmp_path / "large.svg"
+    art.write_text("<svg>" + "<rect/>" * (mb.MMAP_THRESHOLD // 7 + 1) + "</svg>")
+    uri, info = MetadataBuilder(None).artifact(str(art))
+    assert info["source_bytes"] > mb.MMAP_THRESHOLD
+    assert decode(uri).decode("utf-8") == art.read_text()
+
+def test_token_info_values():
+    token_info = MetadataBuilder(None).token_info({"name": "Zéro", "creators": ["tz1a"], "raw": b"\x00"})
+    assert token_info == {"name": "Zéro".encode("utf-8"), "creators": b'["tz1a"]', "raw": b"\x00"}
+
+def test_write_hex_in_chunks(monkeypatch):
+    monkeypatch.setattr(mb, "HEX_CHUNK", 3)
+    out = io.StringIO()
+    mb.write_hex(out, bytes(range(10)))
+    assert out.getvalue() == bytes(range(10)).hex()
+
+def test_michelson_and_smartpy_maps_are_sorted():
+    token_info = {"name": b"a", "decimals": b"0", "artifactUri": b"\xff"}
+    out = io.StringIO()
+    mb.write_michelson_token_info(out, token_info)
+    assert out.getvalue() == '{ Elt "artifactUri" 0xff ; Elt "decimals" 0x30 ; Elt "name" 0x61 }'
+    out = io.StringIO()
+    mb.write_michelson_token_info(out, {})
+    assert out.getvalue() == "{}"
+    out = io.StringIO()
+    mb.write_smartpy_token_info(out, token_info)
+    assert out.getvalue() == '{"artifactUri": sp.bytes("0xff"), "decimals": sp.bytes("0x30"), "name": sp.bytes("0x61")}'
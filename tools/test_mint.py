@@ -0,0 +1,81 @@
+# Tests of the batch planner and gas model of tools/mint.py
+#      python -m pytest tools
+
+import pytest
+
+from mint import (
+    HARD_GAS_LIMIT_PER_OPERATION, MAX_OPERATION_SIZE, OPERATION_OVERHEAD, V1_MAX_MINT_BATCH_BYTES, V1_MAX_MINT_BATCH_SIZE,
+    GasModel, fit_line, mint_item_size, plan_batches, zarith_size,
+)
+
+
+def artworks(count, value_size, extra_keys=0):
+    token_info = {"name": b"#", "artifactUri": b"a" * value_size}
+    token_info.update({"k%03d" % i: b"" for i in range(extra_keys)})
+    return [{"file": "%04d.svg" % i, "token_info": dict(token_info)} for i in range(count)]
+
+def v1_counted_bytes(batch):
+    # What Fa2NftMint.mint_batch adds up: 34 bytes per item and 12 per metadata entry on top of the keys and values
+    return sum(34 + sum(12 + len(k) + len(v) for k, v in a["token_info"].items()) for a in batch)
+
+
+def test_zarith_size():
+    assert [zarith_size(v) for v in (0, 63, 64, 8191, 8192)] == [1, 1, 2, 2, 3]
+
+def test_v1_item_size_matches_contract_count():
+    batch = artworks(3, 50, extra_keys=4)
+    assert sum(mint_item_size("v1", a["token_info"], 1) for a in batch) == v1_counted_bytes(batch)
+
+def test_v1_batches_respect_the_contract_limits():
+    # Small artworks would fit several hundred to an operation, v1 still takes at most 100 per mint_batch
+    batches, oversized = plan_batches(artworks(450, 10), "v1", 1, GasModel(per_item=0, per_byte=0))
+    assert not oversized
+    assert [len(b) for b in batches] == [100, 100, 100, 100, 50]
+    # Many small entries are counted with their framing against the contract byte cap
+    batches, _ = plan_batches(artworks(300, 10, extra_keys=20), "v1", 1, GasModel(per_item=0, per_byte=0))
+    assert all(v1_counted_bytes(b) <= V1_MAX_MINT_BATCH_BYTES for b in batches)
+    assert all(len(b) <= V1_MAX_MINT_BATCH_SIZE for b in batches)
+    assert sum(len(b) for b in batches) == 300
+
+def test_v2_batches_only_follow_the_operation_limits():
+    batches, _ = plan_batches(artworks(450, 10), "v2", 10, GasModel(per_item=0, per_byte=0))
+    assert len(batches[0]) > V1_MAX_MINT_BATCH_SIZE
+    budget = MAX_OPERATION_SIZE - OPERATION_OVERHEAD - 5
+    assert all(sum(a["arg_bytes"] for a in b) <= budget for b in batches)
+
+def test_batches_keep_file_order_and_max_items():
+    batches, _ = plan_batches(artworks(25, 100), "v2", 1, GasModel(), max_items=10)
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert [a["file"] for b in batches for a in b] == ["%04d.svg" % i for i in range(25)]
+
+def test_gas_limit_splits_batches():
+    model = GasModel(per_item=100000, per_byte=0, margin=1)
+    batches, _ = plan_batches(artworks(25, 10), "v2", 1, model)
+    assert all(len(b) * 100000 <= HARD_GAS_LIMIT_PER_OPERATION for b in batches)
+    assert [len(b) for b in batches] == [10, 10, 5]
+
+def test_oversized_artworks_are_reported():
+    items = artworks(2, 10) + artworks(1, 40000)
+    batches, oversized = plan_batches(items, "v2", 1, GasModel())
+    assert [len(b) for b in batches] == [2]
+    assert len(oversized) == 1 and oversized[0]["arg_bytes"] > MAX_OPERATION_SIZE
+    # The v1 byte cap is lower than the operation budget
+    _, oversized = plan_batches(artworks(1, V1_MAX_MINT_BATCH_BYTES), "v1", 1, GasModel())
+    assert len(oversized) == 1
+
+def test_fit_line():
+    assert fit_line([(1, 5), (3, 9), (5, 13)]) == pytest.approx((3, 2))
+    assert fit_line([(4, 10), (4, 20)]) == (15, 0)
+
+def test_gas_model_from_bench():
+    rows = [
+        {"contract": "v2", "variant": "default", "group": "payloads", "entrypoint": "mint",
+         "payload_bytes": size, "consumed_gas": 1500 + 0.5 * size}
+        for size in (1024, 2048, 5120)
+    ]
+    rows.append(dict(rows[0], contract="v1", consumed_gas=1))
+    model = GasModel.from_bench({"results": rows}, "v2")
+    assert (model.per_item, model.per_byte) == pytest.approx((1500, 0.5))
+    assert model.estimate(1000) == pytest.approx((1500 + 500) * model.margin)
+    with pytest.raises(ValueError):
+        GasModel.from_bench({"results": rows}, "v1")
@@ -0,0 +1,76 @@
+# Tests of the contract models of tools/model.py
+#      python -m pytest tools
+
+import pytest
+
+import model as m
+from model import ArtworkModel, EditionsModel, ModelError
+
+
+def error(call, *args):
+    with pytest.raises(ModelError) as raised:
+        call(*args)
+    return raised.value.message
+
+
+def test_v1_mint_transfer_burn():
+    nft = ArtworkModel("admin")
+    nft.mint_batch("admin", [("alice", {"name": b"#0"}), ("bob", {"name": b"#1"})])
+    assert error(nft.mint, "alice", "alice", {}) == m.V1_NOT_MINTER
+    nft.transfer("alice", [("alice", [("carol", 0, 1)])])
+    assert (nft.get_balance("carol", 0), nft.get_balance("alice", 0)) == (1, 0)
+    assert error(nft.transfer, "alice", [("carol", [("alice", 0, 1)])]) == m.V1_NOT_OPERATOR
+    assert error(nft.transfer, "carol", [("carol", [("alice", 2, 1)])]) == m.V1_TRANSFER_UNDEFINED
+    assert error(nft.burn, "alice", 1) == m.V1_BURN_NOT_OWNER
+    nft.burn("bob", 1)
+    storage = nft.storage()
+    assert storage["ledger"] == {0: "carol"}
+    assert (storage["next_token_id"], storage["all_tokens"]) == (2, 1)
+    # The ledger entry of a burnt token is gone, reading it fails like a missing big_map key
+    assert error(nft.burn, "bob", 1) is None
+
+def test_v1_mint_batch_limits():
+    nft = ArtworkModel("admin")
+    assert error(nft.mint_batch, "admin", [("alice", {})] * 101) == m.V1_BATCH_TOO_LONG
+    # 100 items with 30 entries of 3 byte keys count 100 * (34 + 30 * 15) = 48400 bytes
+    metadata = {"k%02d" % i: b"" for i in range(30)}
+    assert error(nft.mint_batch, "admin", [("alice", metadata)] * 100) == m.V1_BATCH_TOO_LARGE
+    assert nft.storage()["next_token_id"] == 0
+    nft.mint_batch("admin", [("alice", {})] * 100)
+    assert nft.storage()["all_tokens"] == 100
+
+def test_failing_operation_changes_nothing():
+    editions = EditionsModel("admin")
+    editions.mint("admin", "alice", 5, {})
+    before = editions.storage()
+    # The first transfer is written before the second one fails
+    batch = [("alice", [("bob", 0, 2), ("carol", 0, 4)])]
+    assert error(editions.transfer, "alice", batch) == m.FA2_INSUFFICIENT_BALANCE
+    assert editions.storage() == before
+    assert error(editions.mint_batch, "admin", [("bob", 1, {}), ("bob", 0, {})]) == m.V2_EMPTY_EDITION
+    assert editions.storage() == before
+
+def test_v2_editions_and_provenance_burn():
+    editions = EditionsModel("admin")
+    assert error(editions.mint, "alice", "alice", 1, {}) == m.V2_NOT_MINTER
+    editions.add_collaborator("admin", "alice")
+    editions.mint("alice", "alice", 3, {})
+    editions.transfer("alice", [("alice", [("bob", 0, 3)])])
+    # Zero balances are deleted from the ledger
+    assert editions.storage()["ledger"] == {("bob", 0): 3}
+    assert error(editions.update_operators, "alice", [("add_operator", "bob", "alice", 0)]) == m.FA2_NOT_OWNER
+    editions.update_operators("bob", [("add_operator", "bob", "alice", 0)])
+    editions.transfer("alice", [("bob", [("alice", 0, 1)])])
+    editions.burn("bob", 0, 2)
+    assert editions.get_total_supply(0) == 1
+    assert editions.storage()["ledger"] == {("alice", 0): 1, (m.BURN_ADDRESS, 0): 2}
+    assert error(editions.burn, "bob", 0, 1) == m.FA2_NOT_OWNER
+    assert error(editions.get_balance, "bob", 1) == m.FA2_TOKEN_UNDEFINED
+
+def test_true_burn_removes_the_token():
+    editions = EditionsModel("admin", provenance_burn=False)
+    editions.mint("admin", "alice", 2, {})
+    editions.burn("alice", 0, 2)
+    storage = editions.storage()
+    assert storage["ledger"] == {}
+    assert storage["all_tokens"] == 0